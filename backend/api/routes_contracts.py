@@ -1,13 +1,44 @@
 # backend/api/routes_contracts.py
 from fastapi import APIRouter, UploadFile, File, HTTPException, Request, Form
-from services.parser_service import extract_text
-from services.clause_service import evaluate_contract
-from database.supabase_client import supabase
+from fastapi.responses import JSONResponse, StreamingResponse
+from services.parser_service import (
+    EXTRACTOR_VERSION,
+    ExtractionError,
+    extract_text_from_upload,
+    iter_document_pages,
+    spool_upload,
+)
+from services.clause_service import (
+    STREAM_CHUNK_SIZE,
+    evaluate_contract_cached,
+    evaluate_pages,
+    evaluation_version,
+    is_complete_result,
+    iter_evaluate_contract,
+    iter_evaluate_pages,
+    iter_result_events,
+    risk_label_for_score,
+)
+from services.result_cache import content_key, result_cache
+from services import job_queue
+from services.evaluation_executor import LANE_BULK, LANE_INTERACTIVE, ExecutorSaturated, evaluation_executor
+from services.precedent_service import find_precedents, get_reference_store
+from services.reference_store import PRECEDENTS_TOP_K
+from services.segmenter import segment_text
+from services.revision_service import compare_evaluations, iter_revise_contract, revise_contract_cached
+from database.supabase_client import contract_writer, get_supabase, insert_contract_row
+from database.compact_storage import load_evaluation
+from starlette.concurrency import run_in_threadpool
+from itertools import chain
 import json
+import os
 import jwt
 
 router = APIRouter()
 
+# Pasted texts longer than this are treated as bulk work, like uploads
+INTERACTIVE_MAX_CHARS = int(os.getenv("INTERACTIVE_MAX_CHARS", "20000"))
+
 def extract_user_id_from_bearer(request: Request):
     """
     Try to decode Bearer token (JWT) from Authorization header and return 'sub' (user id).
@@ -28,19 +59,10 @@ def extract_user_id_from_bearer(request: Request):
     except Exception:
         return None
 
-@router.post("/evaluate")
-async def evaluate(request: Request):
+def resolve_contract_text(payload):
     """
-    Accepts flexible payloads. Prefer keys: text, content, contract_text.
-    Returns evaluation result from clause_service.evaluate_contract(...)
-    Also attempts to insert a summary row into Supabase (non-blocking).
+    Resolve contract text from several possible keys; raises 422 when missing.
     """
-    try:
-        payload = await request.json()
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid JSON payload")
-
-    # Resolve text from several possible keys
     text = None
     if isinstance(payload, dict):
         for key in ("text", "content", "contract_text", "body"):
@@ -55,10 +77,84 @@ async def evaluate(request: Request):
 
     if not text:
         raise HTTPException(status_code=422, detail="Request must include contract text under 'text'/'content'/'contract_text'")
+    return text
+
+
+def lane_for_text(text: str) -> str:
+    return LANE_INTERACTIVE if len(text) <= INTERACTIVE_MAX_CHARS else LANE_BULK
+
+
+def resolve_name_and_user(payload, request: Request):
+    """
+    Name fallback: payload.name -> payload.filename -> 'manual evaluation'.
+    User id from the payload, else from the bearer token.
+    """
+    name_val = None
+    if isinstance(payload, dict):
+        name_val = payload.get("name") or payload.get("filename")
+    if not name_val:
+        name_val = "manual evaluation"
+
+    user_id = payload.get("user_id") if isinstance(payload, dict) else None
+    if not user_id:
+        user_id = extract_user_id_from_bearer(request)
+    return name_val, user_id
+
+
+def load_stored_evaluation(evaluation_id: str) -> dict:
+    """
+    The stored evaluation a revision is compared against (blocking; run it off the loop).
+    Rows still queued by the write-behind writer are flushed first, so a revision
+    can be submitted right after the evaluation it revises.
+    """
+    client = get_supabase()
+    if client is None:
+        raise HTTPException(status_code=503, detail="Storage is not configured")
+    try:
+        previous = load_evaluation(client, evaluation_id)
+        if previous is None:
+            contract_writer.flush(timeout=10.0)
+            previous = load_evaluation(client, evaluation_id)
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Could not load evaluation: {e}")
+    if previous is None:
+        raise HTTPException(status_code=404, detail=f"Evaluation {evaluation_id} not found")
+    return previous
+
+
+def previous_evaluation_id(payload):
+    return payload.get("previous_evaluation_id") if isinstance(payload, dict) else None
+
+
+@router.post("/evaluate")
+async def evaluate(request: Request):
+    """
+    Accepts flexible payloads. Prefer keys: text, content, contract_text.
+    Returns evaluation result from clause_service.evaluate_contract(...)
+    Also attempts to insert a summary row into Supabase (non-blocking).
+    With "previous_evaluation_id", the text is evaluated as a revision of that
+    evaluation: only changed clauses are re-evaluated and the result has a
+    "revision" block (clause diff, risk deltas).
+    """
+    try:
+        payload = await request.json()
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid JSON payload")
 
-    # evaluate
+    text = resolve_contract_text(payload)
+    previous_id = previous_evaluation_id(payload)
+
+    # evaluate (identical texts are served from the result cache)
+    # evaluation runs on the bounded executor, never on the event loop;
+    # a full lane raises ExecutorSaturated, answered with 429 + Retry-After
     try:
-        result = evaluate_contract(text)
+        if previous_id:
+            previous = await run_in_threadpool(load_stored_evaluation, previous_id)
+            result = await evaluation_executor.run(revise_contract_cached, text, previous, lane=lane_for_text(text))
+        else:
+            result = await evaluation_executor.run(evaluate_contract_cached, text, lane=lane_for_text(text))
+    except (ExecutorSaturated, HTTPException):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Evaluation failed: {e}")
 
@@ -72,39 +168,22 @@ async def evaluate(request: Request):
     avg_score = result.get("average_risk_score")
 
     # Try to insert into Supabase if available (non-blocking)
-    try:
-        if supabase:
-            # determine a name fallback: payload.name -> payload.filename -> 'manual evaluation'
-            name_val = None
-            if isinstance(payload, dict):
-                name_val = payload.get("name") or payload.get("filename")
-            if not name_val:
-                name_val = "manual evaluation"
-
-            # try to extract user id from bearer token or payload
-            user_id = payload.get("user_id") if isinstance(payload, dict) else None
-            if not user_id:
-                user_id = extract_user_id_from_bearer(request)
-
-            insert_payload = {
-                "name": name_val,
-                "text": text,
-                "risk_score": avg_score,
-                "level": level,
-                "categories_summary": result.get("categories_summary"),
-                "details": result.get("details"),
-                
-                # user_id may be null if we couldn't extract it
-                "user_id": user_id
-            }
-
-            # Remove None values (but keep empty dicts as JSON strings if present)
-            insert_payload = {k: v for k, v in insert_payload.items() if v is not None}
-
-            supabase.table("contracts").insert(insert_payload).execute()
-    except Exception as e:
-        # log but do not fail the request
-        print("⚠️ Supabase insert failed (evaluate):", e)
+    name_val, user_id = resolve_name_and_user(payload, request)
+    evaluation_id = insert_contract_row({
+        "name": name_val,
+        "text": text,
+        "risk_score": avg_score,
+        "level": level,
+        "categories_summary": result.get("categories_summary"),
+        "details": result.get("details"),
+        "evaluation_version": evaluation_version(),
+        "previous_evaluation_id": previous_id,
+
+        # user_id may be null if we couldn't extract it
+        "user_id": user_id
+    }, source="evaluate")
+    if evaluation_id:
+        result["evaluation_id"] = evaluation_id
 
     return result
 
@@ -113,11 +192,65 @@ async def evaluate(request: Request):
 async def upload_contract(
     file: UploadFile = File(...),
     user_id: str | None = Form(None),
-    name: str | None = Form(None)
+    name: str | None = Form(None),
+    previous_evaluation_id: str | None = Form(None),
+    mode: str = "sync"
 ):
-    text = await extract_text(file)
+    """
+    Evaluates an uploaded PDF/DOCX. With ?mode=async the upload is queued for the
+    worker pool and a job id is returned immediately (see /contracts/jobs/{job_id}).
+    With previous_evaluation_id the file is evaluated as a revision (see /evaluate).
+    """
+    # size-capped; UploadTooLarge becomes a 413
+    upload = await spool_upload(file)
+
+    try:
+        if mode == "async":
+            # copying the spooled upload and the SQLite insert stay off the event loop
+            job_id = await run_in_threadpool(lambda: job_queue.enqueue_upload(upload.open(), file.filename, {
+                "user_id": user_id,
+                "name": name,
+                "previous_evaluation_id": previous_evaluation_id,
+            }))
+            return JSONResponse(status_code=202, content={
+                "job_id": job_id,
+                "status": job_queue.STATUS_QUEUED,
+                "status_url": f"/contracts/jobs/{job_id}",
+                "result_url": f"/contracts/jobs/{job_id}/result",
+            })
+
+        # Re-uploads of the same file skip parsing, embedding and LLM calls entirely
+        def cached_parse_and_evaluate():
+            return result_cache.get_or_compute(
+                upload_cache_key(upload.sha256),
+                lambda: evaluate_document(upload, file.filename),
+                cacheable=lambda value: value is not None and is_complete_result(value["result"]),
+            )
+
+        def parse_and_revise(previous):
+            cached = result_cache.get(upload_cache_key(upload.sha256))
+            text = cached["text"] if cached else extract_text_from_upload(upload)
+            if not text:
+                return None
+            return {"text": text, "result": revise_contract_cached(text, previous)}
+
+        if previous_evaluation_id:
+            previous = await run_in_threadpool(load_stored_evaluation, previous_evaluation_id)
+            evaluation = await evaluation_executor.run(parse_and_revise, previous, lane=LANE_BULK)
+        else:
+            evaluation = await evaluation_executor.run(cached_parse_and_evaluate, lane=LANE_BULK)
+    except ExtractionError as e:
+        # a partly read contract is neither evaluated, stored nor cached
+        return {
+            "success": False,
+            "message": str(e),
+            "user_id": user_id,
+            "file_name": file.filename
+        }
+    finally:
+        upload.close()
 
-    if not text.strip():
+    if evaluation is None:
         return {
             "success": False,
             "message": "Could not extract text from file. Unsupported or corrupted file.",
@@ -125,44 +258,365 @@ async def upload_contract(
             "file_name": file.filename
         }
 
-    result = evaluate_contract(text)
+    text = evaluation["text"]
+    result = evaluation["result"]
 
     # Add a risk_level fallback
     if result and "average_risk_score" in result:
-        avg = result["average_risk_score"]
-        if avg <= 1.5:
-            risk_label = "Low"
-        elif avg <= 2.3:
-            risk_label = "Medium"
-        else:
-            risk_label = "High"
-        result["risk_level"] = risk_label
+        result["risk_level"] = risk_label_for_score(result["average_risk_score"])
 
     # Save to Supabase
+    evaluation_id = insert_contract_row({
+        "name": name or file.filename,
+        "text": text,
+        "risk_score": result.get("average_risk_score"),
+        "level": result.get("risk_level"),
+        "user_id": user_id,
+        "categories_summary": result.get("categories_summary"),
+        "details": result.get("details"),
+        "evaluation_version": evaluation_version(),
+        "previous_evaluation_id": previous_evaluation_id,
+    }, source="upload")
+
+    return upload_response(result, evaluation_id)
+
+
+def upload_cache_key(file_sha256: str) -> str:
+    return content_key("file", file_sha256, f"{EXTRACTOR_VERSION}|{evaluation_version()}")
+
+
+def evaluate_document(source, file_name: str):
+    """
+    Extraction and evaluation in one pass: clauses are classified while later pages
+    are still being extracted. Returns {"text", "result"}, or None if no text was found.
+    """
+    pages = []
+
+    def collect():
+        for page in iter_document_pages(source, file_name):
+            pages.append(page)
+            yield page
+
+    result = evaluate_pages(collect())
+    text = "".join(pages).rstrip()
+    if not text:
+        return None
+    if is_complete_result(result):
+        # the same text pasted into /evaluate is then a cache hit
+        result_cache.set(content_key("text", text, evaluation_version()), result)
+    return {"text": text, "result": result}
+
+
+def upload_response(result: dict, evaluation_id: str = None) -> dict:
+    response = {
+        "overall_risk": result.get("overall_risk"),
+        "risk_level": result.get("risk_level"),
+        "risk_counts": result.get("risk_counts"),
+        "details": result.get("details"),
+        "summary": result.get("summary", {})
+    }
+    if evaluation_id:
+        response["evaluation_id"] = evaluation_id
+    if "revision" in result:
+        response["revision"] = result["revision"]
+    return response
+
+
+@router.get("/evaluations/{evaluation_id}")
+async def get_evaluation(evaluation_id: str, include_text: bool = True):
+    """
+    A stored (compact-format) evaluation in the /evaluate response shape.
+    """
+    def load():
+        client = get_supabase()
+        if client is None:
+            raise HTTPException(status_code=503, detail="Storage is not configured")
+        return load_evaluation(client, evaluation_id, include_text=include_text)
+
+    try:
+        result = await run_in_threadpool(load)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Could not load evaluation: {e}")
+    if result is None:
+        raise HTTPException(status_code=404, detail="Evaluation not found")
+    return result
+
+
+@router.post("/precedents")
+async def precedents(request: Request):
+    """
+    The most similar CUAD reference clauses, with their category and risk labels,
+    for each clause of: "clauses" (a list), "text" (segmented like /evaluate) or
+    "evaluation_id" (a stored evaluation). "k" defaults to PRECEDENTS_TOP_K.
+    """
+    try:
+        payload = await request.json()
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid JSON payload")
+    if not isinstance(payload, dict):
+        raise HTTPException(status_code=422, detail="Expected a JSON object")
+
+    try:
+        k = int(payload.get("k") or PRECEDENTS_TOP_K)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=422, detail="'k' must be an integer")
+
+    if payload.get("clauses"):
+        clauses = [str(c) for c in payload["clauses"]]
+    elif payload.get("evaluation_id"):
+        stored = await run_in_threadpool(load_stored_evaluation, payload["evaluation_id"])
+        clauses = [d["sentence"] for d in stored["details"]]
+    else:
+        clauses = [segment.text for segment in segment_text(resolve_contract_text(payload))]
+
+    def lookup():
+        try:
+            store = get_reference_store()
+        except RuntimeError as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        if store is None:
+            raise HTTPException(status_code=503, detail="No reference store has been built")
+        return store.stats(), find_precedents(clauses, k=k)
+
+    store_stats, matches = await evaluation_executor.run(lookup, lane=LANE_INTERACTIVE)
+    return {
+        "k": k,
+        "reference_store": store_stats,
+        "results": [
+            {"index": idx, "sentence": clause, "precedents": found}
+            for idx, (clause, found) in enumerate(zip(clauses, matches))
+        ],
+    }
+
+
+# =========================
+# Background Jobs
+# =========================
+
+@router.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    job = await run_in_threadpool(job_queue.get_job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "stage": job["stage"],
+        "progress": job["progress"],
+        "attempts": job["attempts"],
+        "error": job["error"],
+        "file_name": job["params"].get("file_name"),
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"],
+    }
+
+
+@router.get("/jobs/{job_id}/result")
+async def job_result(job_id: str):
+    job = await run_in_threadpool(job_queue.get_job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] == job_queue.STATUS_FAILED:
+        raise HTTPException(status_code=500, detail=f"Job failed: {job['error']}")
+    if job["status"] != job_queue.STATUS_DONE:
+        return JSONResponse(status_code=202, content={
+            "job_id": job["id"],
+            "status": job["status"],
+            "progress": job["progress"],
+        })
+    return upload_response(job["result"], job["result"].get("evaluation_id"))
+
+
+# =========================
+# Streaming Variants
+# =========================
+
+def wants_sse(request: Request) -> bool:
+    return (
+        "text/event-stream" in (request.headers.get("accept") or "")
+        or request.query_params.get("format") == "sse"
+    )
+
+
+def format_event(event: dict, sse: bool) -> str:
+    """
+    NDJSON line, or a Server-Sent Event named after the event type.
+    """
+    data = json.dumps(event, ensure_ascii=False)
+    if sse:
+        return f"event: {event['event']}\ndata: {data}\n\n"
+    return data + "\n"
+
+
+def stream_evaluation(text: str, on_complete=None, previous: dict = None):
+    """
+    Yields evaluation events for `text`, replaying cached results when available.
+    The finished result is cached and handed to `on_complete`.
+    With `previous`, `text` is evaluated as its revision and the summary carries the diff.
+    """
+    cache_key = content_key("text", text, evaluation_version())
+    cached = result_cache.get(cache_key)
+    if cached and previous is not None:
+        cached = dict(cached)
+        cached["revision"] = compare_evaluations(previous, cached["details"], cached, 0, "cached")
+    if cached:
+        events = iter_result_events(cached)
+    elif previous is not None:
+        events = iter_revise_contract(text, previous)
+    else:
+        events = iter_evaluate_contract(text, chunk_size=STREAM_CHUNK_SIZE)
+
+    details = []
+    result = None
+    for event in events:
+        if event["event"] == "clause":
+            details.append(event["detail"])
+        elif event["event"] == "summary":
+            result = {"details": details, **event["summary"]}
+        yield event
+
+    if result is None:
+        return
+    if not cached and is_complete_result(result):
+        result_cache.set(cache_key, {k: v for k, v in result.items() if k != "revision"})
+    if on_complete:
+        on_complete(result)
+
+
+def streaming_response(events, sse: bool) -> StreamingResponse:
+    """
+    `events` is the async iterator from evaluation_executor.stream.
+    """
+    media_type = "text/event-stream" if sse else "application/x-ndjson"
+
+    async def body():
+        try:
+            async for event in events:
+                yield format_event(event, sse)
+        finally:
+            # client gone: stops the evaluation behind the stream
+            await events.aclose()
+
+    return StreamingResponse(
+        body(),
+        media_type=media_type,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/evaluate/stream")
+async def evaluate_stream(request: Request):
+    """
+    Streaming /evaluate: one event per classified clause, one per finished
+    suggestion, then a summary. NDJSON by default, SSE with Accept: text/event-stream.
+    "previous_evaluation_id" works as in /evaluate; the diff is in the summary event.
+    """
     try:
-        payload = {
-            "name": name or file.filename,
+        payload = await request.json()
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid JSON payload")
+
+    text = resolve_contract_text(payload)
+    name_val, user_id = resolve_name_and_user(payload, request)
+    previous_id = previous_evaluation_id(payload)
+    previous = await run_in_threadpool(load_stored_evaluation, previous_id) if previous_id else None
+
+    def save(result):
+        insert_contract_row({
+            "name": name_val,
+            "text": text,
+            "risk_score": result.get("average_risk_score"),
+            "level": result.get("risk_level"),
+            "categories_summary": result.get("categories_summary"),
+            "details": result.get("details"),
+            "evaluation_version": evaluation_version(),
+            "previous_evaluation_id": previous_id,
+            "user_id": user_id
+        }, source="evaluate/stream")
+
+    events = evaluation_executor.stream(
+        lambda: stream_evaluation(text, on_complete=save, previous=previous),
+        lane=lane_for_text(text),
+    )
+    return streaming_response(events, wants_sse(request))
+
+
+@router.post("/upload/stream")
+async def upload_contract_stream(
+    request: Request,
+    file: UploadFile = File(...),
+    user_id: str | None = Form(None),
+    name: str | None = Form(None)
+):
+    """
+    Streaming /upload. Extraction happens inside the stream, page by page, so the
+    first clause events go out before the whole document is extracted.
+    """
+    upload = await spool_upload(file)
+    file_name = file.filename
+
+    def save(text, result):
+        if "average_risk_score" in result:
+            result["risk_level"] = risk_label_for_score(result["average_risk_score"])
+        insert_contract_row({
+            "name": name or file_name,
             "text": text,
             "risk_score": result.get("average_risk_score"),
             "level": result.get("risk_level"),
             "user_id": user_id,
             "categories_summary": result.get("categories_summary"),
-            "details": result.get("details")
-        }
-        payload = {k: v for k, v in payload.items() if v is not None}
+            "details": result.get("details"),
+            "evaluation_version": evaluation_version(),
+        }, source="upload/stream")
 
-        supabase.table("contracts").insert(payload).execute()
-    except Exception as e:
-        print("Supabase insert failed (upload):", e)
+    def events():
+        try:
+            file_key = upload_cache_key(upload.sha256)
+            cached = result_cache.get(file_key)
+            if cached:
+                yield from stream_evaluation(cached["text"], on_complete=lambda result: save(cached["text"], result))
+                return
 
-    result = evaluate_contract(text)
+            pages = []
+            extracted = iter_document_pages(upload, file_name)
+            first = next(extracted, None)
+            if first is None:
+                yield {
+                    "event": "error",
+                    "message": "Could not extract text from file. Unsupported or corrupted file.",
+                    "file_name": file_name,
+                }
+                return
 
-    return {
-        "overall_risk": result.get("overall_risk"),
-        "risk_level": result.get("risk_level"),
-        "risk_counts": result.get("risk_counts"),
-        "details": result.get("details"),
-        "summary": result.get("summary", {})
-}
+            def collect():
+                for page in chain([first], extracted):
+                    pages.append(page)
+                    yield page
 
+            details = []
+            result = None
+            for event in iter_evaluate_pages(collect(), chunk_size=STREAM_CHUNK_SIZE):
+                if event["event"] == "clause":
+                    details.append(event["detail"])
+                elif event["event"] == "summary":
+                    result = {"details": details, **event["summary"]}
+                yield event
 
+            text = "".join(pages).rstrip()
+            if result is None:
+                return
+            if is_complete_result(result):
+                result_cache.set(file_key, {"text": text, "result": result})
+                result_cache.set(content_key("text", text, evaluation_version()), result)
+            save(text, result)
+        finally:
+            upload.close()
+
+    try:
+        stream = evaluation_executor.stream(events, lane=LANE_BULK)
+    except ExecutorSaturated:
+        upload.close()
+        raise
+    return streaming_response(stream, wants_sse(request))
@@ -1,7 +1,54 @@
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from services.registry import registry
+from services.suggestion_cache import suggestion_cache
+from services.semantic_cache import semantic_cache
+from services.embedding_cache import embedding_cache
+from services.result_cache import result_cache
+from services.clause_service import batching_encoder, cascade_stats
+from services.evaluation_executor import evaluation_executor
+from database.supabase_client import contract_writer
 
 router = APIRouter()
 
 @router.get("/check")
 async def health_check():
-    return {"status": "ok", "message": "Service is running 🚀"}
+    # kept for existing probes; same as /live plus the readiness flag
+    return {"status": "ok", "message": "Service is running 🚀", "ready": registry.ready()}
+
+
+@router.get("/live")
+async def liveness():
+    """
+    The process is up and serving HTTP. Never depends on models.
+    """
+    return {"status": "ok"}
+
+
+@router.get("/ready")
+async def readiness():
+    """
+    503 until every required resource (encoder, category index) is loaded and warmed.
+    Failed resources whose cooldown is over are retried in the background.
+    """
+    if registry.retry_pending():
+        registry.warmup_in_background()
+    ready = registry.ready()
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "starting", "resources": registry.status()},
+    )
+
+
+@router.get("/metrics")
+async def metrics():
+    return {
+        "suggestion_cache": suggestion_cache.stats() if suggestion_cache else None,
+        "semantic_cache": semantic_cache.stats() if semantic_cache else None,
+        "embedding_cache": embedding_cache.stats(),
+        "result_cache": result_cache.stats(),
+        "batching_encoder": batching_encoder.stats() if batching_encoder else None,
+        "classifier_cascade": cascade_stats.stats(),
+        "evaluation_executor": evaluation_executor.stats(),
+        "contract_writer": contract_writer.stats(),
+    }
@@ -0,0 +1,78 @@
+# backend/api/upload_limits.py
+import json
+
+from services.parser_service import UPLOAD_MAX_BYTES
+
+# Multipart framing and form fields on top of the file itself
+FORM_OVERHEAD_BYTES = 64 * 1024
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Rejects oversized upload bodies with 413 while they arrive, instead of after the
+    whole body has been received and parsed: at once when Content-Length is too large,
+    otherwise as soon as the received bytes pass the limit.
+    """
+
+    def __init__(self, app, max_bytes: int = UPLOAD_MAX_BYTES + FORM_OVERHEAD_BYTES,
+                 path_prefixes=("/contracts/upload",)):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.path_prefixes = tuple(path_prefixes)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        declared = headers.get(b"content-length")
+        if declared and declared.isdigit() and int(declared) > self.max_bytes:
+            await self._reject(send)
+            return
+
+        received = 0
+        exceeded = False
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    exceeded = True
+                    # stop reading; the body parser fails on the truncated body
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def guarded_send(message):
+            nonlocal response_started
+            if exceeded:
+                # whatever the app made of the truncated body, the answer is 413
+                if message["type"] == "http.response.start" and not response_started:
+                    response_started = True
+                    await self._reject(send)
+                return
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            if not exceeded:
+                raise
+            if not response_started:
+                await self._reject(send)
+
+    async def _reject(self, send):
+        body = json.dumps({
+            "detail": f"Upload exceeds the {self.max_bytes // (1024 * 1024)} MB limit"
+        }).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,253 @@
+import base64
+import hashlib
+import os
+import uuid
+import zlib
+from typing import Dict, List, Optional
+
+from services.clause_service import CATEGORIES, ISSUES, SUGGESTIONS, risk_label_for_score, summarize_details
+
+# =========================
+# Compact Storage Format
+# =========================
+#
+# contracts         one small row per evaluation (scores, counts, text hash)
+# contract_texts    contract text stored once per content hash, compressed
+# contract_clauses  one row per (evaluation_id, clause_index); categories, risk levels
+#                   and statuses as integer codes, issue / suggestion strings rebuilt
+#                   from the codebook on read
+#
+# Schema: database/migrations/001_compact_storage.sql, 002_clause_spans.sql,
+#         003_evaluation_lineage.sql, 004_clause_clusters.sql, 005_classifier_tier.sql
+# Legacy rows: utils/migrate_compact_storage.py
+
+STORAGE_FORMAT_VERSION = 2  # legacy rows (text + details inline) are format 1 / NULL
+
+# Strings longer than this are stored zlib-compressed + base64 with a "z:" prefix
+COMPRESS_MIN_CHARS = int(os.getenv("STORAGE_COMPRESS_MIN_CHARS", "256"))
+TEXT_PREVIEW_CHARS = 200
+
+# Codes are persisted: append to these tuples, never reorder them.
+# A change that is not append-only needs a new CODEBOOK_VERSION.
+CODEBOOK_VERSION = 1
+CATEGORY_CODES = (
+    "Intellectual Property",
+    "Liability",
+    "Payment",
+    "Termination",
+    "Confidentiality",
+    "Governing Law",
+    "General / Miscellaneous",
+)
+RISK_CODES = ("High", "Medium", "Low")
+STATUS_CODES = ("ready", "pending", "failed", "skipped")
+TIER_CODES = ("encoder", "keyword", "heavy")  # classifier cascade tier that settled a clause
+
+FALLBACK_CATEGORY = CATEGORY_CODES.index("General / Miscellaneous")
+
+_uncoded = [cat for cat in CATEGORIES if cat not in CATEGORY_CODES]
+if _uncoded:
+    print(f"⚠️ Categories missing from CATEGORY_CODES are stored as General / Miscellaneous: {_uncoded}")
+
+
+def _code(codes: tuple, value, default: int) -> int:
+    try:
+        return codes.index(value)
+    except ValueError:
+        return default
+
+
+# ---------- Blobs ----------
+
+def pack_text(value: Optional[str]) -> Optional[str]:
+    if value is None:
+        return None
+    if len(value) < COMPRESS_MIN_CHARS and not value.startswith("z:"):
+        return value
+    packed = base64.b64encode(zlib.compress(value.encode("utf-8"), 6)).decode("ascii")
+    return "z:" + packed
+
+
+def unpack_text(value: Optional[str]) -> Optional[str]:
+    if value is None or not value.startswith("z:"):
+        return value
+    return zlib.decompress(base64.b64decode(value[2:])).decode("utf-8")
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+# ---------- Write side ----------
+
+def compact_rows(row: Dict, evaluation_id: Optional[str] = None) -> Dict[str, List[Dict]]:
+    """
+    Splits one legacy-shaped contracts row (name, text, risk_score, level, user_id,
+    categories_summary, details) into rows for the three compact tables.
+    """
+    evaluation_id = evaluation_id or uuid.uuid4().hex
+    text = row.get("text") or ""
+    details = row.get("details") or []
+    digest = text_hash(text)
+
+    clause_rows = []
+    category_counts = [0] * len(CATEGORY_CODES)
+    risk_counts = {risk: 0 for risk in RISK_CODES}
+    for idx, detail in enumerate(details):
+        category = detail.get("matched_category")
+        category_code = _code(CATEGORY_CODES, category, FALLBACK_CATEGORY)
+        risk_code = _code(RISK_CODES, (detail.get("risk_level") or "Low").capitalize(), len(RISK_CODES) - 1)
+        category_counts[category_code] += 1
+        risk_counts[RISK_CODES[risk_code]] += 1
+
+        status = detail.get("suggestion_status")
+        if status is None:
+            status = "ready" if detail.get("ai_optimized_clause") else "skipped"
+
+        issue = detail.get("issue")
+        suggested = detail.get("suggested_optimization")
+        clause_rows.append({
+            "evaluation_id": evaluation_id,
+            "clause_index": idx,
+            "sentence": pack_text(detail.get("sentence") or ""),
+            "category": category_code,
+            "risk": risk_code,
+            "score": detail.get("similarity_score"),
+            "top": [
+                [_code(CATEGORY_CODES, top.get("category"), FALLBACK_CATEGORY), top.get("score")]
+                for top in detail.get("top_categories") or []
+            ],
+            "margin": detail.get("category_margin"),
+            # only stored when they differ from the codebook text (e.g. older rows)
+            "issue": issue if issue not in (None, ISSUES.get(category)) else None,
+            "suggested_optimization": (
+                suggested if suggested not in (None, SUGGESTIONS.get(category)) else None
+            ),
+            "suggestion": pack_text(detail.get("ai_optimized_clause")),
+            "suggestion_status": _code(STATUS_CODES, status, STATUS_CODES.index("skipped")),
+            "suggestion_reused": bool(detail.get("suggestion_reused", False)),
+            "suggestion_similarity": detail.get("suggestion_similarity"),
+            "span": [detail["char_start"], detail["char_end"]] if "char_start" in detail else None,
+            "section": detail.get("section_path"),
+            "cluster": detail.get("cluster"),
+            "tier": _code(TIER_CODES, detail["classifier_tier"], None) if detail.get("classifier_tier") else None,
+        })
+
+    contract = {
+        "evaluation_id": evaluation_id,
+        "storage_format": STORAGE_FORMAT_VERSION,
+        "codebook": CODEBOOK_VERSION,
+        "name": row.get("name"),
+        "user_id": row.get("user_id"),
+        # which pipeline produced the details; revisions reuse them only on a match
+        "evaluation_version": row.get("evaluation_version"),
+        "previous_evaluation_id": row.get("previous_evaluation_id"),
+        "risk_score": row.get("risk_score"),
+        "level": row.get("level"),
+        "text_hash": digest,
+        "text_preview": text[:TEXT_PREVIEW_CHARS],
+        "clause_count": len(details),
+        "risk_counts": risk_counts,
+        "category_counts": category_counts,
+    }
+    contract = {k: v for k, v in contract.items() if v is not None}
+
+    return {
+        # parents first: the writer inserts tables in this order
+        "contract_texts": [{"hash": digest, "text": pack_text(text), "length": len(text)}],
+        "contracts": [contract],
+        "contract_clauses": clause_rows,
+    }
+
+
+# ---------- Read side ----------
+
+def rebuild_detail(clause: Dict) -> Dict:
+    category = CATEGORY_CODES[clause["category"]]
+    detail = {
+        "sentence": unpack_text(clause["sentence"]),
+        "matched_category": category,
+        "cluster_id": clause["category"],
+        "similarity_score": clause.get("score"),
+        "top_categories": [
+            {"category": CATEGORY_CODES[code], "score": score} for code, score in clause.get("top") or []
+        ],
+        "category_margin": clause.get("margin"),
+        "risk_level": RISK_CODES[clause["risk"]],
+        "issue": clause.get("issue") or ISSUES.get(category, ""),
+        "suggested_optimization": clause.get("suggested_optimization") or SUGGESTIONS.get(category, ""),
+        "ai_optimized_clause": unpack_text(clause.get("suggestion")),
+        "suggestion_status": STATUS_CODES[
+            clause["suggestion_status"] if clause.get("suggestion_status") is not None
+            else STATUS_CODES.index("skipped")
+        ],
+        "suggestion_reused": bool(clause.get("suggestion_reused")),
+        "suggestion_similarity": clause.get("suggestion_similarity"),
+    }
+    if clause.get("span"):
+        detail["char_start"], detail["char_end"] = clause["span"]
+    if clause.get("section") is not None:
+        detail["section_path"] = clause["section"]
+    if clause.get("cluster"):
+        detail["cluster"] = clause["cluster"]
+    if clause.get("tier") is not None:
+        detail["classifier_tier"] = TIER_CODES[clause["tier"]]
+    return detail
+
+
+def rebuild_evaluation(contract: Dict, clauses: List[Dict], text_row: Optional[Dict] = None) -> Dict:
+    """
+    The /contracts/evaluate response shape, plus the stored row's identifying fields.
+    """
+    details = [rebuild_detail(c) for c in sorted(clauses, key=lambda c: c["clause_index"])]
+    result = {"details": details, **summarize_details(details)}
+    if contract.get("risk_score") is not None:
+        result["average_risk_score"] = contract["risk_score"]
+    if contract.get("level"):
+        result["risk_level"] = contract["level"]
+    elif "average_risk_score" in result:
+        result["risk_level"] = risk_label_for_score(result["average_risk_score"])
+
+    result.update({
+        "evaluation_id": contract.get("evaluation_id"),
+        "evaluation_version": contract.get("evaluation_version"),
+        "previous_evaluation_id": contract.get("previous_evaluation_id"),
+        "name": contract.get("name"),
+        "user_id": contract.get("user_id"),
+        "created_at": contract.get("created_at"),
+    })
+    if text_row is not None:
+        result["text"] = unpack_text(text_row["text"])
+    return result
+
+
+READ_PAGE_SIZE = 1000  # PostgREST's default row limit
+
+
+def load_evaluation(client, evaluation_id: str, include_text: bool = True) -> Optional[Dict]:
+    """
+    Reads a compact evaluation back through the Supabase table API; None if not stored.
+    """
+    contracts = client.table("contracts").select("*").eq("evaluation_id", evaluation_id).execute().data
+    if not contracts:
+        return None
+    contract = contracts[0]
+
+    clauses: List[Dict] = []
+    while True:
+        page = (
+            client.table("contract_clauses").select("*")
+            .eq("evaluation_id", evaluation_id)
+            .order("clause_index")
+            .range(len(clauses), len(clauses) + READ_PAGE_SIZE - 1)
+            .execute().data
+        )
+        clauses.extend(page)
+        if len(page) < READ_PAGE_SIZE:
+            break
+
+    text_row = None
+    if include_text and contract.get("text_hash"):
+        texts = client.table("contract_texts").select("*").eq("hash", contract["text_hash"]).execute().data
+        text_row = texts[0] if texts else None
+    return rebuild_evaluation(contract, clauses, text_row)
@@ -0,0 +1,50 @@
+-- Compact storage for evaluations (database/compact_storage.py).
+-- Run in the Supabase SQL editor, then backfill legacy rows with
+--   python utils/migrate_compact_storage.py
+
+-- Contract text, once per content hash (sha256 hex). `text` may be "z:" + base64(zlib).
+create table if not exists contract_texts (
+    hash        text primary key,
+    text        text not null,
+    length      integer not null,
+    created_at  timestamptz not null default now()
+);
+
+-- Contract-level summary; the legacy text / details / categories_summary columns
+-- stay nullable so old and new rows can coexist during the backfill.
+alter table contracts
+    add column if not exists evaluation_id   text,
+    add column if not exists storage_format  smallint,
+    add column if not exists codebook        smallint,
+    add column if not exists text_hash       text,
+    add column if not exists text_preview    text,
+    add column if not exists clause_count    integer,
+    add column if not exists risk_counts     jsonb,
+    add column if not exists category_counts jsonb;
+
+alter table contracts alter column text drop not null;
+alter table contracts alter column details drop not null;
+alter table contracts alter column categories_summary drop not null;
+
+create unique index if not exists contracts_evaluation_id_idx on contracts (evaluation_id);
+create index if not exists contracts_text_hash_idx on contracts (text_hash);
+
+-- One row per clause. Codes index CATEGORY_CODES / RISK_CODES / STATUS_CODES of the
+-- row's codebook; issue / suggested_optimization are NULL when they equal the codebook text.
+create table if not exists contract_clauses (
+    evaluation_id          text not null,
+    clause_index           integer not null,
+    sentence               text not null,
+    category               smallint not null,
+    risk                   smallint not null,
+    score                  real,
+    top                    jsonb,
+    margin                 real,
+    issue                  text,
+    suggested_optimization text,
+    suggestion             text,
+    suggestion_status      smallint,
+    suggestion_reused      boolean not null default false,
+    suggestion_similarity  real,
+    primary key (evaluation_id, clause_index)
+);
@@ -0,0 +1,5 @@
+-- Character span and section path of each clause (services/segmenter.py).
+-- span = [start, end) offsets into the contract text; section = ["12 INDEMNIFICATION", "12.3", "(a)"]
+alter table contract_clauses
+    add column if not exists span    jsonb,
+    add column if not exists section jsonb;
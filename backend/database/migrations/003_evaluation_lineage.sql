@@ -0,0 +1,8 @@
+-- Lineage of an evaluation (services/revision_service.py).
+-- evaluation_version: pipeline that produced the clause rows; a revision reuses them only on a match
+-- previous_evaluation_id: the evaluation a revised contract was compared against
+alter table contracts
+    add column if not exists evaluation_version     text,
+    add column if not exists previous_evaluation_id text;
+
+create index if not exists contracts_previous_evaluation_id_idx on contracts (previous_evaluation_id);
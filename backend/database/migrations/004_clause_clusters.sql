@@ -0,0 +1,4 @@
+-- Fine-grained cluster of each clause (services/cluster_classifier.py).
+-- cluster = {"id": "0", "label": "Uncapped Liability / Cap On Liability", "category": "Liability", "score": 0.62}
+alter table contract_clauses
+    add column if not exists cluster jsonb;
@@ -0,0 +1,4 @@
+-- Classifier cascade tier that settled each clause (services/clause_service.py):
+-- index into TIER_CODES of database/compact_storage.py (0 encoder, 1 keyword, 2 heavy).
+alter table contract_clauses
+    add column if not exists tier smallint;
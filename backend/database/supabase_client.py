@@ -1,20 +1,99 @@
 import os
-from supabase import create_client, Client
 from dotenv import load_dotenv
 
+from database.compact_storage import compact_rows
+from database.write_behind import PERSIST_SPOOL_PATH, WriteBehindWriter
+from services.registry import registry
+
 # Load environment variables
 load_dotenv()
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+# 0 = insert synchronously in the caller, as before
+PERSIST_WRITE_BEHIND = os.getenv("PERSIST_WRITE_BEHIND", "1") == "1"
+# compact = text / clause tables of database/compact_storage.py (needs migrations/001);
+# legacy = one contracts row with text and details inline
+STORAGE_FORMAT = os.getenv("STORAGE_FORMAT", "compact")
+
+
+# Stored with compact-format records only (database/migrations/003_evaluation_lineage.sql)
+LINEAGE_FIELDS = ("evaluation_version", "previous_evaluation_id")
+
+
+def supabase_configured() -> bool:
+    return bool(SUPABASE_URL and SUPABASE_KEY)
 
-supabase: Client = None
 
-if not SUPABASE_URL or not SUPABASE_KEY:
-    print("⚠️ SUPABASE_URL or SUPABASE_KEY not set — Supabase disabled")
-else:
+def create_supabase_client():
+    """
+    Builds the client on first use; `supabase` is imported here because it is slow to import.
+    Returns None when Supabase is not configured or the client cannot be created.
+    """
+    if not SUPABASE_URL or not SUPABASE_KEY:
+        print("⚠️ SUPABASE_URL or SUPABASE_KEY not set — Supabase disabled")
+        return None
     try:
-        supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+        from supabase import create_client
+
+        client = create_client(SUPABASE_URL, SUPABASE_KEY)
         print("✅ Supabase client initialized successfully")
+        return client
     except Exception as e:
         print("❌ Failed to initialize Supabase client:", e)
+        return None
+
+
+# Optional: the API is ready without it
+registry.register("supabase", create_supabase_client, required=False)
+
+
+def get_supabase():
+    return registry.get("supabase")
+
+
+contract_writer = WriteBehindWriter(get_supabase, PERSIST_SPOOL_PATH, upsert_keys={"contract_texts": "hash"})
+
+
+def insert_contract_row(row: dict, source: str):
+    """
+    Best-effort insert of an evaluation. With write-behind on, the rows are queued and
+    inserted in a later bulk insert (spooled to disk if Supabase is unreachable).
+    Failures are logged, never raised.
+    Returns the evaluation_id of a compact-format record, else None.
+    """
+    if not supabase_configured():
+        return None
+    # Remove None values (but keep empty dicts as JSON strings if present)
+    row = {k: v for k, v in row.items() if v is not None}
+
+    evaluation_id = None
+    if STORAGE_FORMAT == "compact":
+        tables = compact_rows(row)
+        evaluation_id = tables["contracts"][0]["evaluation_id"]
+    else:
+        # the legacy table has no lineage columns
+        tables = {"contracts": [{k: v for k, v in row.items() if k not in LINEAGE_FIELDS}]}
+
+    if PERSIST_WRITE_BEHIND:
+        for table, rows in tables.items():
+            for table_row in rows:
+                contract_writer.enqueue(table, table_row)
+        return evaluation_id
+
+    try:
+        supabase = get_supabase()
+        if supabase:
+            for table, rows in tables.items():
+                if not rows:
+                    continue
+                if table in contract_writer.upsert_keys:
+                    supabase.table(table).upsert(
+                        rows, on_conflict=contract_writer.upsert_keys[table], ignore_duplicates=True
+                    ).execute()
+                else:
+                    supabase.table(table).insert(rows).execute()
+    except Exception as e:
+        # log but do not fail the request
+        print(f"⚠️ Supabase insert failed ({source}):", e)
+    return evaluation_id
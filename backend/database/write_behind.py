@@ -0,0 +1,315 @@
+import glob
+import json
+import os
+import queue
+import threading
+import time
+import traceback
+from typing import Callable, Dict, List, Optional
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# =========================
+# Configuration
+# =========================
+
+PERSIST_BATCH_SIZE = int(os.getenv("PERSIST_BATCH_SIZE", "200"))            # rows per bulk insert
+PERSIST_FLUSH_INTERVAL = float(os.getenv("PERSIST_FLUSH_INTERVAL", "2.0"))  # seconds a row may wait
+PERSIST_MAX_RETRIES = int(os.getenv("PERSIST_MAX_RETRIES", "3"))
+PERSIST_RETRY_BASE = float(os.getenv("PERSIST_RETRY_BASE", "0.5"))          # backoff: base * 2^attempt
+PERSIST_QUEUE_MAX = int(os.getenv("PERSIST_QUEUE_MAX", "10000"))
+PERSIST_REPLAY_INTERVAL = float(os.getenv("PERSIST_REPLAY_INTERVAL", "60"))
+PERSIST_SPOOL_PATH = os.getenv(
+    "PERSIST_SPOOL_PATH", os.path.join(BASE_DIR, "data", "persist_spool.jsonl")
+)
+
+
+# =========================
+# Spool
+# =========================
+
+def process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class Spool:
+    """
+    Append-only JSONL file of rows that could not be written. Several processes
+    (API + job workers) may append; a replay claims the file by renaming it to
+    `<path>.replay-<pid>-...` first, so each spooled row is replayed by exactly one
+    process. Claims of live processes are left alone.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def append(self, table: str, rows: List[dict]):
+        if not rows:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        lines = "".join(json.dumps({"table": table, "row": row}, ensure_ascii=False) + "\n" for row in rows)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def claim(self) -> List[str]:
+        """
+        Renames the live spool (and any claim left behind by this process or by one
+        that no longer runs) to files owned by this process and returns their paths.
+        """
+        claimed = []
+        candidates = [self.path] + [p for p in glob.glob(f"{self.path}.replay-*") if self._orphaned(p)]
+        for idx, path in enumerate(candidates):
+            target = f"{self.path}.replay-{os.getpid()}-{time.time_ns()}-{idx}"
+            try:
+                os.rename(path, target)
+            except FileNotFoundError:
+                continue  # nothing spooled, or another process claimed it
+            claimed.append(target)
+        return claimed
+
+    def _orphaned(self, path: str) -> bool:
+        try:
+            pid = int(path[len(self.path) + len(".replay-"):].split("-")[0])
+        except ValueError:
+            return True
+        return pid == os.getpid() or not process_alive(pid)
+
+    def pending(self) -> bool:
+        return os.path.exists(self.path) or bool(glob.glob(f"{self.path}.replay-*"))
+
+
+# =========================
+# Write-Behind Writer
+# =========================
+
+class WriteBehindWriter:
+    """
+    Takes rows off the request path: `enqueue` returns immediately and a background
+    thread bulk-inserts them when PERSIST_BATCH_SIZE rows are waiting or the oldest
+    has waited PERSIST_FLUSH_INTERVAL seconds. Failed inserts are retried with
+    exponential backoff, then spooled; the spool is replayed after the next successful
+    insert (or every PERSIST_REPLAY_INTERVAL seconds).
+
+    `get_client` returns an object with the Supabase table API
+    (`client.table(name).insert(rows).execute()`), or None when unavailable.
+    Tables in `upsert_keys` are written with an ignore-duplicates upsert on that key.
+    """
+
+    def __init__(self, get_client: Callable, spool_path: str, batch_size: int = PERSIST_BATCH_SIZE,
+                 flush_interval: float = PERSIST_FLUSH_INTERVAL, max_retries: int = PERSIST_MAX_RETRIES,
+                 retry_base: float = PERSIST_RETRY_BASE, queue_max: int = PERSIST_QUEUE_MAX,
+                 replay_interval: float = PERSIST_REPLAY_INTERVAL, upsert_keys: Optional[Dict[str, str]] = None):
+        self.get_client = get_client
+        self.upsert_keys = upsert_keys or {}
+        self.spool = Spool(spool_path)
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_base = retry_base
+        self.replay_interval = replay_interval
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=queue_max)
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._last_replay = 0.0
+
+        self._stats_lock = threading.Lock()
+        self.counters = {
+            "enqueued": 0,
+            "inserted": 0,
+            "batches": 0,
+            "retries": 0,
+            "spooled": 0,
+            "replayed": 0,
+            "errors": 0,
+        }
+
+    # ---------- Public API ----------
+
+    def enqueue(self, table: str, row: dict):
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait((table, row))
+        except queue.Full:
+            # backlog is already beyond what the backend keeps up with
+            self.spool.append(table, [row])
+            self._count("spooled")
+            return
+        self._count("enqueued")
+
+    def flush(self, timeout: float = 30.0) -> bool:
+        """
+        Blocks until every row enqueued so far is inserted or spooled.
+        """
+        if self._thread is None:
+            return True
+        # the marker queues behind every row enqueued so far
+        done = threading.Event()
+        self._queue.put((None, done))
+        return done.wait(timeout)
+
+    def close(self, timeout: float = 30.0):
+        self.flush(timeout)
+        self._stop.set()
+        if self._thread is not None:
+            self._queue.put((None, None))
+            self._thread.join(timeout)
+
+    def stats(self) -> Dict:
+        with self._stats_lock:
+            return {
+                "queued": self._queue.qsize(),
+                "batch_size": self.batch_size,
+                "flush_interval": self.flush_interval,
+                "spool_pending": self.spool.pending(),
+                **self.counters,
+            }
+
+    # ---------- Background thread ----------
+
+    def _ensure_thread(self):
+        if self._thread is not None:
+            return
+        with self._thread_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+                self._thread.start()
+
+    def _collect(self) -> List:
+        """
+        Waits for the first row, then up to flush_interval for the batch to fill.
+        A flush marker (table None) cuts the wait short.
+        """
+        try:
+            first = self._queue.get(timeout=self.replay_interval)
+        except queue.Empty:
+            return []
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size and batch[-1][0] is not None and not self._stop.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._stop.is_set():
+            flushed = []
+            try:
+                batch = self._collect()
+
+                rows_by_table: Dict[str, List[dict]] = {}
+                for table, row in batch:
+                    if table is None:
+                        if row is not None:
+                            flushed.append(row)
+                    else:
+                        rows_by_table.setdefault(table, []).append(row)
+
+                all_written = True
+                for table, rows in rows_by_table.items():
+                    for start in range(0, len(rows), self.batch_size):
+                        all_written = self._write(table, rows[start:start + self.batch_size]) and all_written
+
+                due = time.monotonic() - self._last_replay > self.replay_interval
+                if all_written and (rows_by_table or due) and self.spool.pending():
+                    self._replay()
+            except Exception:
+                # one bad batch (spool unwritable, ...) must not stop the writer
+                self._count("errors")
+                print("⚠️ Write-behind batch failed:")
+                traceback.print_exc()
+            finally:
+                for done in flushed:
+                    done.set()
+
+    def _insert(self, table: str, rows: List[dict]) -> bool:
+        """
+        One bulk insert with retries; False when the backend stayed unreachable.
+        """
+        for attempt in range(self.max_retries + 1):
+            client = self.get_client()
+            if client is None:
+                return False
+            try:
+                if table in self.upsert_keys:
+                    client.table(table).upsert(
+                        rows, on_conflict=self.upsert_keys[table], ignore_duplicates=True
+                    ).execute()
+                else:
+                    client.table(table).insert(rows).execute()
+                return True
+            except Exception as e:
+                if attempt == self.max_retries:
+                    print(f"⚠️ Bulk insert into {table} failed after {attempt + 1} attempts:", e)
+                    return False
+                self._count("retries")
+                if self._stop.wait(self.retry_base * (2 ** attempt)):
+                    return False
+        return False
+
+    def _write(self, table: str, rows: List[dict]) -> bool:
+        if self._insert(table, rows):
+            self._count("inserted", len(rows))
+            self._count("batches")
+            return True
+        self.spool.append(table, rows)
+        self._count("spooled", len(rows))
+        return False
+
+    def _replay(self):
+        self._last_replay = time.monotonic()
+        for path in self.spool.claim():
+            try:
+                self._replay_file(path)
+            except Exception:
+                # the claim stays with this process and is retried at the next replay
+                self._count("errors")
+                print(f"⚠️ Replay of {path} failed:")
+                traceback.print_exc()
+
+    def _replay_file(self, path: str):
+        rows_by_table: Dict[str, List[dict]] = {}
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    table, row = record["table"], record["row"]
+                except (json.JSONDecodeError, KeyError, TypeError):
+                    continue  # torn last line from a crash mid-append, or not a spool record
+                rows_by_table.setdefault(table, []).append(row)
+
+        reachable = True
+        replayed = 0
+        for table, rows in rows_by_table.items():
+            for start in range(0, len(rows), self.batch_size):
+                chunk = rows[start:start + self.batch_size]
+                # once the backend drops again, put the rest straight back
+                if reachable and self._insert(table, chunk):
+                    replayed += len(chunk)
+                    self._count("inserted", len(chunk))
+                    self._count("batches")
+                else:
+                    reachable = False
+                    self.spool.append(table, chunk)
+        os.remove(path)
+        self._count("replayed", replayed)
+        print(f"🔁 Replayed {replayed} spooled rows")
+
+    def _count(self, name: str, n: int = 1):
+        with self._stats_lock:
+            self.counters[name] += n
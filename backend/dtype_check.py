@@ -1,3 +1,3 @@
-import pandas as pd
-df = pd.read_pickle("data/legal_clauses.pkl")
-print(df.columns.tolist())
+from services.cuad_dataset import CuadDataset
+dataset = CuadDataset()
+print({name: str(dataset.column(name).dtype) for name in dataset.manifest["columns"]})
@@ -1,11 +1,25 @@
 from dotenv import load_dotenv
 import os
 load_dotenv(os.path.join(os.path.dirname(__file__), ".env"))
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from api import routes_contracts, routes_health, routes_auth, routes_optimization
 from pydantic import BaseModel
-from services.clause_service import evaluate_contract
+from services.category_index import verify_category_index
+from services.clause_service import ENCODER_ID, HEAVY_ENCODER_ID, evaluate_contract
+from services.cluster_classifier import verify_cluster_artifact
+from services.reference_store import verify_reference_store
+from services.job_queue import worker_pool
+from services.registry import registry
+from services.evaluation_executor import ExecutorSaturated
+from services.parser_service import UploadTooLarge
+from api.upload_limits import UploadSizeLimitMiddleware
+from database.supabase_client import contract_writer
+
+# Load models in the background at startup so the first request is not cold;
+# /health/ready reports when they are done.
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "1") == "1"
 
 
 app = FastAPI(title="CogniClause API")
@@ -22,12 +36,57 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Oversized uploads are cut off while they arrive (UPLOAD_MAX_BYTES)
+app.add_middleware(UploadSizeLimitMiddleware)
+
 # include routers
 app.include_router(routes_health.router, prefix="/health", tags=["Health"])
 app.include_router(routes_contracts.router, prefix="/contracts", tags=["Contracts"])
 app.include_router(routes_auth.router, prefix="/auth", tags=["Authentication"])
 app.include_router(routes_optimization.router, prefix="/optimize", tags=["Optimization"])
 
+@app.exception_handler(ExecutorSaturated)
+async def evaluation_queue_full(request: Request, exc: ExecutorSaturated):
+    return JSONResponse(
+        status_code=429,
+        content={"detail": f"Too many pending evaluations ({exc.lane}); retry later."},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+@app.exception_handler(UploadTooLarge)
+async def upload_too_large(request: Request, exc: UploadTooLarge):
+    return JSONResponse(status_code=413, content={"detail": str(exc)})
+
+@app.on_event("startup")
+def check_artifacts():
+    # vectors from another encoder would give meaningless categories, clusters and
+    # precedents: refuse to start (ArtifactMismatch) instead of serving them.
+    # Only manifests are read here; arrays are memory-mapped on first use.
+    if verify_category_index(ENCODER_ID) is None:
+        print("ℹ️ No category index yet — it is built with the serving encoder on first load")
+    if HEAVY_ENCODER_ID:
+        verify_category_index(HEAVY_ENCODER_ID)
+    if verify_cluster_artifact(ENCODER_ID) is None:
+        print("ℹ️ No cluster centroids yet — they are built with the serving encoder on first load")
+    verify_reference_store(ENCODER_ID)
+
+@app.on_event("startup")
+def start_warmup():
+    if WARMUP_ON_STARTUP:
+        registry.warmup_in_background()
+
+@app.on_event("startup")
+def start_job_workers():
+    worker_pool.start()
+
+@app.on_event("shutdown")
+def stop_job_workers():
+    worker_pool.stop()
+
+@app.on_event("shutdown")
+def flush_contract_writes():
+    contract_writer.close()
+
 @app.get("/")
 def root():
     return {"message": "Welcome to CogniClause Backend"}
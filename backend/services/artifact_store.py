@@ -0,0 +1,214 @@
+# backend/services/artifact_store.py
+
+import hashlib
+import json
+import os
+import shutil
+import time
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+
+# =========================
+# Configuration
+# =========================
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+
+# Every built artifact (category index, cluster centroids, reference store, ...)
+# is a directory under here
+ARTIFACTS_DIR = os.getenv("ARTIFACTS_DIR", os.path.join(DATA_DIR, "artifacts"))
+
+# Layout of an artifact directory:
+#   manifest.json   kind, format version, encoder id, model name, dim, dtype,
+#                   dataset hash, build time, per-array dtype / shape, kind-specific meta
+#   <name>.npy      one plain array per name, opened with mmap_mode="r" so every
+#                   uvicorn worker maps the same pages from the OS cache
+# Nothing is unpickled: np.load runs with allow_pickle=False and metadata is JSON.
+
+
+class ArtifactMismatch(RuntimeError):
+    """
+    An artifact on disk was built for another encoder, format or source dataset.
+    """
+
+
+def file_digest(paths: Iterable[str], extra: str = "") -> str:
+    """
+    Hash of the source files an artifact is derived from (missing files are skipped).
+    """
+    digest = hashlib.sha256(extra.encode("utf-8"))
+    for path in paths:
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+# =========================
+# Writing
+# =========================
+
+def build_directory(directory: str) -> str:
+    """
+    Fresh temp directory next to `directory`, private to this process (several
+    workers may build the same artifact on first start).
+    """
+    tmp_dir = directory.rstrip("/\\") + f".tmp{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    return tmp_dir
+
+
+def publish_directory(tmp_dir: str, directory: str):
+    """
+    Swaps a finished build in for `directory`. Readers holding the old files keep
+    their mappings; new readers see either the old or the new artifact, never a mix.
+    """
+    old_dir = directory.rstrip("/\\") + f".old{os.getpid()}"
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if os.path.exists(directory):
+        os.replace(directory, old_dir)
+    os.replace(tmp_dir, directory)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def write_manifest(tmp_dir: str, manifest: Dict):
+    with open(os.path.join(tmp_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+
+
+def write_artifact(directory: str, kind: str, format_version: int, arrays: Dict[str, np.ndarray],
+                   encoder_id: Optional[str] = None, dataset_hash: Optional[str] = None,
+                   meta: Optional[Dict] = None, primary: Optional[str] = None) -> Dict:
+    """
+    Saves `arrays` as .npy files plus a manifest and swaps the directory in.
+    `primary` names the vector array whose dim / dtype the manifest reports.
+    Returns the manifest.
+    """
+    started = time.perf_counter()
+    tmp_dir = build_directory(directory)
+    try:
+        for name, values in arrays.items():
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), np.ascontiguousarray(values), allow_pickle=False)
+        vectors = arrays[primary] if primary else None
+        manifest = artifact_manifest(
+            kind, format_version, arrays, encoder_id=encoder_id, dataset_hash=dataset_hash,
+            dim=int(vectors.shape[-1]) if vectors is not None else None,
+            dtype=str(vectors.dtype) if vectors is not None else None,
+            meta=meta, build_seconds=time.perf_counter() - started,
+        )
+        write_manifest(tmp_dir, manifest)
+        publish_directory(tmp_dir, directory)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    return manifest
+
+
+def artifact_manifest(kind: str, format_version: int, arrays: Dict, encoder_id: Optional[str] = None,
+                      dataset_hash: Optional[str] = None, dim: Optional[int] = None,
+                      dtype: Optional[str] = None, meta: Optional[Dict] = None,
+                      build_seconds: float = 0.0) -> Dict:
+    """
+    The shared manifest fields; `arrays` maps names to arrays (or memmaps) written.
+    """
+    digest = hashlib.sha256(f"{kind}|{format_version}|{encoder_id}|{dataset_hash}".encode("utf-8"))
+    digest.update(json.dumps(meta or {}, sort_keys=True).encode("utf-8"))
+    for name in sorted(arrays):
+        digest.update(f"{name}{arrays[name].dtype}{arrays[name].shape}".encode("utf-8"))
+    return {
+        "kind": kind,
+        "format_version": format_version,
+        "version": digest.hexdigest()[:16],
+        "encoder_id": encoder_id,
+        "model_name": encoder_id.split("+")[0] if encoder_id else None,
+        "dim": dim,
+        "dtype": dtype,
+        "dataset_hash": dataset_hash,
+        "arrays": {name: {"dtype": str(a.dtype), "shape": list(a.shape)} for name, a in arrays.items()},
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "build_seconds": round(build_seconds, 2),
+        "meta": meta or {},
+    }
+
+
+# =========================
+# Reading
+# =========================
+
+def read_artifact_manifest(directory: str) -> Optional[Dict]:
+    """
+    The manifest alone (no array is opened); None if nothing was built there.
+    """
+    path = os.path.join(directory, "manifest.json")
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def verify_artifact(directory: str, kind: str, format_version: int, encoder_id: Optional[str] = None,
+                    dataset_hash: Optional[str] = None, rebuild_hint: str = "") -> Optional[Dict]:
+    """
+    Raises ArtifactMismatch when the artifact is of another kind or format, or was
+    built for another encoder or source dataset (only the fields passed are checked).
+    Returns the manifest, or None when there is no artifact.
+    """
+    manifest = read_artifact_manifest(directory)
+    if manifest is None:
+        return None
+    problems = []
+    if manifest.get("kind") != kind:
+        problems.append(f"kind {manifest.get('kind')} != {kind}")
+    if manifest.get("format_version") != format_version:
+        problems.append(f"format {manifest.get('format_version')} != {format_version}")
+    if encoder_id is not None and manifest.get("encoder_id") != encoder_id:
+        problems.append(f"encoder {manifest.get('encoder_id')} != serving encoder {encoder_id}")
+    if dataset_hash is not None and manifest.get("dataset_hash") != dataset_hash:
+        problems.append("source data changed since it was built")
+    if problems:
+        raise ArtifactMismatch(
+            f"{directory} does not match the serving setup ({'; '.join(problems)})"
+            + (f"; rebuild it with {rebuild_hint}" if rebuild_hint else "")
+        )
+    return manifest
+
+
+class Artifact:
+    """
+    A built artifact: its manifest and lazily memory-mapped arrays.
+    """
+
+    def __init__(self, directory: str, manifest: Optional[Dict] = None):
+        self.directory = directory
+        self.manifest = manifest or read_artifact_manifest(directory)
+        if self.manifest is None:
+            raise FileNotFoundError(f"No artifact manifest in {directory}")
+        self._arrays: Dict[str, np.ndarray] = {}
+
+    @property
+    def meta(self) -> Dict:
+        return self.manifest.get("meta", {})
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.manifest.get("arrays", {})
+
+    def array(self, name: str) -> np.ndarray:
+        if name not in self._arrays:
+            if name not in self:
+                raise KeyError(f"Artifact {self.directory} has no array {name!r}")
+            self._arrays[name] = np.load(os.path.join(self.directory, f"{name}.npy"),
+                                         mmap_mode="r", allow_pickle=False)
+        return self._arrays[name]
+
+
+def open_artifact(directory: str, kind: str, format_version: int, encoder_id: Optional[str] = None,
+                  dataset_hash: Optional[str] = None, rebuild_hint: str = "") -> Optional[Artifact]:
+    """
+    Verified artifact, or None when nothing was built; see verify_artifact.
+    """
+    manifest = verify_artifact(directory, kind, format_version, encoder_id, dataset_hash, rebuild_hint)
+    return Artifact(directory, manifest) if manifest is not None else None
@@ -0,0 +1,175 @@
+# backend/services/batching_encoder.py
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Sequence
+
+import numpy as np
+
+
+# =========================
+# Configuration
+# =========================
+
+ENCODER_BATCHING = os.getenv("ENCODER_BATCHING", "1") == "1"
+ENCODER_MAX_BATCH = int(os.getenv("ENCODER_MAX_BATCH", "128"))  # texts per combined encode
+ENCODER_MAX_WAIT_MS = float(os.getenv("ENCODER_MAX_WAIT_MS", "5"))
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+QUEUE_WAIT_BUCKETS_MS = (0.1, 0.5, 1, 2, 5, 10, 25, 50, 100, 250, 1000)
+
+
+# =========================
+# Metrics
+# =========================
+
+class Histogram:
+    """
+    Cumulative-bucket histogram (Prometheus style) with count and sum.
+    """
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last bucket is +Inf
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float):
+        for idx, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[idx] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.count += 1
+        self.total += value
+
+    def snapshot(self) -> Dict:
+        cumulative, running = {}, 0
+        for bound, count in zip(list(self.buckets) + ["+Inf"], self.counts):
+            running += count
+            cumulative[str(bound)] = running
+        return {
+            "count": self.count,
+            "sum": round(self.total, 3),
+            "mean": round(self.total / self.count, 3) if self.count else 0.0,
+            "buckets": cumulative,
+        }
+
+
+# =========================
+# Batching Encoder
+# =========================
+
+class BatchingEncoder:
+    """
+    Shared in-process encoder front: concurrent callers' texts are collected for up to
+    max_wait_ms or max_batch texts, encoded in one call, and each caller gets its slice.
+    When a caller is alone (nobody else is inside `encode`), its batch goes out at once,
+    so low-load latency is unchanged.
+    Always returns normalized float32 embeddings.
+    """
+
+    def __init__(self, get_encoder: Callable, max_batch: int, max_wait_ms: float):
+        self.get_encoder = get_encoder
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self._active = 0
+        self._active_lock = threading.Lock()
+
+        self._metrics_lock = threading.Lock()
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.requests_per_batch = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_wait_ms = Histogram(QUEUE_WAIT_BUCKETS_MS)
+
+    def encode(self, texts: List[str], **kwargs) -> np.ndarray:
+        """
+        Same call shape as the encoders; extra keyword arguments are ignored.
+        """
+        texts = list(texts)
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        self._ensure_thread()
+        future: Future = Future()
+        with self._active_lock:
+            self._active += 1
+        try:
+            self._queue.put((texts, future, time.monotonic()))
+            return future.result()
+        finally:
+            with self._active_lock:
+                self._active -= 1
+
+    def stats(self) -> Dict:
+        with self._metrics_lock:
+            return {
+                "max_batch": self.max_batch,
+                "max_wait_ms": self.max_wait * 1000,
+                "queue_depth": self._queue.qsize(),
+                "batch_size": self.batch_sizes.snapshot(),
+                "requests_per_batch": self.requests_per_batch.snapshot(),
+                "queue_wait_ms": self.queue_wait_ms.snapshot(),
+            }
+
+    def _ensure_thread(self):
+        if self._thread is not None:
+            return
+        with self._thread_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="batching-encoder", daemon=True)
+                self._thread.start()
+
+    def _collect(self) -> List:
+        batch = [self._queue.get()]
+        size = len(batch[0][0])
+        deadline = time.monotonic() + self.max_wait
+
+        while size < self.max_batch:
+            with self._active_lock:
+                others_active = self._active > len(batch)
+            if self._queue.empty() and not others_active:
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(item)
+            size += len(item[0])
+
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.monotonic()
+            texts = [text for item in batch for text in item[0]]
+
+            try:
+                embeddings = self.get_encoder().encode(texts, normalize_embeddings=True)
+                embeddings = np.asarray(embeddings, dtype=np.float32)
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+
+            offset = 0
+            for caller_texts, future, _ in batch:
+                future.set_result(embeddings[offset:offset + len(caller_texts)])
+                offset += len(caller_texts)
+
+            with self._metrics_lock:
+                self.batch_sizes.observe(len(texts))
+                self.requests_per_batch.observe(len(batch))
+                for _, _, enqueued in batch:
+                    self.queue_wait_ms.observe((started - enqueued) * 1000)
@@ -0,0 +1,281 @@
+# backend/services/category_index.py
+
+import json
+import os
+import re
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from services.artifact_store import ARTIFACTS_DIR, Artifact, file_digest, verify_artifact, write_artifact
+
+
+# =========================
+# Paths & Versioning
+# =========================
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+CLUSTERS_PATH = os.path.join(DATA_DIR, "auto_category_map.json")
+LABELS_PATH = os.path.join(DATA_DIR, "cluster_labels.json")
+INDEX_DIR = os.getenv("CATEGORY_INDEX_DIR", ARTIFACTS_DIR)
+
+# Bump when the way prototypes are derived from the source files changes.
+INDEX_FORMAT_VERSION = 2
+
+FALLBACK_CATEGORY = "General / Miscellaneous"
+
+# CUAD questions look like:
+#   Highlight the parts (if any) of this contract related to "Cap On Liability"
+#   that should be reviewed by a lawyer. Details: Does the contract include ...
+# The boilerplate is identical for every example, so keep only the name + details.
+CUAD_QUESTION_RE = re.compile(
+    r'related to "(?P<name>[^"]+)" that should be reviewed by a lawyer\.\s*Details:\s*(?P<details>.*)',
+    re.DOTALL,
+)
+
+
+# =========================
+# Example Collection
+# =========================
+
+def clean_example(text: str) -> str:
+    """
+    Strips the shared CUAD question boilerplate from an example clause.
+    """
+    match = CUAD_QUESTION_RE.search(text)
+    if match:
+        return f"{match.group('name')}: {match.group('details').strip()}"
+    return text.strip()
+
+
+def item_to_text(item) -> str:
+    """
+    Cluster items may be strings or dicts (older pipeline format).
+    """
+    if isinstance(item, str):
+        return item
+    if isinstance(item, dict):
+        for key in ("clause_text", "clause", "text"):
+            if key in item:
+                return item[key]
+    return str(item)
+
+
+def collect_category_examples(categories: List[str]) -> Dict[str, List[str]]:
+    """
+    Groups the clustered CUAD examples under the serving categories.
+    Cluster labels outside `categories` fold into the fallback category.
+    Every category also keeps its own label as a prototype.
+    """
+    examples = {cat: [cat] for cat in categories}
+
+    if not (os.path.exists(CLUSTERS_PATH) and os.path.exists(LABELS_PATH)):
+        print("⚠️ Category example files missing — using label prototypes only")
+        return examples
+
+    with open(CLUSTERS_PATH, "r", encoding="utf-8") as f:
+        clusters = json.load(f)
+    with open(LABELS_PATH, "r", encoding="utf-8") as f:
+        cluster_labels = json.load(f)
+
+    fallback = FALLBACK_CATEGORY if FALLBACK_CATEGORY in examples else categories[-1]
+
+    for cluster_id, items in clusters.items():
+        label = cluster_labels.get(str(cluster_id), fallback)
+        category = label if label in examples else fallback
+        if isinstance(items, dict):
+            items = list(items.values())
+        for item in items:
+            text = clean_example(item_to_text(item))
+            if text and text not in examples[category]:
+                examples[category].append(text)
+
+    return examples
+
+
+def cuad_label_categories(categories: List[str]) -> Dict[str, str]:
+    """
+    CUAD label name -> serving category, from the clustered question map.
+    """
+    if not (os.path.exists(CLUSTERS_PATH) and os.path.exists(LABELS_PATH)):
+        return {}
+    with open(CLUSTERS_PATH, "r", encoding="utf-8") as f:
+        clusters = json.load(f)
+    with open(LABELS_PATH, "r", encoding="utf-8") as f:
+        cluster_labels = json.load(f)
+
+    mapping = {}
+    for cluster_id, items in clusters.items():
+        category = cluster_labels.get(str(cluster_id), FALLBACK_CATEGORY)
+        if category not in categories:
+            category = FALLBACK_CATEGORY
+        for item in (items.values() if isinstance(items, dict) else items):
+            match = CUAD_QUESTION_RE.search(item_to_text(item))
+            if match:
+                mapping.setdefault(match.group("name").strip(), category)
+    return mapping
+
+
+def source_fingerprint(categories: List[str]) -> str:
+    """
+    Hash of everything the index is derived from, used to detect stale files.
+    """
+    return file_digest((CLUSTERS_PATH, LABELS_PATH), extra=f"{INDEX_FORMAT_VERSION}|{json.dumps(categories)}")
+
+
+def index_path_for(model_name: str) -> str:
+    safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+    return os.path.join(INDEX_DIR, f"category_index_{safe_name}")
+
+
+# =========================
+# Category Index
+# =========================
+
+class CategoryIndex:
+    """
+    Several normalized prototype vectors per category.
+    Prototypes are stored contiguously per category so scores can be reduced per
+    category with a single `np.maximum.reduceat`.
+    """
+
+    def __init__(self, categories: List[str], prototypes: np.ndarray, owners: np.ndarray,
+                 model_name: str, fingerprint: str):
+        self.categories = list(categories)
+        self.prototypes = np.ascontiguousarray(prototypes, dtype=np.float32)
+        self.owners = np.asarray(owners, dtype=np.int32)
+        self.model_name = model_name
+        self.fingerprint = fingerprint
+        self.offsets = np.searchsorted(self.owners, np.arange(len(self.categories)))
+
+    @property
+    def version(self) -> str:
+        return f"{self.model_name}:{self.fingerprint}"
+
+    def score(self, clause_embeddings: np.ndarray) -> np.ndarray:
+        """
+        Cosine similarity of each clause to its closest prototype of each category.
+        Accepts a single normalized embedding or a (n, dim) matrix.
+        Returns shape (n_categories,) or (n, n_categories) accordingly.
+        """
+        emb = np.asarray(clause_embeddings, dtype=np.float32)
+        single = emb.ndim == 1
+        if single:
+            emb = emb[None, :]
+
+        per_category = self.reduce(emb @ self.prototypes.T)
+
+        return per_category[0] if single else per_category
+
+    def reduce(self, prototype_scores: np.ndarray) -> np.ndarray:
+        """
+        (n, n_prototypes) similarities -> (n, n_categories) best score per category.
+        """
+        return np.maximum.reduceat(prototype_scores, self.offsets, axis=1)
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        write_artifact(
+            path, "category_index", INDEX_FORMAT_VERSION,
+            {"prototypes": self.prototypes, "owners": self.owners},
+            encoder_id=self.model_name,
+            dataset_hash=self.fingerprint,
+            meta={"categories": self.categories},
+            primary="prototypes",
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "CategoryIndex":
+        """
+        Prototypes stay memory-mapped (shared between workers through the page cache).
+        """
+        artifact = Artifact(path)
+        return cls(
+            categories=artifact.meta["categories"],
+            prototypes=artifact.array("prototypes"),
+            owners=artifact.array("owners"),
+            model_name=artifact.manifest["encoder_id"],
+            fingerprint=artifact.manifest["dataset_hash"],
+        )
+
+
+def build_category_index(model, model_name: str, categories: List[str]) -> CategoryIndex:
+    """
+    Encodes the category examples once and returns the index.
+    """
+    examples = collect_category_examples(categories)
+
+    texts, owners = [], []
+    for idx, cat in enumerate(categories):
+        texts.extend(examples[cat])
+        owners.extend([idx] * len(examples[cat]))
+
+    prototypes = model.encode(
+        texts,
+        convert_to_numpy=True,
+        normalize_embeddings=True,
+        show_progress_bar=False,
+    )
+
+    return CategoryIndex(
+        categories=categories,
+        prototypes=prototypes,
+        owners=np.array(owners),
+        model_name=model_name,
+        fingerprint=source_fingerprint(categories),
+    )
+
+
+def load_category_index(model_name: str, categories: List[str],
+                        path: Optional[str] = None) -> Optional[CategoryIndex]:
+    """
+    Loads a saved index if it was built for these sources. An index of another
+    encoder or format raises ArtifactMismatch; one of older sources is rebuilt.
+    """
+    path = path or index_path_for(model_name)
+    if verify_category_index(model_name, path) is None:
+        return None
+
+    try:
+        index = CategoryIndex.load(path)
+    except (OSError, ValueError, KeyError) as e:
+        print("⚠️ Could not read category index:", e)
+        return None
+
+    if index.categories != list(categories) or index.fingerprint != source_fingerprint(categories):
+        print("ℹ️ Category index is stale — rebuilding")
+        return None
+
+    return index
+
+
+def verify_category_index(model_name: str, path: Optional[str] = None) -> Optional[Dict]:
+    """
+    Manifest of the persisted index after checking its encoder and format; None if
+    there is none yet.
+    """
+    return verify_artifact(
+        path or index_path_for(model_name), "category_index", INDEX_FORMAT_VERSION,
+        encoder_id=model_name, rebuild_hint="utils/build_category_index.py",
+    )
+
+
+def load_or_build_category_index(model, model_name: str, categories: List[str],
+                                 path: Optional[str] = None) -> CategoryIndex:
+    """
+    Startup entry point: reuse the persisted index or build and save a new one.
+    """
+    path = path or index_path_for(model_name)
+
+    index = load_category_index(model_name, categories, path)
+    if index is not None:
+        print(f"✅ Loaded category index ({len(index.prototypes)} prototypes) from {path}")
+        return index
+
+    index = build_category_index(model, model_name, categories)
+    try:
+        index.save(path)
+        print(f"💾 Saved category index ({len(index.prototypes)} prototypes) to {path}")
+    except OSError as e:
+        print("⚠️ Could not save category index:", e)
+    return index
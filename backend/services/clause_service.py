@@ -1,10 +1,37 @@
 # backend/services/clause_service.py
 
-from typing import Dict, List
+import os
+import threading
+import time
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 import numpy as np
 
-from sentence_transformers import SentenceTransformer, util
-from services.suggestion_service import generate_clause_suggestion
+from services.encoder_backend import ENCODER_BACKEND, encoder_id, load_encoder
+from services.registry import registry
+from services.suggestion_service import (
+    STATUS_FAILED,
+    STATUS_PENDING,
+    STATUS_READY,
+    STATUS_SKIPPED,
+    generate_clause_suggestion,
+    iter_clause_suggestions,
+    needs_suggestion,
+    suggestion_version,
+)
+from services.result_cache import content_key, result_cache
+from services.category_index import load_or_build_category_index
+from services.cluster_classifier import load_or_build_cluster_classifier
+from services.semantic_cache import semantic_cache
+from services.embedding_cache import embedding_cache
+from services.keyword_matcher import keyword_fingerprint, keyword_matcher
+from services.segmenter import SEGMENTER_VERSION, Segment, iter_segments, segment_text
+from services.batching_encoder import (
+    ENCODER_BATCHING,
+    ENCODER_MAX_BATCH,
+    ENCODER_MAX_WAIT_MS,
+    BatchingEncoder,
+)
 
 
 # =========================
@@ -12,7 +39,19 @@ from services.suggestion_service import generate_clause_suggestion
 # =========================
 
 MODEL_NAME = "all-MiniLM-L6-v2"
-model = SentenceTransformer(MODEL_NAME)
+# Model + backend (PyTorch, ONNX Runtime or int8 ONNX); versions everything derived from the embeddings
+ENCODER_ID = encoder_id(MODEL_NAME, ENCODER_BACKEND)
+
+# Classifier cascade (see "Classifier Cascade" below):
+#   1. keywords: a clause whose keyword hits all point to one category, with at least
+#      CASCADE_KEYWORD_MIN_HITS distinct keywords, is labelled without the encoder (0 = off)
+#   2. the serving encoder (MODEL_NAME) for everything else
+#   3. clauses whose top-1 / top-2 category margin is below CASCADE_ESCALATION_MARGIN
+#      are re-classified with CASCADE_HEAVY_MODEL ("" = off)
+CASCADE_KEYWORD_MIN_HITS = int(os.getenv("CASCADE_KEYWORD_MIN_HITS", "2"))
+CASCADE_HEAVY_MODEL = os.getenv("CASCADE_HEAVY_MODEL", "nlpaueb/legal-bert-base-uncased")
+CASCADE_ESCALATION_MARGIN = float(os.getenv("CASCADE_ESCALATION_MARGIN", "0.02"))
+HEAVY_ENCODER_ID = encoder_id(CASCADE_HEAVY_MODEL, "torch") if CASCADE_HEAVY_MODEL else None
 
 CATEGORIES = [
     "Intellectual Property",
@@ -55,19 +94,68 @@ ISSUES = {
 }
 
 
+
+# =========================
+# Lazily Loaded Resources
+# =========================
+
+def warm_encoder(encoder):
+    # first encode pays for lazy kernel / graph initialization
+    encoder.encode(["This Agreement shall be governed by the laws of the State of New York."])
+
+
+registry.register("encoder", lambda: load_encoder(MODEL_NAME), warmup=warm_encoder)
+# Prototype vectors per category, built once per model version and persisted.
+registry.register("category_index", lambda: load_or_build_category_index(get_model(), ENCODER_ID, CATEGORIES))
+# Fine-grained clusters next to the coarse categories; main.py verifies the artifact at startup
+registry.register("cluster_classifier", lambda: load_or_build_cluster_classifier(get_model(), ENCODER_ID))
+# Heavy tier of the classifier cascade (optional: if it fails to load, low-margin
+# clauses keep the serving encoder's answer)
+if CASCADE_HEAVY_MODEL:
+    registry.register("heavy_encoder", lambda: load_encoder(CASCADE_HEAVY_MODEL, backend="torch"), required=False)
+    registry.register(
+        "heavy_category_index",
+        lambda: load_or_build_category_index(get_heavy_model(), HEAVY_ENCODER_ID, CATEGORIES),
+        required=False,
+    )
+
+
+def get_model():
+    return registry.get("encoder")
+
+
+def get_category_index():
+    return registry.get("category_index")
+
+
+def get_cluster_classifier():
+    return registry.get("cluster_classifier")
+
+
+def get_heavy_model():
+    return registry.get("heavy_encoder")
+
+
+# Cache misses from concurrent requests share encoder calls
+batching_encoder = BatchingEncoder(get_model, ENCODER_MAX_BATCH, ENCODER_MAX_WAIT_MS) if ENCODER_BATCHING else None
+
+
+def get_request_encoder():
+    """
+    Encoder used for request-time clause embeddings.
+    """
+    return batching_encoder or get_model()
+
+
 # =========================
 # Helper Functions
 # =========================
 
 def split_into_clauses(text: str) -> List[str]:
     """
-    Splits contract text into clauses/sentences.
+    Splits contract text into clauses/sentences (see services/segmenter.py).
     """
-    if not text:
-        return []
-
-    parts = [p.strip() for p in text.replace("\n", " ").split(".") if len(p.strip()) > 25]
-    return parts
+    return [segment.text for segment in segment_text(text)]
 
 
 def normalize_risk(risk: str) -> str:
@@ -99,103 +187,605 @@ def compute_overall_risk(risk_counts: dict) -> str:
 
 
 
+def risk_label_for_score(avg: float) -> str:
+    """
+    Upload responses label the contract from its average risk score.
+    """
+    if avg <= 1.5:
+        return "Low"
+    elif avg <= 2.3:
+        return "Medium"
+    return "High"
+
+
 # =========================
 # Core Clause Analysis
 # =========================
 
-def analyze_clause(clause: str, category_embeddings, clause_embedding) -> Dict:
+TOP_K_CATEGORIES = int(os.getenv("TOP_K_CATEGORIES", "3"))
+
+RISK_LEVELS = ("High", "Medium", "Low")
+RISK_WEIGHTS = np.array([3, 2, 1])
+RISK_POSITION = {risk: idx for idx, risk in enumerate(RISK_LEVELS)}
+CATEGORY_POSITION = {cat: idx for idx, cat in enumerate(CATEGORIES)}
+# risk code (index into RISK_LEVELS) per category index
+CATEGORY_RISK_CODES = np.array([RISK_POSITION[normalize_risk(CATEGORY_RISK_MAP.get(cat, "Low"))] for cat in CATEGORIES])
+
+
+_scoring_matrices: Dict = {}
+
+
+def scoring_matrix(index, clusters) -> np.ndarray:
     """
-    Analyze a single clause and return classification & risk.
+    Category prototypes stacked over cluster centroids, so one product scores both.
     """
+    key = (index.version, clusters.version if clusters is not None else None)
+    matrix = _scoring_matrices.get(key)
+    if matrix is None:
+        parts = [index.prototypes] + ([clusters.centroids] if clusters is not None else [])
+        matrix = np.ascontiguousarray(np.vstack(parts).T)
+        _scoring_matrices.clear()
+        _scoring_matrices[key] = matrix
+    return matrix
+
+
+def classify_embeddings(clause_embeddings, index=None, top_k: int = TOP_K_CATEGORIES,
+                        clusters=None) -> Dict[str, np.ndarray]:
+    """
+    Classifies a (n, dim) matrix of normalized clause embeddings in one matrix multiply.
+    Returns per-clause arrays: best category index, its score, the top-k category
+    indices/scores (best first) and the margin between the top two scores; with a
+    cluster classifier also the nearest cluster and its score.
+    """
+    index = index or get_category_index()
+    sims = np.atleast_2d(np.asarray(clause_embeddings, dtype=np.float32)) @ scoring_matrix(index, clusters)
+    n_prototypes = len(index.prototypes)
+    scores = index.reduce(sims[:, :n_prototypes])
+    n, n_categories = scores.shape
+    k = max(1, min(top_k, n_categories))
+
+    rows = np.arange(n)[:, None]
+    top_idx = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    top_idx = top_idx[rows, np.argsort(-scores[rows, top_idx], axis=1)]
+    top_scores = scores[rows, top_idx]
+
+    if n_categories > 1:
+        # second best may fall outside top-k only when k == 1
+        runner_up = top_scores[:, 1] if k > 1 else np.partition(scores, n_categories - 2, axis=1)[:, n_categories - 2]
+        margin = top_scores[:, 0] - runner_up
+    else:
+        margin = np.zeros(n, dtype=scores.dtype)
+
+    result = {
+        "best": top_idx[:, 0],
+        "best_score": top_scores[:, 0],
+        "top_idx": top_idx,
+        "top_scores": top_scores,
+        "margin": margin,
+    }
+    if clusters is not None:
+        nearest = clusters.classify(None, scores=sims[:, n_prototypes:])
+        result["cluster"] = nearest["cluster"]
+        result["cluster_score"] = nearest["score"]
+    return result
 
-    similarities = util.cos_sim(clause_embedding, category_embeddings)[0]
-    best_idx = int(torch_argmax(similarities))
-    similarity_score = float(similarities[best_idx])
-
-    matched_category = CATEGORIES[best_idx]
-    risk_level = normalize_risk(CATEGORY_RISK_MAP.get(matched_category, "Low"))
-    ai_suggestion = generate_clause_suggestion(
-        clause=clause,
-        category=matched_category,
-        risk_level=risk_level
-    )
 
+def base_detail(clause: str, category: int) -> Dict:
+    """
+    Detail dict for a clause labelled `category` (index into CATEGORIES), before
+    scores and suggestions are filled in.
+    """
+    matched_category = CATEGORIES[category]
+    risk_level = RISK_LEVELS[CATEGORY_RISK_CODES[category]]
     return {
-    "sentence": clause,
-    "matched_category": matched_category,
-    "cluster_id": best_idx,
-    "similarity_score": round(similarity_score, 3),
-    "risk_level": risk_level,
-    "issue": ISSUES.get(matched_category, ""),
-    "suggested_optimization": SUGGESTIONS.get(matched_category, ""),
-    "ai_optimized_clause": ai_suggestion
-}
+        "sentence": clause,
+        "matched_category": matched_category,
+        "cluster_id": category,
+        "similarity_score": None,
+        "top_categories": [],
+        "category_margin": None,
+        "risk_level": risk_level,
+        "issue": ISSUES.get(matched_category, ""),
+        "suggested_optimization": SUGGESTIONS.get(matched_category, ""),
+        "ai_optimized_clause": None,
+        "suggestion_status": STATUS_PENDING if needs_suggestion(risk_level) else STATUS_SKIPPED,
+        "suggestion_reused": False,
+        "suggestion_similarity": None
+    }
 
 
-def torch_argmax(tensor):
+def details_from_result(clauses: List[str], result: Dict[str, np.ndarray], clusters=None) -> List[Dict]:
     """
-    Safe argmax without torch import issues.
+    Detail dicts for the rows of a classify_embeddings result.
     """
-    return int(np.argmax(tensor.cpu().numpy()))
+    # one conversion to Python types per array instead of per element
+    best = result["best"].tolist()
+    best_scores = np.round(result["best_score"].astype(np.float64), 3).tolist()
+    top_idx = result["top_idx"].tolist()
+    top_scores = np.round(result["top_scores"].astype(np.float64), 3).tolist()
+    margins = np.round(result["margin"].astype(np.float64), 3).tolist()
+    if clusters is not None:
+        cluster_best = result["cluster"].tolist()
+        cluster_scores = np.round(result["cluster_score"].astype(np.float64), 3).tolist()
+
+    details = []
+    for i, clause in enumerate(clauses):
+        detail = base_detail(clause, best[i])
+        detail["similarity_score"] = best_scores[i]
+        detail["top_categories"] = [
+            {"category": CATEGORIES[c], "score": sc} for c, sc in zip(top_idx[i], top_scores[i])
+        ]
+        detail["category_margin"] = margins[i]
+        if clusters is not None:
+            # fine-grained cluster next to the coarse category
+            c = cluster_best[i]
+            detail["cluster"] = {
+                "id": clusters.cluster_ids[c],
+                "label": clusters.labels[c],
+                "category": clusters.categories[c],
+                "score": cluster_scores[i],
+            }
+        details.append(detail)
+    return details
+
+
+def classify_clauses(clauses: List[str], clause_embeddings, index=None) -> List[Dict]:
+    """
+    Detail dicts (without suggestions) for a batch of clauses, from the serving
+    encoder's embeddings alone (the request pipeline uses cascade_classify).
+    """
+    if not clauses:
+        return []
+
+    clusters = get_cluster_classifier()
+    result = classify_embeddings(clause_embeddings, index=index, clusters=clusters)
+    return details_from_result(clauses, result, clusters)
+
+
+def analyze_clause(clause: str, clause_embedding, index=None, with_suggestion: bool = True) -> Dict:
+    """
+    Analyze a single clause and return classification & risk.
+    `clause_embedding` must be normalized; categories come from the prebuilt index.
+    """
+
+    result = classify_clauses([clause], np.atleast_2d(clause_embedding), index=index)[0]
+
+    if with_suggestion and result["suggestion_status"] == STATUS_PENDING:
+        ai_suggestion = generate_clause_suggestion(
+            clause=clause,
+            category=result["matched_category"],
+            risk_level=result["risk_level"]
+        )
+        result["ai_optimized_clause"] = ai_suggestion
+        result["suggestion_status"] = STATUS_READY if ai_suggestion else STATUS_FAILED
+
+    return result
 
 
 # =========================
-# Main Public API Function
+# Classifier Cascade
 # =========================
 
-def evaluate_contract(contract_text: str) -> Dict:
+TIER_KEYWORD = "keyword"
+TIER_ENCODER = "encoder"
+TIER_HEAVY = "heavy"
+CASCADE_TIERS = (TIER_KEYWORD, TIER_ENCODER, TIER_HEAVY)
+
+# keyword label -> serving category index; labels that are not a category are evidence only
+KEYWORD_CATEGORIES = {label: CATEGORY_POSITION.get(label.title()) for label in keyword_matcher.labels}
+
+
+class CascadeStats:
     """
-    MAIN ENTRY POINT
-    Used by both text input & file input.
+    Clauses settled by each tier and the time spent in it, for /health/metrics.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {"clauses": 0, "heavy_unavailable": 0, **{tier: 0 for tier in CASCADE_TIERS}}
+        self.seconds = {tier: 0.0 for tier in CASCADE_TIERS}
+
+    def record(self, counts: Dict[str, int], seconds: Dict[str, float]):
+        with self._lock:
+            for key, value in counts.items():
+                self.counters[key] += value
+            for tier, value in seconds.items():
+                self.seconds[tier] += value
+
+    def stats(self) -> Dict:
+        with self._lock:
+            clauses = self.counters["clauses"]
+            return {
+                **self.counters,
+                "hit_rates": {
+                    tier: round(self.counters[tier] / clauses, 3) if clauses else 0.0 for tier in CASCADE_TIERS
+                },
+                "seconds": {tier: round(value, 3) for tier, value in self.seconds.items()},
+            }
+
+
+cascade_stats = CascadeStats()
+
+
+def keyword_category(clause: str) -> Optional[Tuple[int, List[str]]]:
+    """
+    (category index, matched keywords) when every keyword hit names the same serving
+    category and at least CASCADE_KEYWORD_MIN_HITS distinct keywords match; None otherwise.
     """
+    if CASCADE_KEYWORD_MIN_HITS <= 0:
+        return None
+    hits = keyword_matcher.match(clause)
+    if len(hits) != 1:
+        return None
+    (label, words), = hits.items()
+    category = KEYWORD_CATEGORIES[label]
+    if category is None or len(words) < CASCADE_KEYWORD_MIN_HITS:
+        return None
+    return category, sorted(words)
+
+
+def heavy_tier():
+    """
+    (heavy encoder, its category index), or None when the tier is off or failed to load.
+    """
+    if not CASCADE_HEAVY_MODEL:
+        return None
+    try:
+        return get_heavy_model(), registry.get("heavy_category_index")
+    except RuntimeError:
+        return None  # the registry keeps the load error (/health/ready)
 
-    clauses = split_into_clauses(contract_text)
 
+def cascade_classify(clauses: List[str]) -> Tuple[List[Dict], Dict[int, np.ndarray]]:
+    """
+    Detail dicts (without suggestions) for a batch of clauses, each tagged with the
+    "classifier_tier" that settled it. Also returns the serving-encoder embeddings
+    computed on the way, by clause index: every clause past the keyword tier, plus
+    keyword-labelled clauses awaiting a suggestion when the semantic cache needs them.
+    """
     if not clauses:
+        return [], {}
+
+    counts = {"clauses": len(clauses), **{tier: 0 for tier in CASCADE_TIERS}}
+    seconds = {}
+
+    start = time.perf_counter()
+    details: List[Optional[Dict]] = [None] * len(clauses)
+    for idx, clause in enumerate(clauses):
+        hit = keyword_category(clause)
+        if hit is not None:
+            details[idx] = base_detail(clause, hit[0])
+            details[idx]["classifier_tier"] = TIER_KEYWORD
+            details[idx]["keyword_hits"] = hit[1]
+            counts[TIER_KEYWORD] += 1
+    seconds[TIER_KEYWORD] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    rest = [idx for idx, detail in enumerate(details) if detail is None]
+    to_encode = list(rest)
+    if semantic_cache is not None:
+        to_encode += [
+            idx for idx, detail in enumerate(details)
+            if detail is not None and detail["suggestion_status"] == STATUS_PENDING
+        ]
+    embeddings: Dict[int, np.ndarray] = {}
+    if to_encode:
+        vectors = embedding_cache.encode(get_request_encoder(), [clauses[idx] for idx in to_encode], model_name=ENCODER_ID)
+        embeddings = dict(zip(to_encode, vectors))
+    if not rest:
+        seconds[TIER_ENCODER] = time.perf_counter() - start
+        cascade_stats.record(counts, seconds)
+        return details, embeddings
+
+    clusters = get_cluster_classifier()
+    result = classify_embeddings(np.stack([embeddings[idx] for idx in rest]), clusters=clusters)
+    tiers = [TIER_ENCODER] * len(rest)
+    seconds[TIER_ENCODER] = time.perf_counter() - start
+
+    low_margin = np.flatnonzero(result["margin"] < CASCADE_ESCALATION_MARGIN) if CASCADE_HEAVY_MODEL else []
+    if len(low_margin):
+        start = time.perf_counter()
+        heavy = heavy_tier()
+        if heavy is None:
+            counts["heavy_unavailable"] = len(low_margin)
+        else:
+            heavy_model, heavy_index = heavy
+            heavy_vectors = embedding_cache.encode(
+                heavy_model, [clauses[rest[row]] for row in low_margin.tolist()], model_name=HEAVY_ENCODER_ID
+            )
+            heavy_result = classify_embeddings(heavy_vectors, index=heavy_index)
+            for key in ("top_idx", "top_scores", "margin", "best", "best_score"):
+                result[key][low_margin] = heavy_result[key]
+            for row in low_margin.tolist():
+                tiers[row] = TIER_HEAVY
+        seconds[TIER_HEAVY] = time.perf_counter() - start
+
+    for idx, detail, tier in zip(rest, details_from_result([clauses[idx] for idx in rest], result, clusters), tiers):
+        detail["classifier_tier"] = tier
+        details[idx] = detail
+        counts[tier] += 1
+
+    cascade_stats.record(counts, seconds)
+    return details, embeddings
+
+
+def cascade_version() -> str:
+    """
+    The cascade settings a result depends on (part of evaluation_version).
+    """
+    keyword = f"kw{CASCADE_KEYWORD_MIN_HITS}:{keyword_fingerprint()}" if CASCADE_KEYWORD_MIN_HITS > 0 else "kw-off"
+    heavy = f"{HEAVY_ENCODER_ID}<{CASCADE_ESCALATION_MARGIN}" if CASCADE_HEAVY_MODEL else "heavy-off"
+    return f"{keyword}+{heavy}"
+
+
+def evaluation_version() -> str:
+    """
+    Identifies the segmenter, encoder, category index, clusters, classifier cascade
+    and suggestion setup behind a result.
+    """
+    clusters = get_cluster_classifier()
+    cluster_version = clusters.version if clusters is not None else "none"
+    return (
+        f"{SEGMENTER_VERSION}|{ENCODER_ID}|{get_category_index().version}|{cluster_version}"
+        f"|{cascade_version()}|{suggestion_version()}"
+    )
+
+
+# =========================
+# Evaluation Stages
+# =========================
+
+# Clauses classified per encoder call when streaming, so the first events go out early
+STREAM_CHUNK_SIZE = int(os.getenv("STREAM_CHUNK_SIZE", "32"))
+
+
+def reuse_cached_suggestions(details: List[Dict], embeddings: Dict[int, np.ndarray], indices: List[int]) -> List[int]:
+    """
+    Fills suggestions for near-duplicates of clauses we already have suggestions for
+    (clauses without an entry in `embeddings` are not looked up).
+    Returns the indices that still need the LLM.
+    """
+    looked_up = [idx for idx in indices if idx in embeddings]
+    if semantic_cache is None or not looked_up:
+        return indices
+
+    reused = semantic_cache.lookup_many(
+        np.stack([embeddings[idx] for idx in looked_up]),
+        [details[idx]["matched_category"] for idx in looked_up],
+    )
+    found = {idx for idx, hit in zip(looked_up, reused) if hit is not None}
+    for idx, hit in zip(looked_up, reused):
+        if hit is not None:
+            suggestion, similarity = hit
+            details[idx]["ai_optimized_clause"] = suggestion
+            details[idx]["suggestion_status"] = STATUS_READY
+            details[idx]["suggestion_reused"] = True
+            details[idx]["suggestion_similarity"] = round(similarity, 3)
+    return [idx for idx in indices if idx not in found]
+
+
+def summarize_details(details: List[Dict]) -> Dict:
+    """
+    Contract-level fields of the response (everything except `details`),
+    aggregated in one vectorized pass over category and risk codes.
+    """
+    if not details:
         return {
             "overall_risk": "Unknown",
             "risk_counts": {"High": 0, "Medium": 0, "Low": 0},
             "clause_count": 0,
-            "details": [],
         }
 
-    clause_embeddings = model.encode(
-        clauses,
-        convert_to_tensor=True,
-        normalize_embeddings=True,
+    n = len(details)
+    fallback = CATEGORY_POSITION.get("General / Miscellaneous", len(CATEGORIES) - 1)
+    category_codes = np.fromiter(
+        (CATEGORY_POSITION.get(d["matched_category"], fallback) for d in details), dtype=np.int64, count=n
+    )
+    risk_codes = np.fromiter(
+        (RISK_POSITION[normalize_risk(d["risk_level"])] for d in details), dtype=np.int64, count=n
     )
+    pending = sum(1 for d in details if d["suggestion_status"] == STATUS_PENDING)
+
+    risk_totals = np.bincount(risk_codes, minlength=len(RISK_LEVELS))
+    risk_counts = {risk: int(risk_totals[idx]) for idx, risk in enumerate(RISK_LEVELS)}
+    overall_risk = compute_overall_risk(risk_counts)
+
+    # group risk codes by category, keeping clause order within each group
+    category_counts = np.bincount(category_codes, minlength=len(CATEGORIES))
+    grouped = np.split(risk_codes[np.argsort(category_codes, kind="stable")], np.cumsum(category_counts)[:-1])
+
+    return {
+        "risk_level": overall_risk,
+        "overall_risk": overall_risk,
+        "risk_counts": risk_counts,
+        "clause_count": n,
+        "suggestions_pending": pending,
+        "average_risk_score": round(float(RISK_WEIGHTS[risk_codes].mean()), 2),
+        "categories_summary": {
+            cat: {
+                "count": int(category_counts[idx]),
+                "risk_levels": [RISK_LEVELS[code] for code in grouped[idx].tolist()],
+            }
+            for idx, cat in enumerate(CATEGORIES)
+        }
+    }
 
-    category_embeddings = model.encode(
-        CATEGORIES,
-        convert_to_tensor=True,
-        normalize_embeddings=True,
+
+def iter_evaluate_contract(
+    contract_text: str,
+    suggestion_budget: Optional[float] = None,
+    chunk_size: Optional[int] = None,
+) -> Iterator[Dict]:
+    """
+    Runs the evaluation pipeline and yields events as results become available:
+      {"event": "start", "clause_count": n}                             first
+      {"event": "clause", "index": i, "detail": {...}}                  once per classified clause
+      {"event": "suggestion", "index": i, "ai_optimized_clause": ...,
+       "suggestion_status": ...}                                        as each LLM suggestion finishes
+      {"event": "summary", "summary": {...}}                            last
+    `chunk_size` classifies clauses in chunks (streaming); None encodes them in one batch.
+    """
+    segments = segment_text(contract_text)
+    yield from iter_evaluate_segments(segments, len(segments), suggestion_budget, chunk_size)
+
+
+def iter_evaluate_pages(
+    pages: Iterable[str],
+    suggestion_budget: Optional[float] = None,
+    chunk_size: Optional[int] = None,
+) -> Iterator[Dict]:
+    """
+    iter_evaluate_contract over text that is still being extracted (e.g. PDF pages):
+    clauses are segmented, encoded and classified as pages arrive.
+    The start event's clause_count is None, since the total is not known yet.
+    """
+    yield from iter_evaluate_segments(
+        iter_segments(pages), None, suggestion_budget, chunk_size or STREAM_CHUNK_SIZE
     )
 
-    details = []
-    risk_counts = {"High": 0, "Medium": 0, "Low": 0}
 
-    for idx, clause in enumerate(clauses):
-        result = analyze_clause(
-            clause=clause,
-            category_embeddings=category_embeddings,
-            clause_embedding=clause_embeddings[idx],
+def iter_evaluate_segments(
+    segments: Iterable[Segment],
+    clause_count: Optional[int],
+    suggestion_budget: Optional[float] = None,
+    chunk_size: Optional[int] = None,
+) -> Iterator[Dict]:
+    step = chunk_size or max(1, clause_count or 0)
+    yield {"event": "start", "clause_count": clause_count}
+
+    details: List[Dict] = []
+    embeddings: Dict[int, np.ndarray] = {}
+    segments = iter(segments)
+    while True:
+        chunk_segments = list(islice(segments, step))
+        if not chunk_segments:
+            break
+        chunk = [segment.text for segment in chunk_segments]
+
+        # Keyword tier first; repeats within the contract and boilerplate seen before
+        # are not re-encoded (embedding cache)
+        chunk_details, chunk_embeddings = cascade_classify(chunk)
+        embeddings.update((len(details) + offset, vector) for offset, vector in chunk_embeddings.items())
+        reuse_cached_suggestions(
+            chunk_details,
+            chunk_embeddings,
+            [offset for offset, d in enumerate(chunk_details) if d["suggestion_status"] == STATUS_PENDING],
         )
 
-        risk = normalize_risk(result["risk_level"])
-        risk_counts[risk] += 1
-        details.append(result)
+        for detail, segment in zip(chunk_details, chunk_segments):
+            # where the clause sits in the submitted text
+            detail["char_start"] = segment.start
+            detail["char_end"] = segment.end
+            detail["section_path"] = list(segment.section)
+            yield {"event": "clause", "index": len(details), "detail": detail}
+            details.append(detail)
+
+    # LLM suggestions run as one bounded, concurrent stage after classification
+    todo = [idx for idx, d in enumerate(details) if d["suggestion_status"] == STATUS_PENDING]
+    if todo:
+        yield from iter_suggestion_events(
+            details, todo, {idx: embeddings[idx] for idx in todo if idx in embeddings}, suggestion_budget
+        )
 
-    overall_risk = compute_overall_risk(risk_counts)        
+    yield {"event": "summary", "summary": summarize_details(details)}
 
-    return {   
-        "details": details, 
-        "risk_level": overall_risk,    
-        "overall_risk": overall_risk,
-        "risk_counts": risk_counts,
-        "clause_count": len(details),
-        "average_risk_score": round(
-            (3 * risk_counts["High"] + 2 * risk_counts["Medium"] + 1 * risk_counts["Low"]) / len(details), 2
-        ) if details else 0,
-        "categories_summary": {cat: {"count": sum(1 for d in details if d["matched_category"] == cat), "risk_levels": [d["risk_level"] for d in details if d["matched_category"] == cat]} for cat in CATEGORIES}
-        
-    }
+
+def iter_suggestion_events(
+    details: List[Dict],
+    todo: List[int],
+    embeddings: Dict[int, np.ndarray],
+    suggestion_budget: Optional[float] = None,
+) -> Iterator[Dict]:
+    """
+    The LLM stage for details[todo]: fills each detail in place and yields a
+    suggestion event as it finishes. Finished suggestions of clauses with an entry
+    in `embeddings` are added to the semantic cache.
+    """
+    jobs = [
+        {
+            "clause": details[idx]["sentence"],
+            "category": details[idx]["matched_category"],
+            "risk_level": details[idx]["risk_level"],
+        }
+        for idx in todo
+    ]
+    for job_idx, suggestion, status in iter_clause_suggestions(jobs, time_budget=suggestion_budget):
+        idx = todo[job_idx]
+        details[idx]["ai_optimized_clause"] = suggestion
+        details[idx]["suggestion_status"] = status
+        if semantic_cache is not None and status == STATUS_READY and idx in embeddings:
+            semantic_cache.add(embeddings[idx], details[idx]["matched_category"], suggestion)
+        yield {
+            "event": "suggestion",
+            "index": idx,
+            "ai_optimized_clause": suggestion,
+            "suggestion_status": status,
+        }
+
+
+def iter_result_events(result: Dict) -> Iterator[Dict]:
+    """
+    Replays a finished evaluation result as the events iter_evaluate_contract would emit.
+    """
+    details = result.get("details", [])
+    yield {"event": "start", "clause_count": len(details)}
+    for idx, detail in enumerate(details):
+        yield {"event": "clause", "index": idx, "detail": detail}
+    yield {"event": "summary", "summary": {k: v for k, v in result.items() if k != "details"}}
+
+
+# =========================
+# Main Public API Function
+# =========================
+
+def evaluate_contract(contract_text: str, suggestion_budget: Optional[float] = None) -> Dict:
+    """
+    MAIN ENTRY POINT
+    Used by both text input & file input.
+    `suggestion_budget` overrides SUGGESTION_TIME_BUDGET (seconds) for the LLM stage.
+    """
+
+    details = []
+    summary = {}
+    for event in iter_evaluate_contract(contract_text, suggestion_budget):
+        if event["event"] == "clause":
+            details.append(event["detail"])
+        elif event["event"] == "summary":
+            summary = event["summary"]
+
+    return {"details": details, **summary}
+
+
+def evaluate_pages(pages: Iterable[str], suggestion_budget: Optional[float] = None) -> Dict:
+    """
+    evaluate_contract for text that is still being extracted (see iter_evaluate_pages).
+    """
+    details = []
+    summary = {}
+    for event in iter_evaluate_pages(pages, suggestion_budget):
+        if event["event"] == "clause":
+            details.append(event["detail"])
+        elif event["event"] == "summary":
+            summary = event["summary"]
+
+    return {"details": details, **summary}
+
+
+def is_complete_result(result: Dict) -> bool:
+    """
+    Results with suggestions still pending are not worth caching.
+    """
+    return bool(result) and not result.get("suggestions_pending")
+
+
+def evaluate_contract_cached(contract_text: str) -> Dict:
+    """
+    evaluate_contract behind the content-addressed result cache.
+    Concurrent calls with the same text share one evaluation.
+    """
+    key = content_key("text", contract_text, evaluation_version())
+    return result_cache.get_or_compute(
+        key,
+        lambda: evaluate_contract(contract_text),
+        cacheable=is_complete_result,
+    )
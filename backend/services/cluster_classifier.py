@@ -0,0 +1,208 @@
+# backend/services/cluster_classifier.py
+
+import json
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from services.artifact_store import (
+    ARTIFACTS_DIR,
+    Artifact,
+    ArtifactMismatch,
+    file_digest,
+    verify_artifact,
+    write_artifact,
+)
+from services.category_index import (
+    CLUSTERS_PATH,
+    CUAD_QUESTION_RE,
+    FALLBACK_CATEGORY,
+    LABELS_PATH,
+    clean_example,
+    item_to_text,
+)
+
+
+# =========================
+# Paths & Versioning
+# =========================
+
+CLUSTER_CENTROIDS_PATH = os.getenv("CLUSTER_CENTROIDS_PATH", os.path.join(ARTIFACTS_DIR, "cluster_centroids"))
+
+# Bump when the way centroids are derived from the source files changes.
+CLUSTER_FORMAT_VERSION = 2
+
+FINE_LABEL_NAMES = 3  # CUAD names joined into a cluster's fine-grained label
+
+
+def cluster_fingerprint() -> str:
+    """
+    Hash of the cluster files the centroids are derived from.
+    """
+    return file_digest((CLUSTERS_PATH, LABELS_PATH), extra=str(CLUSTER_FORMAT_VERSION))
+
+
+# =========================
+# Cluster Classifier
+# =========================
+
+class ClusterClassifier:
+    """
+    One normalized centroid per cluster of auto_category_map.json, embedded with the
+    serving encoder, with the cluster's coarse category (cluster_labels.json) and a
+    fine-grained label made of the CUAD names it groups.
+    """
+
+    def __init__(self, cluster_ids: List[str], labels: List[str], categories: List[str],
+                 centroids: np.ndarray, encoder_id: str, fingerprint: str):
+        self.cluster_ids = list(cluster_ids)
+        self.labels = list(labels)
+        self.categories = list(categories)
+        self.centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+        self.encoder_id = encoder_id
+        self.fingerprint = fingerprint
+
+    @property
+    def version(self) -> str:
+        return f"{self.encoder_id}:{self.fingerprint}"
+
+    def classify(self, clause_embeddings: np.ndarray, scores: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+        """
+        Nearest centroid of each normalized clause embedding. `scores` may pass the
+        (n, n_clusters) similarities when the caller already computed them.
+        """
+        if scores is None:
+            scores = np.atleast_2d(np.asarray(clause_embeddings, dtype=np.float32)) @ self.centroids.T
+        best = np.argmax(scores, axis=1)
+        return {"cluster": best, "score": scores[np.arange(len(best)), best]}
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        write_artifact(
+            path, "cluster_centroids", CLUSTER_FORMAT_VERSION,
+            {"centroids": self.centroids},
+            encoder_id=self.encoder_id,
+            dataset_hash=self.fingerprint,
+            meta={"cluster_ids": self.cluster_ids, "labels": self.labels, "categories": self.categories},
+            primary="centroids",
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "ClusterClassifier":
+        artifact = Artifact(path)
+        return cls(
+            cluster_ids=artifact.meta["cluster_ids"],
+            labels=artifact.meta["labels"],
+            categories=artifact.meta["categories"],
+            centroids=artifact.array("centroids"),
+            encoder_id=artifact.manifest["encoder_id"],
+            fingerprint=artifact.manifest["dataset_hash"],
+        )
+
+
+def verify_cluster_artifact(encoder_id: str, path: str = CLUSTER_CENTROIDS_PATH) -> Optional[Dict]:
+    """
+    Startup / build-time check: raises ArtifactMismatch when the artifact was built
+    for another encoder or from other cluster files. Returns its manifest, or None
+    when there is no artifact yet (it is then built on first load).
+    """
+    return verify_artifact(
+        path, "cluster_centroids", CLUSTER_FORMAT_VERSION,
+        encoder_id=encoder_id, dataset_hash=cluster_fingerprint(),
+        rebuild_hint="utils/build_cluster_centroids.py",
+    )
+
+
+def collect_cluster_examples() -> List[Dict]:
+    """
+    [{"id", "category", "label", "texts"}] per cluster of auto_category_map.json.
+    """
+    if not (os.path.exists(CLUSTERS_PATH) and os.path.exists(LABELS_PATH)):
+        return []
+    with open(CLUSTERS_PATH, "r", encoding="utf-8") as f:
+        clusters = json.load(f)
+    with open(LABELS_PATH, "r", encoding="utf-8") as f:
+        cluster_labels = json.load(f)
+
+    collected = []
+    for cluster_id, items in clusters.items():
+        if isinstance(items, dict):
+            items = list(items.values())
+        category = cluster_labels.get(str(cluster_id), FALLBACK_CATEGORY)
+
+        texts, names = [], []
+        for item in items:
+            raw = item_to_text(item)
+            text = clean_example(raw)
+            if text and text not in texts:
+                texts.append(text)
+            match = CUAD_QUESTION_RE.search(raw)
+            if match and match.group("name") not in names:
+                names.append(match.group("name").strip())
+        if not texts:
+            continue
+
+        label = " / ".join(names[:FINE_LABEL_NAMES]) if names else f"{category} ({cluster_id})"
+        collected.append({"id": str(cluster_id), "category": category, "label": label, "texts": texts})
+    return collected
+
+
+def build_cluster_classifier(model, encoder_id: str) -> Optional[ClusterClassifier]:
+    """
+    Encodes every cluster's examples with the serving encoder (one batch) and
+    averages them into centroids. None when the cluster files are missing.
+    """
+    clusters = collect_cluster_examples()
+    if not clusters:
+        return None
+
+    texts = [text for cluster in clusters for text in cluster["texts"]]
+    owners = np.repeat(np.arange(len(clusters)), [len(cluster["texts"]) for cluster in clusters])
+    embeddings = np.asarray(model.encode(
+        texts,
+        convert_to_numpy=True,
+        normalize_embeddings=True,
+        show_progress_bar=False,
+    ), dtype=np.float32)
+
+    sums = np.zeros((len(clusters), embeddings.shape[1]), dtype=np.float32)
+    np.add.at(sums, owners, embeddings)
+    centroids = sums / np.maximum(np.linalg.norm(sums, axis=1, keepdims=True), 1e-12)
+
+    return ClusterClassifier(
+        cluster_ids=[cluster["id"] for cluster in clusters],
+        labels=[cluster["label"] for cluster in clusters],
+        categories=[cluster["category"] for cluster in clusters],
+        centroids=centroids,
+        encoder_id=encoder_id,
+        fingerprint=cluster_fingerprint(),
+    )
+
+
+def load_or_build_cluster_classifier(model, encoder_id: str,
+                                     path: str = CLUSTER_CENTROIDS_PATH) -> Optional[ClusterClassifier]:
+    """
+    Registry loader: the verified artifact, or a freshly built one on first run.
+    A mismatched artifact is an error, not rebuilt silently.
+    """
+    if verify_cluster_artifact(encoder_id, path) is not None:
+        classifier = ClusterClassifier.load(path)
+        print(f"✅ Loaded cluster centroids ({len(classifier.cluster_ids)} clusters) from {path}")
+    else:
+        classifier = build_cluster_classifier(model, encoder_id)
+        if classifier is None:
+            print("⚠️ Cluster files missing — fine-grained cluster labels disabled")
+            return None
+        try:
+            classifier.save(path)
+            print(f"💾 Saved cluster centroids ({len(classifier.cluster_ids)} clusters) to {path}")
+        except OSError as e:
+            print("⚠️ Could not save cluster centroids:", e)
+
+    dim = model.get_sentence_embedding_dimension()
+    if dim and classifier.centroids.shape[1] != dim:
+        raise ArtifactMismatch(
+            f"{path} has {classifier.centroids.shape[1]}-d centroids, the serving encoder produces {dim}-d embeddings"
+        )
+    return classifier
@@ -0,0 +1,374 @@
+# backend/services/cuad_dataset.py
+
+import array
+import hashlib
+import json
+import os
+import re
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from services.artifact_store import build_directory, publish_directory
+from services.category_index import CUAD_QUESTION_RE
+
+
+# =========================
+# Configuration
+# =========================
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+
+CUAD_JSON_PATH = os.path.join(DATA_DIR, "CUAD_v1.json")
+CUAD_DATASET_DIR = os.getenv("CUAD_DATASET_DIR", os.path.join(DATA_DIR, "cuad_dataset"))
+
+# Bump when the on-disk layout changes
+CUAD_FORMAT_VERSION = 1
+
+READ_CHARS = 1 << 20  # JSON text read per chunk by the fallback stream parser
+
+# Layout of a dataset directory (one file per column, every array a plain .npy
+# memory-mapped on first use, so a job only pages in the columns it touches):
+#   manifest.json                           counts, label vocabulary, column list
+#   document_title.bin / .offsets.npy       UTF-8 strings, row i = bytes [off[i], off[i + 1])
+#   context_text.bin / .offsets.npy         each distinct contract text once
+#   context_document.npy    int32           first document the context appeared in
+#   qa_context.npy          int32           context the question is asked about
+#   qa_label.npy            int16           code into manifest["labels"] ("Cap On Liability", ...)
+#   qa_impossible.npy       bool            no answer in this contract
+#   qa_answer_offsets.npy   int64 (n + 1)   answers of question i are [off[i], off[i + 1])
+#   answer_qa.npy           int32           owning question
+#   answer_start.npy / answer_end.npy  int32  character span in the context (not truncated)
+
+STRING_COLUMNS = ("document_title", "context_text")
+ARRAY_COLUMNS = {
+    "context_document": "int32",
+    "qa_context": "int32",
+    "qa_label": "int16",
+    "qa_impossible": "bool",
+    "qa_answer_offsets": "int64",
+    "answer_qa": "int32",
+    "answer_start": "int32",
+    "answer_end": "int32",
+}
+
+
+# =========================
+# Stream Parsing
+# =========================
+
+_WHITESPACE = re.compile(r"\s*")
+
+
+class _JsonStream:
+    """
+    Incremental reader over a JSON text file: whitespace, single punctuation and
+    complete values are consumed from a sliding buffer that is refilled on demand.
+    """
+
+    def __init__(self, f, chunk_chars: int = READ_CHARS):
+        self.f = f
+        self.chunk_chars = chunk_chars
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def more(self, at_least: int = 0) -> bool:
+        if self.eof:
+            return False
+        chunk = self.f.read(max(self.chunk_chars, at_least))
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """
+        Next non-whitespace character, without consuming it ("" at end of file).
+        """
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.more():
+                return ""
+
+    def expect(self, chars: str) -> str:
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError(f"Expected one of {chars!r} in JSON stream, found {char!r}")
+        self.pos += 1
+        return char
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                # incomplete value: read at least as much again (documents larger than a chunk)
+                if self.more(len(self.buf) - self.pos):
+                    continue
+                raise
+            if end == len(self.buf) and self.more():
+                continue  # a number at the buffer edge may continue in the next chunk
+            self.pos = end
+            return value
+
+    def iter_array(self) -> Iterator:
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.expect(",]") == "]":
+                return
+
+
+def _iter_documents_stdlib(f) -> Iterator[Dict]:
+    stream = _JsonStream(f)
+    if stream.peek() == "[":
+        yield from stream.iter_array()
+        return
+    stream.expect("{")
+    if stream.peek() == "}":
+        return
+    while True:
+        key = stream.value()
+        stream.expect(":")
+        if key == "data":
+            yield from stream.iter_array()
+        else:
+            stream.value()  # "version" and other small top-level fields
+        if stream.expect(",}") == "}":
+            return
+
+
+def iter_cuad_documents(path: str) -> Iterator[Dict]:
+    """
+    CUAD documents ({"title", "paragraphs": [...]}) one at a time, never holding the
+    whole file in memory. Uses ijson when it is installed, a chunked stdlib parser otherwise.
+    """
+    try:
+        import ijson
+    except ImportError:
+        ijson = None
+
+    if ijson is None:
+        with open(path, "r", encoding="utf-8") as f:
+            yield from _iter_documents_stdlib(f)
+        return
+
+    with open(path, "rb") as f:
+        head = f.read(4096).lstrip(b"\xef\xbb\xbf \t\r\n")
+        f.seek(0)
+        prefix = "item" if head.startswith(b"[") else "data.item"
+        yield from ijson.items(f, prefix, use_float=True)
+
+
+def question_label(question: str) -> str:
+    match = CUAD_QUESTION_RE.search(question or "")
+    return match.group("name").strip() if match else (question or "Unknown").strip()
+
+
+def locate_answer(context: str, start: int, text: str) -> Optional[int]:
+    """
+    Start of the answer text in the context: the recorded offset when it matches,
+    else the nearest occurrence (a few CUAD offsets are shifted); None if absent.
+    """
+    if not text:
+        return None
+    if 0 <= start and context.startswith(text, start):
+        return start
+    before = context.rfind(text, 0, max(start, 0) + len(text))
+    after = context.find(text, max(start, 0))
+    candidates = [p for p in (before, after) if p >= 0]
+    return min(candidates, key=lambda p: abs(p - start)) if candidates else None
+
+
+# =========================
+# Writing
+# =========================
+
+def write_cuad_dataset(directory: str, documents: Iterable[Dict], source: str = "") -> Dict:
+    """
+    Streams documents into a columnar dataset directory (written next to it and
+    swapped in when complete). Each distinct context is stored once; questions and
+    answer spans reference it by id. Returns the manifest.
+    """
+    started = time.perf_counter()
+    tmp_dir = build_directory(directory)
+
+    typecodes = {"int16": "h", "int32": "i", "int64": "q", "bool": "b"}
+    columns = {name: array.array(typecodes[dtype]) for name, dtype in ARRAY_COLUMNS.items()}
+    columns["qa_answer_offsets"].append(0)
+    string_files = {name: open(os.path.join(tmp_dir, f"{name}.bin"), "wb") for name in STRING_COLUMNS}
+    string_offsets = {name: array.array("q", [0]) for name in STRING_COLUMNS}
+
+    def add_string(name: str, value: str) -> int:
+        data = value.encode("utf-8")
+        string_files[name].write(data)
+        string_offsets[name].append(string_offsets[name][-1] + len(data))
+        return len(string_offsets[name]) - 2
+
+    labels: Dict[str, int] = {}
+    context_ids: Dict[bytes, int] = {}
+    stats = {"documents": 0, "paragraphs": 0, "duplicate_contexts": 0, "answers_relocated": 0, "answers_dropped": 0}
+
+    try:
+        for doc in documents:
+            document_id = add_string("document_title", str(doc.get("title") or "Untitled Document"))
+            stats["documents"] += 1
+
+            for para in doc.get("paragraphs", []):
+                context = para.get("context") or ""
+                if not context.strip():
+                    continue
+                stats["paragraphs"] += 1
+                key = hashlib.blake2b(context.encode("utf-8"), digest_size=16).digest()
+                context_id = context_ids.get(key)
+                if context_id is None:
+                    context_id = context_ids[key] = add_string("context_text", context)
+                    columns["context_document"].append(document_id)
+                else:
+                    stats["duplicate_contexts"] += 1
+
+                for qa in para.get("qas", []):
+                    qa_id = len(columns["qa_context"])
+                    label = labels.setdefault(question_label(qa.get("question", "")), len(labels))
+                    columns["qa_context"].append(context_id)
+                    columns["qa_label"].append(label)
+                    columns["qa_impossible"].append(bool(qa.get("is_impossible", not qa.get("answers"))))
+
+                    for answer in qa.get("answers", []):
+                        text = answer.get("text") or ""
+                        recorded = int(answer.get("answer_start", -1))
+                        start = locate_answer(context, recorded, text)
+                        if start is None:
+                            stats["answers_dropped"] += 1
+                            continue
+                        stats["answers_relocated"] += start != recorded
+                        columns["answer_qa"].append(qa_id)
+                        columns["answer_start"].append(start)
+                        columns["answer_end"].append(start + len(text))
+                    columns["qa_answer_offsets"].append(len(columns["answer_qa"]))
+    finally:
+        for f in string_files.values():
+            f.close()
+
+    for name, values in columns.items():
+        np.save(os.path.join(tmp_dir, f"{name}.npy"), np.frombuffer(values, dtype=values.typecode).astype(ARRAY_COLUMNS[name]))
+    for name, offsets in string_offsets.items():
+        np.save(os.path.join(tmp_dir, f"{name}.offsets.npy"), np.frombuffer(offsets, dtype=np.int64))
+
+    manifest = {
+        "format_version": CUAD_FORMAT_VERSION,
+        "source": source,
+        "counts": {
+            "documents": len(string_offsets["document_title"]) - 1,
+            "contexts": len(context_ids),
+            "qas": len(columns["qa_context"]),
+            "answers": len(columns["answer_qa"]),
+        },
+        **stats,
+        "labels": list(labels),
+        "columns": sorted(list(ARRAY_COLUMNS) + list(STRING_COLUMNS)),
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "build_seconds": round(time.perf_counter() - started, 2),
+    }
+    with open(os.path.join(tmp_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+
+    publish_directory(tmp_dir, directory)
+    return manifest
+
+
+# =========================
+# Reading
+# =========================
+
+class CuadDataset:
+    """
+    Read-only view of a dataset directory. Columns are memory-mapped the first time
+    they are used, so reading answer spans never touches the question columns and
+    reading labels never pages in the contract texts.
+    """
+
+    def __init__(self, directory: str = CUAD_DATASET_DIR):
+        with open(os.path.join(directory, "manifest.json"), "r", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("format_version") != CUAD_FORMAT_VERSION:
+            raise ValueError(f"Unsupported CUAD dataset format {self.manifest.get('format_version')}")
+        self.directory = directory
+        self.labels: List[str] = self.manifest["labels"]
+        self._columns: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return self.manifest["counts"]["contexts"]
+
+    def column(self, name: str) -> np.ndarray:
+        if name not in self._columns:
+            if name in STRING_COLUMNS:
+                path = os.path.join(self.directory, f"{name}.bin")
+                self._columns[name] = (
+                    np.memmap(path, dtype=np.uint8, mode="r") if os.path.getsize(path) else np.zeros(0, dtype=np.uint8)
+                )
+                self._columns[f"{name}.offsets"] = np.load(os.path.join(self.directory, f"{name}.offsets.npy"), mmap_mode="r")
+            elif name in ARRAY_COLUMNS:
+                self._columns[name] = np.load(os.path.join(self.directory, f"{name}.npy"), mmap_mode="r")
+            else:
+                raise KeyError(f"Unknown CUAD dataset column {name!r}")
+        return self._columns[name]
+
+    def string(self, name: str, row: int) -> str:
+        data = self.column(name)
+        offsets = self._columns[f"{name}.offsets"]
+        return bytes(data[offsets[row]:offsets[row + 1]]).decode("utf-8")
+
+    def context(self, context_id: int) -> str:
+        return self.string("context_text", context_id)
+
+    def document_title(self, document_id: int) -> str:
+        return self.string("document_title", document_id)
+
+    def iter_contexts(self, limit: int = 0) -> Iterator[Tuple[int, str]]:
+        for context_id in range(min(limit, len(self)) if limit else len(self)):
+            yield context_id, self.context(context_id)
+
+    def iter_answers(self, limit_contexts: int = 0) -> Iterator[Tuple[int, str, int, int, str]]:
+        """
+        (context_id, label, start, end, text) per answer span, grouped by context so
+        every contract text is decoded once.
+        """
+        answer_qa = np.asarray(self.column("answer_qa"))
+        if not len(answer_qa):
+            return
+        owner = np.asarray(self.column("qa_context"))[answer_qa]
+        label = np.asarray(self.column("qa_label"))[answer_qa]
+        starts = np.asarray(self.column("answer_start"))
+        ends = np.asarray(self.column("answer_end"))
+        order = np.argsort(owner, kind="stable")
+
+        current, context = -1, ""
+        for i in order.tolist():
+            context_id = int(owner[i])
+            if limit_contexts and context_id >= limit_contexts:
+                break
+            if context_id != current:
+                current, context = context_id, self.context(context_id)
+            start, end = int(starts[i]), int(ends[i])
+            yield context_id, self.labels[label[i]], start, end, context[start:end]
+
+
+def open_cuad_dataset(directory: str = CUAD_DATASET_DIR) -> Optional[CuadDataset]:
+    """
+    The dataset, or None when it has not been built (utils/ingest_cuad.py).
+    """
+    if not os.path.exists(os.path.join(directory, "manifest.json")):
+        return None
+    return CuadDataset(directory)
@@ -0,0 +1,228 @@
+# backend/services/embedding_cache.py
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+# =========================
+# Configuration
+# =========================
+
+EMBEDDING_CACHE_ITEMS = int(os.getenv("EMBEDDING_CACHE_ITEMS", "20000"))
+# Leave empty to keep the cache in memory only
+EMBEDDING_CACHE_DISK_PATH = os.getenv("EMBEDDING_CACHE_DISK_PATH", "")
+EMBEDDING_CACHE_DISK_ROWS = int(os.getenv("EMBEDDING_CACHE_DISK_ROWS", "200000"))
+
+WHITESPACE_RE = re.compile(r"\s+")
+
+
+def embedding_key(text: str, model_name: str) -> str:
+    normalized = WHITESPACE_RE.sub(" ", text or "").strip()
+    return hashlib.sha256(f"{model_name}\x1f{normalized}".encode("utf-8")).hexdigest()
+
+
+# =========================
+# Disk Tier
+# =========================
+
+class MemmapEmbeddingStore:
+    """
+    Ring buffer of float16 vectors in a memory-mapped file, with a SQLite
+    key -> slot index next to it. Once full, the oldest slots are reused.
+    Several workers can share one store; slot allocation happens inside a
+    SQLite write transaction.
+    """
+
+    def __init__(self, path: str, rows: int):
+        self.path = path
+        self.rows = rows
+        self.dim: Optional[int] = None
+        self._vectors: Optional[np.memmap] = None
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _open(self, dim: Optional[int] = None) -> bool:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path + ".sqlite3", timeout=10, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS slots (key TEXT PRIMARY KEY, slot INTEGER UNIQUE NOT NULL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            conn.commit()
+            self._conn = conn
+
+        if self._vectors is None:
+            row = self._conn.execute("SELECT value FROM meta WHERE name = 'dim'").fetchone()
+            stored_dim = row[0] if row else None
+            if stored_dim is None and dim is None:
+                return False
+            if stored_dim is None:
+                self._conn.execute("INSERT OR IGNORE INTO meta (name, value) VALUES ('dim', ?)", (dim,))
+                self._conn.execute("INSERT OR IGNORE INTO meta (name, value) VALUES ('next_slot', 0)")
+                self._conn.commit()
+                stored_dim = dim
+            if dim is not None and dim != stored_dim:
+                raise ValueError(f"Embedding store {self.path} has dim {stored_dim}, got {dim}")
+
+            vector_path = self.path + ".f16"
+            mode = "r+" if os.path.exists(vector_path) else "w+"
+            self._vectors = np.memmap(vector_path, dtype=np.float16, mode=mode, shape=(self.rows, stored_dim))
+            self.dim = stored_dim
+
+        return True
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        found = {}
+        with self._lock:
+            if not keys or not self._open():
+                return found
+            # SQLite limits bound parameters per statement
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                for key, slot in self._conn.execute(
+                    f"SELECT key, slot FROM slots WHERE key IN ({placeholders})", chunk
+                ):
+                    found[key] = np.asarray(self._vectors[slot], dtype=np.float32)
+        return found
+
+    def put_many(self, keys: List[str], vectors: np.ndarray):
+        if not keys:
+            return
+        # a batch larger than the ring would overwrite itself
+        keys, vectors = keys[-self.rows:], vectors[-self.rows:]
+        with self._lock:
+            self._open(dim=vectors.shape[1])
+            conn = self._conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                (next_slot,) = conn.execute("SELECT value FROM meta WHERE name = 'next_slot'").fetchone()
+                for offset, key in enumerate(keys):
+                    slot = (next_slot + offset) % self.rows
+                    conn.execute("DELETE FROM slots WHERE slot = ? OR key = ?", (slot, key))
+                    conn.execute("INSERT INTO slots (key, slot) VALUES (?, ?)", (key, slot))
+                    self._vectors[slot] = vectors[offset].astype(np.float16)
+                self._vectors.flush()
+                conn.execute(
+                    "UPDATE meta SET value = ? WHERE name = 'next_slot'",
+                    ((next_slot + len(keys)) % self.rows,),
+                )
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+
+# =========================
+# Embedding Cache
+# =========================
+
+class EmbeddingCache:
+    """
+    Bounded in-memory LRU of normalized clause embeddings, optionally backed by a
+    MemmapEmbeddingStore. `encode` deduplicates a request's texts and sends only
+    cache misses to the encoder, in a single batch.
+    """
+
+    def __init__(self, max_items: int, disk_store: Optional[MemmapEmbeddingStore] = None):
+        self.max_items = max_items
+        self.disk_store = disk_store
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.counters = {
+            "texts": 0,
+            "unique_texts": 0,
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "encoded": 0,
+        }
+
+    def encode(self, model, texts: List[str], model_name: str) -> np.ndarray:
+        """
+        Returns a (len(texts), dim) float32 matrix of normalized embeddings.
+        """
+        keys = [embedding_key(text, model_name) for text in texts]
+
+        # first occurrence of each key is the one we encode
+        unique: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            unique.setdefault(key, text)
+
+        vectors: Dict[str, np.ndarray] = {}
+        with self._lock:
+            for key in unique:
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    vectors[key] = vector
+            memory_hits = len(vectors)
+
+        missing = [key for key in unique if key not in vectors]
+        disk_hits = 0
+        if missing and self.disk_store is not None:
+            try:
+                from_disk = self.disk_store.get_many(missing)
+            except Exception as e:
+                print("⚠️ Embedding disk cache read failed:", e)
+                from_disk = {}
+            for key, vector in from_disk.items():
+                norm = np.linalg.norm(vector)
+                vectors[key] = vector / norm if norm else vector
+            disk_hits = len(from_disk)
+            missing = [key for key in missing if key not in vectors]
+
+        if missing:
+            encoded = model.encode(
+                [unique[key] for key in missing],
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+                show_progress_bar=False,
+            ).astype(np.float32, copy=False)
+            for key, vector in zip(missing, encoded):
+                vectors[key] = vector
+            if self.disk_store is not None:
+                try:
+                    self.disk_store.put_many(missing, encoded)
+                except Exception as e:
+                    print("⚠️ Embedding disk cache write failed:", e)
+
+        with self._lock:
+            for key in unique:
+                self._memory[key] = vectors[key]
+                self._memory.move_to_end(key)
+            while len(self._memory) > self.max_items:
+                self._memory.popitem(last=False)
+
+            self.counters["texts"] += len(texts)
+            self.counters["unique_texts"] += len(unique)
+            self.counters["memory_hits"] += memory_hits
+            self.counters["disk_hits"] += disk_hits
+            self.counters["encoded"] += len(missing)
+
+        if not keys:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.stack([vectors[key] for key in keys])
+
+    def stats(self) -> Dict:
+        with self._lock:
+            texts = self.counters["texts"]
+            return {
+                **self.counters,
+                "memory_items": len(self._memory),
+                "encoder_savings": round(1 - self.counters["encoded"] / texts, 3) if texts else 0.0,
+            }
+
+
+embedding_cache = EmbeddingCache(
+    max_items=EMBEDDING_CACHE_ITEMS,
+    disk_store=MemmapEmbeddingStore(EMBEDDING_CACHE_DISK_PATH, EMBEDDING_CACHE_DISK_ROWS)
+    if EMBEDDING_CACHE_DISK_PATH else None,
+)
@@ -0,0 +1,150 @@
+# backend/services/encoder_backend.py
+
+import os
+from typing import List, Union
+
+import numpy as np
+
+
+# =========================
+# Configuration
+# =========================
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+
+ENCODER_BACKEND = os.getenv("ENCODER_BACKEND", "torch")  # "torch", "onnx" or "onnx-int8"
+ONNX_DIR = os.getenv("ONNX_DIR", os.path.join(DATA_DIR, "onnx"))
+ENCODER_THREADS = int(os.getenv("ENCODER_THREADS", "0"))  # 0 = runtime default
+ENCODER_BATCH_SIZE = int(os.getenv("ENCODER_BATCH_SIZE", "32"))
+ENCODER_MAX_SEQ_LENGTH = int(os.getenv("ENCODER_MAX_SEQ_LENGTH", "256"))
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+ONNX_FILES = {"onnx": "model.onnx", "onnx-int8": "model-int8.onnx"}
+
+
+def onnx_model_dir(model_name: str) -> str:
+    return os.path.join(ONNX_DIR, model_name.replace("/", "__"))
+
+
+def encoder_id(model_name: str, backend: str) -> str:
+    """
+    Name used to version artifacts built with an encoder (category index, caches).
+    The PyTorch backend keeps the bare model name so existing artifacts stay valid.
+    """
+    return model_name if backend == "torch" else f"{model_name}+{backend}"
+
+
+# =========================
+# Backends
+# =========================
+
+class TorchEncoder:
+    """
+    The original SentenceTransformer model.
+    """
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+
+        if ENCODER_THREADS:
+            import torch
+            torch.set_num_threads(ENCODER_THREADS)
+
+        self.model_name = model_name
+        self.backend = "torch"
+        self.name = encoder_id(model_name, self.backend)
+        self.model = SentenceTransformer(model_name)
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.model.get_sentence_embedding_dimension()
+
+    def encode(self, texts: Union[str, List[str]], normalize_embeddings: bool = True,
+               batch_size: int = ENCODER_BATCH_SIZE, **kwargs) -> np.ndarray:
+        return self.model.encode(
+            texts,
+            batch_size=batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=normalize_embeddings,
+            show_progress_bar=False,
+        )
+
+
+class OnnxEncoder:
+    """
+    Exported transformer run with ONNX Runtime on CPU, with the same mean pooling
+    and normalization as the SentenceTransformer pipeline.
+    Export with utils/export_onnx_encoder.py first.
+    """
+
+    def __init__(self, model_name: str, backend: str = "onnx"):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        model_dir = onnx_model_dir(model_name)
+        model_path = os.path.join(model_dir, ONNX_FILES[backend])
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(
+                f"{model_path} not found — run `python utils/export_onnx_encoder.py` to export the {backend} encoder"
+            )
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if ENCODER_THREADS:
+            options.intra_op_num_threads = ENCODER_THREADS
+
+        self.model_name = model_name
+        self.backend = backend
+        self.name = encoder_id(model_name, backend)
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.dim = self.session.get_outputs()[0].shape[-1]
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dim
+
+    def encode(self, texts: Union[str, List[str]], normalize_embeddings: bool = True,
+               batch_size: int = ENCODER_BATCH_SIZE, **kwargs) -> np.ndarray:
+        single = isinstance(texts, str)
+        texts = [texts] if single else list(texts)
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+
+        # sort by length so each batch pads to a similar size, then restore order
+        order = np.argsort([len(t) for t in texts])
+        out = np.empty((len(texts), self.dim), dtype=np.float32)
+
+        for start in range(0, len(texts), batch_size):
+            batch_idx = order[start:start + batch_size]
+            encoded = self.tokenizer(
+                [texts[i] for i in batch_idx],
+                padding=True,
+                truncation=True,
+                max_length=ENCODER_MAX_SEQ_LENGTH,
+                return_tensors="np",
+            )
+            feeds = {k: v.astype(np.int64) for k, v in encoded.items() if k in self.input_names}
+            token_embeddings = self.session.run(None, feeds)[0]
+
+            mask = encoded["attention_mask"][..., None].astype(np.float32)
+            pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            out[batch_idx] = pooled
+
+        if normalize_embeddings:
+            out /= np.clip(np.linalg.norm(out, axis=1, keepdims=True), 1e-12, None)
+
+        return out[0] if single else out
+
+
+def load_encoder(model_name: str, backend: str = None):
+    """
+    Encoder for `model_name` on the configured backend.
+    """
+    backend = backend or ENCODER_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown ENCODER_BACKEND {backend!r}, expected one of {BACKENDS}")
+
+    print(f"🔹 Loading encoder {model_name} ({backend} backend)")
+    if backend == "torch":
+        return TorchEncoder(model_name)
+    return OnnxEncoder(model_name, backend)
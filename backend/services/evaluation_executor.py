@@ -0,0 +1,225 @@
+# backend/services/evaluation_executor.py
+
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import AsyncIterator, Callable, Dict, Iterable
+
+
+# =========================
+# Configuration
+# =========================
+
+LANE_INTERACTIVE = "interactive"  # short text evaluations from the UI
+LANE_BULK = "bulk"                # file uploads
+LANES = (LANE_INTERACTIVE, LANE_BULK)
+
+EVAL_WORKERS = int(os.getenv("EVAL_WORKERS", "4"))
+# Workers that only ever take interactive work, so uploads cannot starve the UI
+EVAL_INTERACTIVE_RESERVED = int(os.getenv("EVAL_INTERACTIVE_RESERVED", "1"))
+EVAL_MAX_QUEUE = {
+    LANE_INTERACTIVE: int(os.getenv("EVAL_MAX_QUEUE_INTERACTIVE", "32")),
+    LANE_BULK: int(os.getenv("EVAL_MAX_QUEUE_BULK", "8")),
+}
+MAX_RETRY_AFTER = 120
+# Events a streaming evaluation may run ahead of its client before it waits
+STREAM_BUFFER_EVENTS = int(os.getenv("STREAM_BUFFER_EVENTS", "256"))
+
+
+class ExecutorSaturated(Exception):
+    """
+    The lane's queue is full; callers should answer 429 with Retry-After.
+    """
+
+    def __init__(self, lane: str, retry_after: int):
+        super().__init__(f"{lane} evaluation queue is full")
+        self.lane = lane
+        self.retry_after = retry_after
+
+
+# =========================
+# Priority Executor
+# =========================
+
+class PriorityEvaluationExecutor:
+    """
+    Bounded pool of threads for evaluation work, off the event loop.
+    Shared workers always take interactive work before bulk work; reserved workers
+    take interactive work only. Each lane has a queue-depth limit (admission control).
+    """
+
+    def __init__(self, workers: int, interactive_reserved: int, max_queue: Dict[str, int]):
+        self.workers = max(1, workers)
+        self.interactive_reserved = min(max(0, interactive_reserved), self.workers - 1)
+        self.max_queue = max_queue
+
+        self._cond = threading.Condition()
+        self._queues = {lane: deque() for lane in LANES}
+        self._running = {lane: 0 for lane in LANES}
+        # moving average of job duration per lane, for Retry-After
+        self._avg_seconds = {lane: 1.0 for lane in LANES}
+        self._threads = []
+
+        self.counters = {
+            "submitted": {lane: 0 for lane in LANES},
+            "rejected": {lane: 0 for lane in LANES},
+            "completed": {lane: 0 for lane in LANES},
+        }
+
+    # ---------- Submission ----------
+
+    def submit(self, fn: Callable, *args, lane: str = LANE_BULK, **kwargs) -> Future:
+        if lane not in self._queues:
+            raise ValueError(f"Unknown lane {lane!r}")
+        self._ensure_started()
+
+        with self._cond:
+            if len(self._queues[lane]) >= self.max_queue[lane]:
+                self.counters["rejected"][lane] += 1
+                raise ExecutorSaturated(lane, self._retry_after(lane))
+            future: Future = Future()
+            self._queues[lane].append((fn, args, kwargs, future))
+            self.counters["submitted"][lane] += 1
+            self._cond.notify_all()
+        return future
+
+    async def run(self, fn: Callable, *args, lane: str = LANE_BULK, **kwargs):
+        """
+        Awaitable submit; raises ExecutorSaturated immediately when the lane is full.
+        """
+        return await asyncio.wrap_future(self.submit(fn, *args, lane=lane, **kwargs))
+
+    def stream(self, make_events: Callable[[], Iterable], lane: str = LANE_BULK) -> AsyncIterator:
+        """
+        Runs a blocking event generator on the pool and relays its events to the event
+        loop as an async iterator. Admission happens now, before any response is sent.
+        The generator runs at most STREAM_BUFFER_EVENTS events ahead of the client, and
+        is closed (freeing the worker) once the client stops reading.
+        """
+        loop = asyncio.get_running_loop()
+        events: asyncio.Queue = asyncio.Queue()
+        slots = threading.BoundedSemaphore(max(1, STREAM_BUFFER_EVENTS))
+        cancelled = threading.Event()
+        done = object()
+
+        def offer(event) -> bool:
+            # backpressure: wait for the client to take earlier events, unless it went away
+            while not slots.acquire(timeout=0.5):
+                if cancelled.is_set():
+                    return False
+            if cancelled.is_set():
+                return False
+            loop.call_soon_threadsafe(events.put_nowait, event)
+            return True
+
+        def produce():
+            if cancelled.is_set():
+                return
+            generator = None
+            try:
+                generator = iter(make_events())
+                for event in generator:
+                    if not offer(event):
+                        return
+            except Exception as e:
+                offer({"event": "error", "message": str(e)})
+            finally:
+                # stops the evaluation where it is (pending LLM calls are cancelled)
+                close = getattr(generator, "close", None)
+                if close is not None:
+                    close()
+                if not cancelled.is_set():
+                    loop.call_soon_threadsafe(events.put_nowait, done)
+
+        self.submit(produce, lane=lane)
+
+        async def relay():
+            try:
+                while True:
+                    event = await events.get()
+                    if event is done:
+                        return
+                    slots.release()
+                    yield event
+            finally:
+                cancelled.set()
+
+        return relay()
+
+    def stats(self) -> Dict:
+        with self._cond:
+            return {
+                "workers": self.workers,
+                "interactive_reserved": self.interactive_reserved,
+                "queued": {lane: len(q) for lane, q in self._queues.items()},
+                "running": dict(self._running),
+                "max_queue": dict(self.max_queue),
+                "avg_seconds": {lane: round(v, 3) for lane, v in self._avg_seconds.items()},
+                **{name: dict(values) for name, values in self.counters.items()},
+            }
+
+    # ---------- Workers ----------
+
+    def _ensure_started(self):
+        if self._threads:
+            return
+        with self._cond:
+            if self._threads:
+                return
+            for idx in range(self.workers):
+                interactive_only = idx < self.interactive_reserved
+                thread = threading.Thread(
+                    target=self._worker,
+                    args=(interactive_only,),
+                    name=f"eval-{'interactive' if interactive_only else 'shared'}-{idx}",
+                    daemon=True,
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def _next(self, interactive_only: bool):
+        lanes = (LANE_INTERACTIVE,) if interactive_only else LANES
+        for lane in lanes:
+            if self._queues[lane]:
+                return lane, self._queues[lane].popleft()
+        return None
+
+    def _worker(self, interactive_only: bool):
+        while True:
+            with self._cond:
+                picked = self._next(interactive_only)
+                while picked is None:
+                    self._cond.wait()
+                    picked = self._next(interactive_only)
+                lane, (fn, args, kwargs, future) = picked
+                self._running[lane] += 1
+
+            started = time.monotonic()
+            try:
+                if future.set_running_or_notify_cancel():
+                    try:
+                        future.set_result(fn(*args, **kwargs))
+                    except BaseException as e:
+                        future.set_exception(e)
+            finally:
+                elapsed = time.monotonic() - started
+                with self._cond:
+                    self._running[lane] -= 1
+                    self.counters["completed"][lane] += 1
+                    self._avg_seconds[lane] = 0.8 * self._avg_seconds[lane] + 0.2 * elapsed
+
+    def _retry_after(self, lane: str) -> int:
+        # time for the work already ahead of a new request to drain
+        ahead = len(self._queues[LANE_INTERACTIVE]) + self._running[LANE_INTERACTIVE]
+        if lane == LANE_BULK:
+            ahead += len(self._queues[LANE_BULK]) + self._running[LANE_BULK]
+        workers = self.workers if lane == LANE_INTERACTIVE else self.workers - self.interactive_reserved
+        seconds = ahead * self._avg_seconds[lane] / max(1, workers)
+        return int(min(MAX_RETRY_AFTER, max(1, math.ceil(seconds))))
+
+
+evaluation_executor = PriorityEvaluationExecutor(EVAL_WORKERS, EVAL_INTERACTIVE_RESERVED, EVAL_MAX_QUEUE)
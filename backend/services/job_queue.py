@@ -0,0 +1,410 @@
+# backend/services/job_queue.py
+
+import atexit
+import json
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from typing import BinaryIO, Dict, List, Optional
+
+from database.write_behind import process_alive
+
+
+# =========================
+# Configuration
+# =========================
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+
+JOB_DB_PATH = os.getenv("JOB_DB_PATH", os.path.join(DATA_DIR, "jobs.sqlite3"))
+JOB_SPOOL_DIR = os.getenv("JOB_SPOOL_DIR", os.path.join(DATA_DIR, "job_uploads"))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "0.5"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+# A running job whose heartbeat is older than this is assumed lost (crash / restart) and re-queued
+JOB_STALE_AFTER = float(os.getenv("JOB_STALE_AFTER", "300"))
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+
+class JobInputError(Exception):
+    """
+    The job can never succeed (e.g. unreadable file); it fails without retries.
+    """
+
+
+# =========================
+# SQLite Backend
+# =========================
+
+def connect(path: str = None) -> sqlite3.Connection:
+    path = path or JOB_DB_PATH
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            status TEXT NOT NULL,
+            params TEXT NOT NULL,
+            file_path TEXT,
+            progress REAL NOT NULL DEFAULT 0,
+            stage TEXT,
+            result TEXT,
+            error TEXT,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            worker_pid INTEGER,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL
+        )
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at)")
+    return conn
+
+
+_thread_local = threading.local()
+
+
+def thread_connection() -> sqlite3.Connection:
+    """
+    This thread's connection to JOB_DB_PATH, opened (with the schema check) once and reused.
+    """
+    conn = getattr(_thread_local, "conn", None)
+    if conn is None:
+        conn = _thread_local.conn = connect()
+    return conn
+
+
+def enqueue_upload(source: BinaryIO, file_name: str, params: Dict, conn: sqlite3.Connection = None) -> str:
+    """
+    Streams the upload (a binary file object) to disk and records a queued job.
+    Returns the job id.
+    """
+    job_id = uuid.uuid4().hex
+    os.makedirs(JOB_SPOOL_DIR, exist_ok=True)
+    file_path = os.path.join(JOB_SPOOL_DIR, job_id)
+    with open(file_path, "wb") as f:
+        shutil.copyfileobj(source, f)
+        f.flush()
+        os.fsync(f.fileno())
+
+    now = time.time()
+    conn = conn or thread_connection()
+    conn.execute(
+        "INSERT INTO jobs (id, kind, status, params, file_path, stage, created_at, updated_at) "
+        "VALUES (?, 'upload', ?, ?, ?, 'queued', ?, ?)",
+        (job_id, STATUS_QUEUED, json.dumps({**params, "file_name": file_name}), file_path, now, now),
+    )
+    return job_id
+
+
+def claim_next_job(conn: sqlite3.Connection) -> Optional[sqlite3.Row]:
+    """
+    Atomically takes the oldest queued job, or a running job whose worker went silent.
+    """
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        row = conn.execute(
+            "SELECT * FROM jobs WHERE status = ? OR (status = ? AND updated_at < ?) "
+            "ORDER BY created_at LIMIT 1",
+            (STATUS_QUEUED, STATUS_RUNNING, now - JOB_STALE_AFTER),
+        ).fetchone()
+        if row is None:
+            conn.execute("COMMIT")
+            return None
+
+        if row["attempts"] >= JOB_MAX_ATTEMPTS:
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ?",
+                (STATUS_FAILED, row["error"] or "Too many attempts", now, row["id"]),
+            )
+            conn.execute("COMMIT")
+            remove_upload(row["file_path"])
+            return None
+
+        conn.execute(
+            "UPDATE jobs SET status = ?, stage = 'starting', progress = 0, attempts = attempts + 1, "
+            "worker_pid = ?, updated_at = ? WHERE id = ?",
+            (STATUS_RUNNING, os.getpid(), now, row["id"]),
+        )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return conn.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone()
+
+
+def remove_upload(file_path: Optional[str]):
+    """
+    Deletes a finished job's spooled upload.
+    """
+    if not file_path:
+        return
+    try:
+        os.remove(file_path)
+    except OSError:
+        pass
+
+
+def update_progress(conn: sqlite3.Connection, job_id: str, progress: float, stage: str):
+    conn.execute(
+        "UPDATE jobs SET progress = ?, stage = ?, updated_at = ? WHERE id = ?",
+        (round(progress, 3), stage, time.time(), job_id),
+    )
+
+
+def finish_job(conn: sqlite3.Connection, job_id: str, result: Dict = None, error: str = None):
+    conn.execute(
+        "UPDATE jobs SET status = ?, progress = ?, stage = ?, result = ?, error = ?, updated_at = ? WHERE id = ?",
+        (
+            STATUS_FAILED if error else STATUS_DONE,
+            0 if error else 1,
+            "failed" if error else "done",
+            json.dumps(result) if result is not None else None,
+            error,
+            time.time(),
+            job_id,
+        ),
+    )
+
+
+def recover_interrupted_jobs(conn: sqlite3.Connection) -> int:
+    """
+    Re-queues jobs left running by worker processes that no longer exist on this host,
+    so work survives a server restart without waiting for JOB_STALE_AFTER.
+    """
+    rows = conn.execute("SELECT id, worker_pid FROM jobs WHERE status = ?", (STATUS_RUNNING,)).fetchall()
+    recovered = 0
+    for row in rows:
+        if row["worker_pid"] and process_alive(row["worker_pid"]):
+            continue
+        conn.execute(
+            "UPDATE jobs SET status = ?, stage = 'recovered', updated_at = ? WHERE id = ? AND status = ?",
+            (STATUS_QUEUED, time.time(), row["id"], STATUS_RUNNING),
+        )
+        recovered += 1
+    return recovered
+
+
+def get_job(job_id: str, conn: sqlite3.Connection = None) -> Optional[Dict]:
+    conn = conn or thread_connection()
+    row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    if row is None:
+        return None
+    job = dict(row)
+    job["params"] = json.loads(job["params"])
+    job["result"] = json.loads(job["result"]) if job["result"] else None
+    return job
+
+
+# =========================
+# Job Execution
+# =========================
+
+def run_upload_job(conn: sqlite3.Connection, job: sqlite3.Row) -> Dict:
+    """
+    Extraction, evaluation and the Supabase insert for one queued upload.
+    Heavy imports happen here so only worker processes pay for them.
+    """
+    from database.compact_storage import load_evaluation
+    from database.supabase_client import contract_writer, get_supabase, insert_contract_row
+    from services.clause_service import evaluation_version, iter_evaluate_contract, risk_label_for_score
+    from services.parser_service import ExtractionError, extract_text_from_path
+    from services.revision_service import iter_revise_contract
+    from services.suggestion_service import STATUS_PENDING
+
+    job_id = job["id"]
+    params = json.loads(job["params"])
+
+    update_progress(conn, job_id, 0.02, "extracting")
+    # page workers open the spooled file themselves
+    try:
+        text = extract_text_from_path(job["file_path"], params["file_name"])
+    except ExtractionError as e:
+        raise JobInputError(str(e)) from e
+    if not text.strip():
+        raise JobInputError("Could not extract text from file. Unsupported or corrupted file.")
+
+    # 10% extraction, 40% classification, 50% suggestions
+    update_progress(conn, job_id, 0.1, "classifying")
+    details: List[Dict] = []
+    summary = {}
+    clause_count = 0
+    suggestions_total = 0
+    suggestions_done = 0
+    last_update = 0.0
+
+    # a revision re-evaluates only the clauses that changed since the previous evaluation
+    previous_id = params.get("previous_evaluation_id")
+    if previous_id:
+        client = get_supabase()
+        previous = load_evaluation(client, previous_id) if client is not None else None
+        if previous is None:
+            raise JobInputError(f"Previous evaluation {previous_id} not found")
+        events = iter_revise_contract(text, previous)
+    else:
+        events = iter_evaluate_contract(text)
+
+    for event in events:
+        kind = event["event"]
+        if kind == "start":
+            clause_count = event["clause_count"]
+            continue
+        if kind == "clause":
+            details.append(event["detail"])
+            if event["detail"]["suggestion_status"] == STATUS_PENDING:
+                suggestions_total += 1
+            progress, stage = 0.1 + 0.4 * len(details) / max(1, clause_count), "classifying"
+        elif kind == "suggestion":
+            suggestions_done += 1
+            progress, stage = 0.5 + 0.5 * suggestions_done / max(1, suggestions_total), "suggesting"
+        elif kind == "summary":
+            summary = event["summary"]
+            continue
+        else:
+            continue
+
+        # progress writes double as the heartbeat; keep them to a few per second
+        if time.monotonic() - last_update > 0.25:
+            update_progress(conn, job_id, min(progress, 0.99), stage)
+            last_update = time.monotonic()
+
+    result = {"details": details, **summary}
+    if "average_risk_score" in result:
+        result["risk_level"] = risk_label_for_score(result["average_risk_score"])
+
+    update_progress(conn, job_id, 0.99, "saving")
+    evaluation_id = insert_contract_row({
+        "name": params.get("name") or params["file_name"],
+        "text": text,
+        "risk_score": result.get("average_risk_score"),
+        "level": result.get("risk_level"),
+        "user_id": params.get("user_id"),
+        "categories_summary": result.get("categories_summary"),
+        "details": result.get("details"),
+        "evaluation_version": evaluation_version(),
+        "previous_evaluation_id": previous_id,
+    }, source="upload job")
+    # the job only counts as done once its row is in Supabase or the spool
+    contract_writer.flush()
+    if evaluation_id:
+        result["evaluation_id"] = evaluation_id
+
+    return result
+
+
+def worker_main(stop_event, db_path: str = None):
+    """
+    Worker process loop: claim, run, record, repeat until stopped.
+    """
+    conn = connect(db_path)
+    print(f"👷 Job worker {os.getpid()} started")
+
+    # load the encoder while waiting for the first job
+    import services.clause_service  # noqa: F401  (registers the models)
+    from services.registry import registry
+    registry.warmup_in_background()
+
+    while not stop_event.is_set():
+        try:
+            job = claim_next_job(conn)
+        except sqlite3.OperationalError as e:
+            print("⚠️ Job claim failed:", e)
+            job = None
+
+        if job is None:
+            if registry.retry_pending():
+                registry.warmup_in_background()
+            stop_event.wait(JOB_POLL_INTERVAL)
+            continue
+
+        try:
+            result = run_upload_job(conn, job)
+            finish_job(conn, job["id"], result=result)
+            print(f"✅ Job {job['id']} done")
+        except Exception as e:
+            traceback.print_exc()
+            if job["attempts"] >= JOB_MAX_ATTEMPTS or isinstance(e, JobInputError):
+                finish_job(conn, job["id"], error=str(e))
+                remove_upload(job["file_path"])
+            else:
+                # back into the queue for another attempt
+                conn.execute(
+                    "UPDATE jobs SET status = ?, stage = 'retrying', error = ?, updated_at = ? WHERE id = ?",
+                    (STATUS_QUEUED, str(e), time.time(), job["id"]),
+                )
+            continue
+
+        remove_upload(job["file_path"])
+
+    from services.parser_service import shutdown_pdf_pool
+    shutdown_pdf_pool()
+    print(f"👷 Job worker {os.getpid()} stopped")
+
+
+# =========================
+# Worker Pool
+# =========================
+
+class JobWorkerPool:
+    """
+    Fixed number of spawned worker processes sharing the SQLite queue.
+    Spawn (not fork) so workers do not inherit the server's loaded models and threads.
+    Workers are not daemonic, so they can start the PDF page pool; stop() (also run
+    at interpreter exit) ends them.
+    """
+
+    def __init__(self, workers: int, db_path: str = None):
+        self.workers = workers
+        self.db_path = db_path
+        self._ctx = multiprocessing.get_context("spawn")
+        self._stop = self._ctx.Event()
+        self._processes = []
+
+    def start(self):
+        if self._processes or self.workers <= 0:
+            return
+        # make sure the schema exists before workers race to create it
+        conn = connect(self.db_path)
+        recovered = recover_interrupted_jobs(conn)
+        conn.close()
+        if recovered:
+            print(f"♻️ Re-queued {recovered} interrupted job(s)")
+        for _ in range(self.workers):
+            process = self._ctx.Process(target=worker_main, args=(self._stop, self.db_path), daemon=False)
+            process.start()
+            self._processes.append(process)
+        # registered after multiprocessing's own exit hook, so it runs before the join of the children
+        atexit.register(self.stop)
+        print(f"🚀 Started {self.workers} job worker(s)")
+
+    def stop(self, timeout: float = 10):
+        if not self._processes:
+            return
+        atexit.unregister(self.stop)
+        self._stop.set()
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        self._processes = []
+
+    def alive(self) -> int:
+        return sum(1 for p in self._processes if p.is_alive())
+
+
+worker_pool = JobWorkerPool(JOB_WORKERS)
@@ -0,0 +1,158 @@
+# backend/services/keyword_matcher.py
+
+import hashlib
+import json
+from collections import deque
+from typing import Dict, Iterator, List, Set, Tuple
+
+
+# =========================
+# Category Keywords
+# =========================
+
+# Shared by the runtime keyword tier (services/clause_service.py) and the offline
+# cluster naming (utils/auto_name_clusters.py). Only labels that name a serving
+# category (after .title()) can label a clause at runtime; the others still count
+# as competing evidence.
+CATEGORY_KEYWORDS = {
+    "confidentiality": [
+        "confidential", "nda", "non-disclosure", "privacy", "secret",
+        "proprietary information", "sensitive", "data", "information sharing"
+    ],
+    "liability": [
+        "liability", "indemnity", "indemnification", "damages",
+        "loss", "responsibility", "hold harmless"
+    ],
+    "termination": [
+        "terminate", "termination", "breach", "cancel", "expiry",
+        "suspend", "notice period"
+    ],
+    "payment": [
+        "payment", "invoice", "fees", "billing", "charges", "price",
+        "compensation", "cost"
+    ],
+    "governing law": [
+        "jurisdiction", "law", "governing", "arbitration", "venue",
+        "court", "dispute", "applicable law"
+    ],
+    "data protection": [
+        "gdpr", "data", "security", "processing", "breach",
+        "information security"
+    ],
+    "intellectual property": [
+        "intellectual", "ip", "patent", "copyright",
+        "ownership", "license"
+    ],
+    "representations": [
+        "representation", "warranty", "guarantee", "assure", "certify"
+    ],
+    "force majeure": [
+        "force majeure", "act of god", "disaster", "pandemic",
+        "unforeseeable"
+    ],
+    "audit": [
+        "audit", "inspection", "verify", "examination", "records"
+    ],
+    "compliance": [
+        "compliance", "regulation", "policy", "standards"
+    ],
+    "insurance": [
+        "insurance", "coverage", "insured", "policy"
+    ],
+    "assignment": [
+        "assign", "transfer", "delegate", "successor"
+    ],
+    "dispute resolution": [
+        "dispute", "arbitration", "litigation", "mediation",
+        "settlement"
+    ],
+    "miscellaneous": []
+}
+
+
+def keyword_fingerprint(keywords: Dict[str, List[str]] = CATEGORY_KEYWORDS) -> str:
+    return hashlib.sha256(json.dumps(keywords, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+
+# =========================
+# Aho-Corasick Matcher
+# =========================
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+class KeywordMatcher:
+    """
+    Every keyword of every label found in one left-to-right pass over the text
+    (Aho-Corasick automaton), instead of one regex search per keyword. Matches are
+    case-insensitive and respect word boundaries like `\\bkeyword\\b`.
+    """
+
+    def __init__(self, keywords: Dict[str, List[str]]):
+        self.labels = list(keywords)
+        owners: Dict[str, List[int]] = {}
+        for label_idx, words in enumerate(keywords.values()):
+            for word in words:
+                owners.setdefault(word.lower(), []).append(label_idx)
+        self.patterns = list(owners)
+        self.pattern_labels = [owners[p] for p in self.patterns]
+
+        # trie: per-node transitions, failure link and the patterns ending there
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+        for pattern_idx, pattern in enumerate(self.patterns):
+            node = 0
+            for char in pattern:
+                nxt = self._goto[node].get(char)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][char] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = nxt
+            self._out[node].append(pattern_idx)
+
+        # breadth-first: a node's failure link is the longest proper suffix in the trie
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, nxt in self._goto[node].items():
+                queue.append(nxt)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(char, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find(self, text: str) -> Iterator[Tuple[int, int, int]]:
+        """
+        (start, end, pattern index) of every whole-word keyword occurrence.
+        """
+        text = text.lower()
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for i, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for pattern_idx in out[node]:
+                start = i + 1 - len(self.patterns[pattern_idx])
+                if (start == 0 or not _is_word_char(text[start - 1])) and \
+                        (i + 1 == len(text) or not _is_word_char(text[i + 1])):
+                    yield start, i + 1, pattern_idx
+
+    def match(self, text: str) -> Dict[str, Set[str]]:
+        """
+        label -> distinct keywords of that label found in the text.
+        """
+        hits: Dict[str, Set[str]] = {}
+        for _, _, pattern_idx in self.find(text):
+            for label_idx in self.pattern_labels[pattern_idx]:
+                hits.setdefault(self.labels[label_idx], set()).add(self.patterns[pattern_idx])
+        return hits
+
+
+keyword_matcher = KeywordMatcher(CATEGORY_KEYWORDS)
@@ -1,47 +1,359 @@
-import fitz  # PyMuPDF
-from docx import Document
 from fastapi import UploadFile
+import hashlib
+import io
+import multiprocessing
 import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import BinaryIO, Iterable, Iterator, List, Optional, Union
+
+# PyMuPDF and python-docx are imported on first use; they are slow to import
+# and most workers never parse a file before they are needed.
+
+# =========================
+# Configuration
+# =========================
+
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(25 * 1024 * 1024)))
+UPLOAD_MEMORY_BYTES = int(os.getenv("UPLOAD_MEMORY_BYTES", str(2 * 1024 * 1024)))  # larger uploads go to disk
+UPLOAD_SPOOL_DIR = os.getenv("UPLOAD_SPOOL_DIR") or None                          # None = system temp dir
+UPLOAD_READ_CHUNK = 1024 * 1024
+
+# PDFs with at least this many pages are extracted on a process pool
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "40"))
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "16"))
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+DOCX_CHUNK_CHARS = 4000
+
+# Part of the upload cache key: bump when extraction output changes
+EXTRACTOR_VERSION = "ext2"
+
+
+class UploadTooLarge(Exception):
+    def __init__(self, limit: int):
+        super().__init__(f"Upload exceeds the {limit // (1024 * 1024)} MB limit")
+        self.limit = limit
+
+
+class ExtractionError(Exception):
+    """
+    Extraction failed after part of the document was read; the text is incomplete.
+    """
+
+
+# =========================
+# Upload Spooling
+# =========================
+
+class SpooledUpload:
+    """
+    An upload held in memory up to UPLOAD_MEMORY_BYTES, in a named temp file beyond
+    that, hashed while it is written. `path()` gives a real file for page workers.
+    """
+
+    def __init__(self, filename: str, memory_bytes: int = UPLOAD_MEMORY_BYTES):
+        self.filename = filename or ""
+        self.size = 0
+        self.memory_bytes = memory_bytes
+        self._digest = hashlib.sha256()
+        self._file: BinaryIO = io.BytesIO()
+        self._path: Optional[str] = None
+
+    def write(self, chunk: bytes):
+        if self._path is None and self.size + len(chunk) > self.memory_bytes:
+            self._spill()
+        self._file.write(chunk)
+        self._digest.update(chunk)
+        self.size += len(chunk)
+
+    @property
+    def sha256(self) -> str:
+        return self._digest.hexdigest()
+
+    @property
+    def on_disk(self) -> bool:
+        return self._path is not None
+
+    def read(self) -> bytes:
+        self._file.seek(0)
+        return self._file.read()
+
+    def open(self) -> BinaryIO:
+        """
+        The underlying file, rewound, for streaming copies.
+        """
+        self._file.flush()
+        self._file.seek(0)
+        return self._file
+
+    def path(self) -> str:
+        if self._path is None:
+            self._spill()
+        self._file.flush()
+        return self._path
+
+    def _spill(self):
+        suffix = os.path.splitext(self.filename)[1]
+        f = tempfile.NamedTemporaryFile(delete=False, dir=UPLOAD_SPOOL_DIR, suffix=suffix)
+        f.write(self._file.getvalue())
+        self._file = f
+        self._path = f.name
+
+    def close(self):
+        self._file.close()
+        if self._path:
+            try:
+                os.remove(self._path)
+            except OSError:
+                pass
+            self._path = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+async def spool_upload(file: UploadFile, max_bytes: int = UPLOAD_MAX_BYTES) -> SpooledUpload:
+    """
+    Copies an upload into a SpooledUpload, in chunks, giving up as soon as it passes max_bytes.
+    """
+    upload = SpooledUpload(file.filename)
+    try:
+        while True:
+            chunk = await file.read(UPLOAD_READ_CHUNK)
+            if not chunk:
+                break
+            if upload.size + len(chunk) > max_bytes:
+                raise UploadTooLarge(max_bytes)
+            upload.write(chunk)
+    except BaseException:
+        upload.close()
+        raise
+    return upload
+
 
 async def extract_text(file: UploadFile) -> str:
     """
     Extract text from PDF or DOCX files.
     """
+    with await spool_upload(file) as upload:
+        return extract_text_from_upload(upload)
 
-    # Read raw bytes
-    file_bytes = await file.read()
 
-    # Detect file extension
-    filename = file.filename.lower()
+# =========================
+# Page Extraction
+# =========================
 
-    # ----------- PDF -----------
-    if filename.endswith(".pdf"):
-        try:
-            doc = fitz.open(stream=file_bytes, filetype="pdf")
-            text = ""
+Source = Union[bytes, str, SpooledUpload]  # raw bytes, a file path, or a spooled upload
+
+
+def _pdf_page_range(path: str, start: int, stop: int) -> List[str]:
+    """
+    Process-pool task: text of pages [start, stop) of the PDF at `path`.
+    """
+    import fitz  # PyMuPDF
+
+    with fitz.open(path, filetype="pdf") as doc:
+        return [doc[idx].get_text() for idx in range(start, stop)]
+
+
+_pdf_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_pdf_pool() -> ProcessPoolExecutor:
+    global _pdf_pool
+    if _pdf_pool is None:
+        # spawn: children must not inherit the server's threads and loaded models
+        _pdf_pool = ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pdf_pool
+
+
+def shutdown_pdf_pool():
+    """
+    Stops the page workers. Processes that started the pool must call this before
+    exiting: multiprocessing joins their non-daemonic children at exit.
+    """
+    global _pdf_pool
+    if _pdf_pool is not None:
+        _pdf_pool.shutdown(wait=True, cancel_futures=True)
+        _pdf_pool = None
+
+
+def iter_pdf_pages(source: Source) -> Iterator[str]:
+    import fitz  # PyMuPDF
+
+    if isinstance(source, SpooledUpload) and source.on_disk:
+        source = source.path()  # opened from disk, and the same file goes to the pool
+    if isinstance(source, str):
+        doc = fitz.open(source, filetype="pdf")
+    else:
+        data = source.read() if isinstance(source, SpooledUpload) else source
+        doc = fitz.open(stream=data, filetype="pdf")
+
+    with doc:
+        page_count = doc.page_count
+        # daemonic processes may not have children, so they cannot use the pool
+        if page_count < PDF_PARALLEL_MIN_PAGES or PDF_WORKERS < 2 or multiprocessing.current_process().daemon:
             for page in doc:
-                text += page.get_text()
-            doc.close()
-            return text.strip()
-        except Exception as e:
-            print("PDF extraction error:", e)
-            return ""
-
-    # ----------- DOCX -----------
-    if filename.endswith(".docx"):
-        try:
-            temp_path = "temp_upload.docx"
-            with open(temp_path, "wb") as f:
-                f.write(file_bytes)
-
-            doc = Document(temp_path)
-            text = "\n".join([para.text for para in doc.paragraphs])
+                yield page.get_text()
+            return
+
+    # Large document: page ranges go to the pool, results come back in page order
+    # while later ranges are still being extracted
+    path = source if isinstance(source, str) else None
+    temp_path = None
+    if path is None:
+        if isinstance(source, SpooledUpload):
+            path = source.path()
+        else:
+            with tempfile.NamedTemporaryFile(delete=False, dir=UPLOAD_SPOOL_DIR, suffix=".pdf") as f:
+                f.write(source)
+                path = temp_path = f.name
 
+    pool = get_pdf_pool()
+    futures = [
+        pool.submit(_pdf_page_range, path, start, min(start + PDF_PAGES_PER_TASK, page_count))
+        for start in range(0, page_count, PDF_PAGES_PER_TASK)
+    ]
+    try:
+        for future in futures:
+            yield from future.result()
+    finally:
+        for future in futures:
+            future.cancel()
+        if temp_path:
             os.remove(temp_path)
-            return text.strip()
-        except Exception as e:
-            print("DOCX extraction error:", e)
-            return ""
 
-    # Unsupported format
-    return ""
+
+def _docx_table_rows(table) -> Iterator[str]:
+    for row in table.rows:
+        cells, seen = [], set()
+        for cell in row.cells:
+            # merged cells repeat the same underlying element
+            if id(cell._tc) in seen:
+                continue
+            seen.add(id(cell._tc))
+            text = " ".join(cell.text.split())
+            if text:
+                cells.append(text)
+        if cells:
+            yield " | ".join(cells)
+
+
+def _docx_blocks(container) -> Iterator[str]:
+    """
+    Paragraph and table text of a document body, header or footer, in document order.
+    """
+    from docx.oxml.ns import qn
+    from docx.table import Table
+    from docx.text.paragraph import Paragraph
+
+    if hasattr(container, "sections"):  # the Document itself
+        element, parent = container.element.body, container._body
+    else:                               # a header or footer
+        element, parent = container._element, container
+    for child in element.iterchildren():
+        if child.tag == qn("w:p"):
+            yield Paragraph(child, parent).text
+        elif child.tag == qn("w:tbl"):
+            yield from _docx_table_rows(Table(child, parent))
+
+
+def iter_docx_blocks(source: Source) -> Iterator[str]:
+    """
+    DOCX text parsed from memory: unique header text, body paragraphs and tables in
+    order, then unique footer text. Yielded in chunks of about DOCX_CHUNK_CHARS.
+    """
+    from docx import Document
+
+    if isinstance(source, SpooledUpload) and source.on_disk:
+        source = source.path()
+    if isinstance(source, str):
+        doc = Document(source)
+    else:
+        data = source.read() if isinstance(source, SpooledUpload) else source
+        doc = Document(io.BytesIO(data))
+
+    def header_footer(kind: str) -> List[str]:
+        lines, seen = [], set()
+        for section in doc.sections:
+            part = getattr(section, kind)
+            if part.is_linked_to_previous:
+                continue
+            for line in _docx_blocks(part):
+                if line.strip() and line not in seen:
+                    seen.add(line)
+                    lines.append(line)
+        return lines
+
+    def blocks() -> Iterator[str]:
+        yield from header_footer("header")
+        yield from _docx_blocks(doc)
+        yield from header_footer("footer")
+
+    buffer: List[str] = []
+    size = 0
+    for block in blocks():
+        buffer.append(block + "\n")
+        size += len(block) + 1
+        if size >= DOCX_CHUNK_CHARS:
+            yield "".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer)
+
+
+def _lstrip_document(pages: Iterable[str]) -> Iterator[str]:
+    # leading whitespace is dropped so offsets match the stripped text
+    started = False
+    for page in pages:
+        if not started:
+            page = page.lstrip()
+            if not page:
+                continue
+            started = True
+        yield page
+
+
+def iter_document_pages(source: Source, filename: str) -> Iterator[str]:
+    """
+    Text of a PDF (one chunk per page) or DOCX (chunks of blocks) as it is extracted.
+    "".join of the chunks, right-stripped, is extract_text_from_bytes' result.
+    Yields nothing for unsupported or unreadable files; raises ExtractionError when
+    the document breaks off after some text was yielded.
+    """
+    filename = (filename or "").lower()
+    if filename.endswith(".pdf"):
+        kind, pages = "PDF", iter_pdf_pages(source)
+    elif filename.endswith(".docx"):
+        kind, pages = "DOCX", iter_docx_blocks(source)
+    else:
+        return
+
+    started = False
+    try:
+        for page in _lstrip_document(pages):
+            started = True
+            yield page
+    except Exception as e:
+        print(f"{kind} extraction error:", e)
+        if started:
+            raise ExtractionError(f"{kind} extraction failed partway through the document: {e}") from e
+
+
+def extract_text_from_bytes(file_bytes: bytes, filename: str) -> str:
+    """
+    Extract text from already-read PDF or DOCX bytes.
+    """
+    return "".join(iter_document_pages(file_bytes, filename)).rstrip()
+
+
+def extract_text_from_path(path: str, filename: str) -> str:
+    return "".join(iter_document_pages(path, filename)).rstrip()
+
+
+def extract_text_from_upload(upload: SpooledUpload) -> str:
+    return "".join(iter_document_pages(upload, upload.filename)).rstrip()
@@ -0,0 +1,50 @@
+# backend/services/precedent_service.py
+
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from services.clause_service import ENCODER_ID, get_request_encoder
+from services.embedding_cache import embedding_cache
+from services.reference_store import (
+    IVF_NPROBE,
+    PRECEDENTS_MAX_K,
+    PRECEDENTS_TOP_K,
+    REFERENCE_STORE_DIR,
+    ReferenceStore,
+    open_reference_store,
+)
+from services.registry import registry
+
+# Optional: without a built store the API runs, /contracts/precedents answers 503
+registry.register(
+    "reference_store",
+    lambda: open_reference_store(REFERENCE_STORE_DIR, ENCODER_ID),
+    required=False,
+)
+
+
+def get_reference_store() -> Optional[ReferenceStore]:
+    return registry.get("reference_store")
+
+
+def find_precedents(clauses: List[str], k: int = PRECEDENTS_TOP_K, nprobe: int = IVF_NPROBE,
+                    clause_embeddings: Optional[np.ndarray] = None) -> List[List[Dict]]:
+    """
+    The k most similar reference clauses (text, category, risk level, CUAD label,
+    score) for each clause. Embeddings come from the embedding cache, so clauses of
+    a contract that was just evaluated are not encoded again.
+    """
+    store = get_reference_store()
+    if store is None or not clauses:
+        return [[] for _ in clauses]
+
+    k = max(1, min(k, PRECEDENTS_MAX_K))
+    if clause_embeddings is None:
+        clause_embeddings = embedding_cache.encode(get_request_encoder(), clauses, model_name=ENCODER_ID)
+    scores, rows = store.search(clause_embeddings, k=k, nprobe=nprobe)
+
+    return [
+        [store.record(row, score) for row, score in zip(row_ids.tolist(), row_scores.tolist()) if row >= 0]
+        for row_ids, row_scores in zip(rows, scores)
+    ]
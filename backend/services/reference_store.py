@@ -0,0 +1,366 @@
+# backend/services/reference_store.py
+
+import hashlib
+import json
+import os
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from services.artifact_store import (
+    ARTIFACTS_DIR,
+    artifact_manifest,
+    build_directory,
+    publish_directory,
+    verify_artifact,
+    write_manifest,
+)
+
+
+# =========================
+# Configuration
+# =========================
+
+REFERENCE_STORE_DIR = os.getenv("REFERENCE_STORE_DIR", os.path.join(ARTIFACTS_DIR, "reference_store"))
+PRECEDENTS_TOP_K = int(os.getenv("PRECEDENTS_TOP_K", "3"))
+PRECEDENTS_MAX_K = 50
+IVF_NPROBE = int(os.getenv("IVF_NPROBE", "8"))  # inverted lists scanned per query
+
+# Bump when the on-disk layout changes
+REFERENCE_FORMAT_VERSION = 2
+
+# Below this many vectors one list (exact search) is as fast as probing several
+IVF_MIN_ROWS = 20000
+KMEANS_ITERATIONS = 12
+KMEANS_SAMPLE_PER_LIST = 64  # training rows per inverted list
+SCAN_ROWS = 65536            # rows converted from float16 per block in exact search
+
+# Layout of a store directory (an artifact, see services/artifact_store.py; every
+# array is a plain .npy, memory-mapped on open):
+#   manifest.json     artifact fields, counts, label vocabularies, IVF parameters
+#   vectors.npy       (n, dim) float16, normalized, rows grouped by inverted list
+#   centroids.npy     (nlist, dim) float32 list centroids
+#   list_offsets.npy  (nlist + 1,) int64: list i is rows [offsets[i], offsets[i + 1])
+#   category.npy / risk.npy / label.npy   per-row codes into the manifest vocabularies
+#   texts.bin + text_offsets.npy          UTF-8 clause texts, row i = bytes [off[i], off[i + 1])
+
+
+def default_nlist(count: int) -> int:
+    return 1 if count < IVF_MIN_ROWS else int(4 * np.sqrt(count))
+
+
+# =========================
+# Index Construction
+# =========================
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+def assign_lists(vectors, centroids: np.ndarray, chunk: int = SCAN_ROWS) -> np.ndarray:
+    """
+    Nearest centroid (inner product) of every row, `chunk` rows at a time.
+    """
+    assignments = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), chunk):
+        block = np.asarray(vectors[start:start + chunk], dtype=np.float32)
+        assignments[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return assignments
+
+
+def train_centroids(vectors, nlist: int, iterations: int = KMEANS_ITERATIONS, seed: int = 0) -> np.ndarray:
+    """
+    Spherical k-means on a sample of at most KMEANS_SAMPLE_PER_LIST * nlist rows.
+    """
+    rng = np.random.default_rng(seed)
+    count = len(vectors)
+    sample_size = min(count, KMEANS_SAMPLE_PER_LIST * nlist)
+    rows = np.sort(rng.choice(count, size=sample_size, replace=False))
+    sample = _normalize(np.asarray(vectors[rows], dtype=np.float32))
+
+    centroids = sample[rng.choice(sample_size, size=nlist, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = assign_lists(sample, centroids)
+        counts = np.bincount(assignments, minlength=nlist)
+        order = np.argsort(assignments, kind="stable")
+        present = np.flatnonzero(counts)
+        sums = np.zeros_like(centroids)
+        sums[present] = np.add.reduceat(sample[order], np.cumsum(counts)[present] - counts[present], axis=0)
+        empty = counts == 0
+        if empty.any():
+            # restart empty lists on random sample rows
+            sums[empty] = sample[rng.choice(sample_size, size=int(empty.sum()), replace=False)]
+        centroids = _normalize(sums)
+    return centroids.astype(np.float32)
+
+
+def write_reference_store(
+    directory: str,
+    vectors,
+    encoder_id: str,
+    texts: Optional[Sequence[str]] = None,
+    categories: Optional[Sequence[str]] = None,
+    risk_levels: Optional[Sequence[str]] = None,
+    labels: Optional[Sequence[str]] = None,
+    nlist: Optional[int] = None,
+    source: str = "",
+    dataset_hash: Optional[str] = None,
+) -> Dict:
+    """
+    Builds the IVF index over `vectors` ((n, dim), array or memmap, normalized) and
+    writes a store to `directory`, replacing any previous one. Per-row texts and
+    labels are optional. Returns the manifest.
+    """
+    count, dim = vectors.shape
+    nlist = max(1, min(nlist or default_nlist(count), count))
+
+    started = time.perf_counter()
+    if nlist > 1:
+        centroids = train_centroids(vectors, nlist)
+        assignments = assign_lists(vectors, centroids)
+    else:
+        centroids = _normalize(np.asarray(vectors[:SCAN_ROWS], dtype=np.float32).mean(axis=0, keepdims=True))
+        assignments = np.zeros(count, dtype=np.int32)
+    order = np.argsort(assignments, kind="stable")
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(assignments, minlength=nlist))]).astype(np.int64)
+
+    tmp_dir = build_directory(directory)
+
+    # rows are written in list order, so a probe reads one contiguous slice
+    out = np.lib.format.open_memmap(os.path.join(tmp_dir, "vectors.npy"), mode="w+", dtype=np.float16, shape=(count, dim))
+    for start in range(0, count, SCAN_ROWS):
+        rows = order[start:start + SCAN_ROWS]
+        out[start:start + len(rows)] = np.asarray(vectors[rows], dtype=np.float32)
+    out.flush()
+    del out
+
+    np.save(os.path.join(tmp_dir, "centroids.npy"), centroids)
+    np.save(os.path.join(tmp_dir, "list_offsets.npy"), offsets)
+
+    def save_codes(name: str, values: Optional[Sequence[str]]) -> List[str]:
+        if values is None:
+            return []
+        vocabulary = sorted(set(values))
+        position = {value: idx for idx, value in enumerate(vocabulary)}
+        codes = np.fromiter((position[values[row]] for row in order), dtype=np.int16, count=count)
+        np.save(os.path.join(tmp_dir, f"{name}.npy"), codes)
+        return vocabulary
+
+    vocabularies = {
+        "categories": save_codes("category", categories),
+        "risk_levels": save_codes("risk", risk_levels),
+        "labels": save_codes("label", labels),
+    }
+
+    if texts is not None:
+        text_offsets = np.zeros(count + 1, dtype=np.int64)
+        with open(os.path.join(tmp_dir, "texts.bin"), "wb") as f:
+            for position, row in enumerate(order):
+                data = texts[row].encode("utf-8")
+                f.write(data)
+                text_offsets[position + 1] = text_offsets[position] + len(data)
+        np.save(os.path.join(tmp_dir, "text_offsets.npy"), text_offsets)
+
+    digest = hashlib.sha256()
+    digest.update(f"{encoder_id}|{count}|{dim}|{nlist}|{source}".encode("utf-8"))
+    digest.update(centroids.tobytes())
+    written = {
+        name[:-len(".npy")]: np.load(os.path.join(tmp_dir, name), mmap_mode="r")
+        for name in sorted(os.listdir(tmp_dir)) if name.endswith(".npy")
+    }
+    manifest = {
+        **artifact_manifest(
+            "reference_store", REFERENCE_FORMAT_VERSION, written,
+            encoder_id=encoder_id, dataset_hash=dataset_hash, dim=int(dim), dtype="float16",
+            build_seconds=time.perf_counter() - started,
+        ),
+        "version": digest.hexdigest()[:16],
+        "count": int(count),
+        "nlist": int(nlist),
+        "has_texts": texts is not None,
+        "source": source,
+        **vocabularies,
+    }
+    del written
+    write_manifest(tmp_dir, manifest)
+    publish_directory(tmp_dir, directory)
+    return manifest
+
+
+# =========================
+# Reference Store
+# =========================
+
+def _merge_top_k(best_scores, best_ids, rows, scores, ids, k):
+    """
+    Folds candidate (scores, ids) for queries `rows` into the running top-k.
+    """
+    merged_scores = np.concatenate([best_scores[rows], scores], axis=1)
+    merged_ids = np.concatenate([best_ids[rows], ids], axis=1)
+    keep = np.argpartition(-merged_scores, k - 1, axis=1)[:, :k]
+    best_scores[rows] = np.take_along_axis(merged_scores, keep, axis=1)
+    best_ids[rows] = np.take_along_axis(merged_ids, keep, axis=1)
+
+
+def _block_top_k(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    k = min(k, scores.shape[1])
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    return np.take_along_axis(scores, top, axis=1), top
+
+
+class ReferenceStore:
+    """
+    Read-only, memory-mapped reference clauses with an IVF (inverted file) index.
+    Vectors stay float16 on disk and are only paged in for the lists a query probes,
+    so memory and per-query work grow with nprobe * n / nlist rather than n.
+    """
+
+    def __init__(self, directory: str):
+        with open(os.path.join(directory, "manifest.json"), "r", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("format_version") != REFERENCE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported reference store format {self.manifest.get('format_version')}")
+
+        def load(name: str, mmap: bool = True):
+            path = os.path.join(directory, f"{name}.npy")
+            if not os.path.exists(path):
+                return None
+            return np.load(path, mmap_mode="r" if mmap else None)
+
+        self.directory = directory
+        self.vectors = load("vectors")
+        self.centroids = load("centroids", mmap=False)
+        self.offsets = load("list_offsets", mmap=False)
+        self.category = load("category")
+        self.risk = load("risk")
+        self.label = load("label")
+        self.text_offsets = load("text_offsets")
+        texts_path = os.path.join(directory, "texts.bin")
+        self.texts = (
+            np.memmap(texts_path, dtype=np.uint8, mode="r")
+            if os.path.exists(texts_path) and os.path.getsize(texts_path) else None
+        )
+
+    @property
+    def encoder_id(self) -> str:
+        return self.manifest["encoder_id"]
+
+    @property
+    def version(self) -> str:
+        return self.manifest["version"]
+
+    def __len__(self) -> int:
+        return self.manifest["count"]
+
+    def search(self, queries: np.ndarray, k: int = PRECEDENTS_TOP_K,
+               nprobe: int = IVF_NPROBE) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Approximate top-k by inner product for normalized (n, dim) queries.
+        Returns (scores, rows), both (n, k), best first; missing hits are row -1.
+        Queries probing the same list are scored against it in one product.
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        n, nlist = len(queries), len(self.centroids)
+        k = max(1, min(k, len(self)))
+        nprobe = max(1, min(nprobe, nlist))
+
+        if nprobe < nlist:
+            probes = np.argpartition(-(queries @ self.centroids.T), nprobe - 1, axis=1)[:, :nprobe]
+        else:
+            probes = np.broadcast_to(np.arange(nlist), (n, nlist))
+
+        flat = probes.ravel()
+        query_of = np.repeat(np.arange(n), probes.shape[1])
+        by_list = np.argsort(flat, kind="stable")
+        lists, starts = np.unique(flat[by_list], return_index=True)
+        groups = np.split(query_of[by_list], starts[1:])
+
+        best_scores = np.full((n, k), -np.inf, dtype=np.float32)
+        best_ids = np.full((n, k), -1, dtype=np.int64)
+        for list_id, rows in zip(lists.tolist(), groups):
+            start, end = int(self.offsets[list_id]), int(self.offsets[list_id + 1])
+            if start == end:
+                continue
+            block = np.asarray(self.vectors[start:end], dtype=np.float32)
+            scores, top = _block_top_k(queries[rows] @ block.T, k)
+            _merge_top_k(best_scores, best_ids, rows, scores, top + start, k)
+
+        return self._sorted(best_scores, best_ids)
+
+    def exact_search(self, queries: np.ndarray, k: int = PRECEDENTS_TOP_K) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Brute-force top-k over every row (the baseline search() is measured against).
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        n = len(queries)
+        k = max(1, min(k, len(self)))
+        rows = np.arange(n)
+
+        best_scores = np.full((n, k), -np.inf, dtype=np.float32)
+        best_ids = np.full((n, k), -1, dtype=np.int64)
+        for start in range(0, len(self), SCAN_ROWS):
+            block = np.asarray(self.vectors[start:start + SCAN_ROWS], dtype=np.float32)
+            scores, top = _block_top_k(queries @ block.T, k)
+            _merge_top_k(best_scores, best_ids, rows, scores, top + start, k)
+
+        return self._sorted(best_scores, best_ids)
+
+    @staticmethod
+    def _sorted(scores: np.ndarray, ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        order = np.argsort(-scores, axis=1, kind="stable")
+        return np.take_along_axis(scores, order, axis=1), np.take_along_axis(ids, order, axis=1)
+
+    def text(self, row: int) -> Optional[str]:
+        if self.texts is None:
+            return None
+        start, end = int(self.text_offsets[row]), int(self.text_offsets[row + 1])
+        return self.texts[start:end].tobytes().decode("utf-8")
+
+    def record(self, row: int, score: float) -> Dict:
+        def vocab(codes, name):
+            return self.manifest[name][int(codes[row])] if codes is not None else None
+
+        return {
+            "text": self.text(row),
+            "category": vocab(self.category, "categories"),
+            "risk_level": vocab(self.risk, "risk_levels"),
+            "label": vocab(self.label, "labels"),
+            "score": round(float(score), 3),
+        }
+
+    def stats(self) -> Dict:
+        return {
+            "version": self.version,
+            "encoder_id": self.encoder_id,
+            "count": len(self),
+            "dim": self.manifest["dim"],
+            "nlist": self.manifest["nlist"],
+            "nprobe": IVF_NPROBE,
+        }
+
+
+def open_reference_store(directory: str, encoder_id: str) -> Optional[ReferenceStore]:
+    """
+    Registry loader. None when no store was built; a store built with a different
+    encoder is refused, since its vectors are not comparable with query embeddings.
+    """
+    if verify_reference_store(encoder_id, directory) is None:
+        print(f"ℹ️ No reference store in {directory} — precedent retrieval disabled "
+              f"(build one with utils/build_reference_store.py)")
+        return None
+    store = ReferenceStore(directory)
+    print(f"✅ Reference store: {len(store)} clauses, {store.manifest['nlist']} lists ({store.version})")
+    return store
+
+
+def verify_reference_store(encoder_id: str, directory: str = REFERENCE_STORE_DIR) -> Optional[Dict]:
+    """
+    Manifest of the store after checking its encoder and format (ArtifactMismatch
+    otherwise); None when no store was built.
+    """
+    return verify_artifact(
+        directory, "reference_store", REFERENCE_FORMAT_VERSION,
+        encoder_id=encoder_id, rebuild_hint="utils/build_reference_store.py",
+    )
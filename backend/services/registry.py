@@ -0,0 +1,154 @@
+# backend/services/registry.py
+
+import os
+import threading
+import time
+import traceback
+from typing import Any, Callable, Dict, List, Optional
+
+
+# =========================
+# Resource Registry
+# =========================
+
+STATE_NOT_LOADED = "not_loaded"
+STATE_LOADING = "loading"
+STATE_READY = "ready"
+STATE_FAILED = "failed"
+
+# a failed resource stays failed on the request path; warmup and /health/ready
+# retry it after this cooldown, doubled per failure up to the max
+RESOURCE_RETRY_SECONDS = float(os.getenv("RESOURCE_RETRY_SECONDS", "30"))
+RESOURCE_RETRY_MAX_SECONDS = float(os.getenv("RESOURCE_RETRY_MAX_SECONDS", "900"))
+
+
+class Resource:
+    def __init__(self, name: str, loader: Callable[[], Any],
+                 warmup: Optional[Callable[[Any], None]], required: bool):
+        self.name = name
+        self.loader = loader
+        self.warmup = warmup
+        self.required = required
+        self.value = None
+        self.state = STATE_NOT_LOADED
+        self.error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self.failures = 0
+        self.retry_at = 0.0
+        self.lock = threading.Lock()
+
+    def retry_due(self) -> bool:
+        return self.state == STATE_FAILED and time.monotonic() >= self.retry_at
+
+
+class ResourceRegistry:
+    """
+    Heavy process-wide resources (models, indexes, clients) registered by the modules
+    that own them and loaded on first use, or ahead of time by the background warmup.
+    Registering is cheap, so importing a service no longer loads anything.
+    """
+
+    def __init__(self):
+        self._resources: Dict[str, Resource] = {}
+        self._warmup_thread: Optional[threading.Thread] = None
+
+    def register(self, name: str, loader: Callable[[], Any],
+                 warmup: Optional[Callable[[Any], None]] = None, required: bool = True):
+        """
+        `required` resources must be loaded before the service reports ready.
+        """
+        if name not in self._resources:
+            self._resources[name] = Resource(name, loader, warmup, required)
+
+    def get(self, name: str) -> Any:
+        """
+        Loads the resource on first use. A failed one is not reloaded here (see retry).
+        """
+        resource = self._resources[name]
+        if resource.state == STATE_READY:
+            return resource.value
+
+        with resource.lock:
+            if resource.state == STATE_NOT_LOADED:
+                self._load(resource)
+        if resource.state != STATE_READY:
+            raise RuntimeError(f"{name} failed to load: {resource.error}")
+        return resource.value
+
+    def _load(self, resource: Resource):
+        resource.state = STATE_LOADING
+        start = time.perf_counter()
+        try:
+            value = resource.loader()
+            if resource.warmup is not None:
+                resource.warmup(value)
+            resource.value = value
+            resource.error = None
+            resource.failures = 0
+            resource.state = STATE_READY
+        except Exception as e:
+            traceback.print_exc()
+            resource.error = str(e)
+            resource.failures += 1
+            cooldown = min(RESOURCE_RETRY_SECONDS * 2 ** (resource.failures - 1), RESOURCE_RETRY_MAX_SECONDS)
+            resource.retry_at = time.monotonic() + cooldown
+            resource.state = STATE_FAILED
+        resource.load_seconds = round(time.perf_counter() - start, 3)
+        icon = "✅" if resource.state == STATE_READY else "❌"
+        print(f"{icon} {resource.name} {resource.state} in {resource.load_seconds}s")
+
+    def retry(self, name: str) -> bool:
+        """
+        Reloads a failed resource once its cooldown is over. True when it is ready.
+        """
+        resource = self._resources[name]
+        with resource.lock:
+            if resource.retry_due():
+                print(f"🔁 Retrying {name} (failed {resource.failures}x)")
+                self._load(resource)
+        return resource.state == STATE_READY
+
+    def warmup_in_background(self, names: Optional[List[str]] = None) -> threading.Thread:
+        """
+        Loads (and warms) resources in registration order on a daemon thread.
+        Called again, it retries the failed ones that are due (one thread at a time).
+        """
+        if self._warmup_thread is not None and self._warmup_thread.is_alive():
+            return self._warmup_thread
+
+        names = names or list(self._resources)
+
+        def run():
+            for name in names:
+                try:
+                    if self._resources[name].state == STATE_FAILED:
+                        self.retry(name)
+                    else:
+                        self.get(name)
+                except Exception:
+                    pass  # already recorded on the resource
+
+        self._warmup_thread = threading.Thread(target=run, name="resource-warmup", daemon=True)
+        self._warmup_thread.start()
+        return self._warmup_thread
+
+    def retry_pending(self) -> bool:
+        return any(r.retry_due() for r in self._resources.values())
+
+    def ready(self) -> bool:
+        return all(r.state == STATE_READY for r in self._resources.values() if r.required)
+
+    def status(self) -> Dict[str, Dict]:
+        return {
+            r.name: {
+                "state": r.state,
+                "required": r.required,
+                "load_seconds": r.load_seconds,
+                "error": r.error,
+                "failures": r.failures,
+            }
+            for r in self._resources.values()
+        }
+
+
+registry = ResourceRegistry()
@@ -0,0 +1,157 @@
+# backend/services/result_cache.py
+
+import copy
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional, Union
+
+
+# =========================
+# Configuration
+# =========================
+
+RESULT_CACHE_ITEMS = int(os.getenv("RESULT_CACHE_ITEMS", "256"))
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", str(24 * 3600)))  # seconds, <= 0 never expires
+
+
+def content_key(kind: str, content: Union[bytes, str], version: str) -> str:
+    """
+    SHA-256 address of an input (file bytes or extracted text) under a pipeline version.
+    """
+    digest = hashlib.sha256()
+    digest.update(kind.encode("utf-8") + b"\x1f" + version.encode("utf-8") + b"\x1f")
+    digest.update(content if isinstance(content, bytes) else content.encode("utf-8"))
+    return digest.hexdigest()
+
+
+# =========================
+# Single-Flight
+# =========================
+
+class SingleFlight:
+    """
+    Collapses concurrent calls with the same key into one execution;
+    every caller receives the leader's result (or exception).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+
+    def do(self, key: str, fn: Callable[[], Any]):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+# =========================
+# Result Cache
+# =========================
+
+class ResultCache:
+    """
+    Bounded LRU of whole evaluation results with TTL, fronted by single-flight so
+    each unique input is evaluated at most once at a time.
+    Callers get deep copies, so route handlers may enrich results freely.
+    """
+
+    def __init__(self, max_items: int, ttl: float):
+        self.max_items = max_items
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+
+        self.counters = {
+            "hits": 0,
+            "misses": 0,
+            "shared": 0,
+            "computed": 0,
+        }
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, created_at = entry
+            if self.ttl > 0 and time.time() - created_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return copy.deepcopy(value)
+
+    def set(self, key: str, value: Any):
+        with self._lock:
+            self._entries[key] = (copy.deepcopy(value), time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_items:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any],
+                       cacheable: Callable[[Any], bool] = lambda value: value is not None):
+        """
+        Returns the cached value for `key`, or runs `compute` once for all concurrent
+        callers of the same key. Values failing `cacheable` are returned but not stored.
+        """
+        cached = self.get(key)
+        if cached is not None:
+            with self._lock:
+                self.counters["hits"] += 1
+            return cached
+
+        ran = []
+
+        def run():
+            # A caller that just missed may find the leader's stored value
+            value = self.get(key)
+            if value is not None:
+                return value
+            ran.append(True)
+            value = compute()
+            if cacheable(value):
+                self.set(key, value)
+            return value
+
+        value = self._flight.do(key, run)
+
+        with self._lock:
+            self.counters["misses"] += 1
+            self.counters["computed" if ran else "shared"] += 1
+        return copy.deepcopy(value)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                **self.counters,
+                "items": len(self._entries),
+                "in_flight": self._flight.in_flight(),
+            }
+
+
+result_cache = ResultCache(max_items=RESULT_CACHE_ITEMS, ttl=RESULT_CACHE_TTL)
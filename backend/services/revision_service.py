@@ -0,0 +1,311 @@
+# backend/services/revision_service.py
+
+import hashlib
+import os
+from difflib import SequenceMatcher
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from services.clause_service import (
+    RISK_LEVELS,
+    RISK_POSITION,
+    RISK_WEIGHTS,
+    cascade_classify,
+    evaluation_version,
+    is_complete_result,
+    iter_suggestion_events,
+    normalize_risk,
+    reuse_cached_suggestions,
+    summarize_details,
+)
+from services.result_cache import content_key, result_cache
+from services.segmenter import segment_text
+from services.suggestion_service import STATUS_PENDING
+
+# =========================
+# Configuration
+# =========================
+
+# Word-level similarity at which an edited clause counts as "modified" rather
+# than one clause removed and another added
+REVISION_MIN_SIMILARITY = float(os.getenv("REVISION_MIN_SIMILARITY", "0.5"))
+
+UNCHANGED = "unchanged"
+MOVED = "moved"          # same text, different position
+MODIFIED = "modified"
+ADDED = "added"
+REMOVED = "removed"
+
+
+# =========================
+# Clause Alignment
+# =========================
+
+def clause_fingerprint(text: str) -> str:
+    """
+    Hash of a clause's words, ignoring case and whitespace / line-break changes.
+    """
+    normalized = " ".join(text.lower().split())
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=12).hexdigest()
+
+
+def clause_similarity(a: str, b: str) -> float:
+    a_words, b_words = a.lower().split(), b.lower().split()
+    matcher = SequenceMatcher(None, a_words, b_words, autojunk=False)
+    # quick_ratio is a cheap upper bound: skip the full diff when it cannot match
+    if matcher.quick_ratio() < REVISION_MIN_SIMILARITY:
+        return 0.0
+    return matcher.ratio()
+
+
+def _pair_block(old: List[str], new: List[str], old_idx: List[int], new_idx: List[int]) -> List[Tuple]:
+    """
+    Greedy best-first pairing of the clauses of one replaced region.
+    """
+    candidates = []
+    for i in old_idx:
+        for j in new_idx:
+            score = clause_similarity(old[i], new[j])
+            if score >= REVISION_MIN_SIMILARITY:
+                candidates.append((score, i, j))
+    candidates.sort(key=lambda c: (-c[0], c[2], c[1]))
+
+    paired_old, paired_new, pairs = set(), set(), []
+    for score, i, j in candidates:
+        if i in paired_old or j in paired_new:
+            continue
+        paired_old.add(i)
+        paired_new.add(j)
+        pairs.append((MODIFIED, i, j, round(score, 3)))
+
+    pairs += [(ADDED, None, j, 0.0) for j in new_idx if j not in paired_new]
+    pairs += [(REMOVED, i, None, 0.0) for i in old_idx if i not in paired_old]
+    return pairs
+
+
+def align_clauses(old: List[str], new: List[str]) -> List[Tuple[str, Optional[int], Optional[int], float]]:
+    """
+    Aligns the clauses of two versions of a contract. Returns
+    (status, old_index, new_index, similarity) in document order.
+
+    Clauses are matched by fingerprint as sequences (difflib), so the work outside
+    the edited regions is linear. Text that only moved is matched by fingerprint
+    across the whole document; edited clauses are paired by word similarity, but
+    only within the region they were replaced in.
+    """
+    old_fp = [clause_fingerprint(c) for c in old]
+    new_fp = [clause_fingerprint(c) for c in new]
+
+    blocks = []  # ("equal", [pairs]) or ("changed", old_idx, new_idx)
+    for tag, i1, i2, j1, j2 in SequenceMatcher(None, old_fp, new_fp, autojunk=False).get_opcodes():
+        if tag == "equal":
+            blocks.append(("equal", [(UNCHANGED, i1 + k, j1 + k, 1.0) for k in range(i2 - i1)]))
+        else:
+            blocks.append(("changed", list(range(i1, i2)), list(range(j1, j2))))
+
+    # moved clauses: identical text removed in one region and inserted in another
+    unmatched_old: Dict[str, List[int]] = {}
+    for block in blocks:
+        if block[0] == "changed":
+            for i in block[1]:
+                unmatched_old.setdefault(old_fp[i], []).append(i)
+    moved = {}
+    for block in blocks:
+        if block[0] == "changed":
+            for j in block[2]:
+                candidates = unmatched_old.get(new_fp[j])
+                if candidates:
+                    moved[j] = candidates.pop(0)
+    moved_old = set(moved.values())
+
+    alignment = []
+    for block in blocks:
+        if block[0] == "equal":
+            alignment.extend(block[1])
+            continue
+        old_idx = [i for i in block[1] if i not in moved_old]
+        new_idx = [j for j in block[2] if j not in moved]
+        pairs = _pair_block(old, new, old_idx, new_idx)
+        pairs += [(MOVED, moved[j], j, 1.0) for j in block[2] if j in moved]
+        # new clauses in order, then what was removed from the region
+        pairs.sort(key=lambda p: (p[2] is None, p[2] if p[2] is not None else p[1]))
+        alignment.extend(pairs)
+    return alignment
+
+
+# =========================
+# Incremental Re-evaluation
+# =========================
+
+def _risk_weight(risk_level: Optional[str]) -> Optional[int]:
+    if not risk_level:
+        return None
+    return int(RISK_WEIGHTS[RISK_POSITION[normalize_risk(risk_level)]])
+
+
+def diff_entry(status: str, old_idx, new_idx, similarity: float, old: Optional[Dict], new: Optional[Dict]) -> Dict:
+    entry = {
+        "status": status,
+        "index": new_idx,
+        "previous_index": old_idx,
+        "similarity": similarity,
+        "category": new["matched_category"] if new else None,
+        "previous_category": old["matched_category"] if old else None,
+        "risk_level": new["risk_level"] if new else None,
+        "previous_risk_level": old["risk_level"] if old else None,
+    }
+    # positive = riskier; an added clause counts from 0, a removed one down to 0
+    new_weight = _risk_weight(entry["risk_level"]) or 0
+    old_weight = _risk_weight(entry["previous_risk_level"]) or 0
+    entry["risk_delta"] = new_weight - old_weight
+    if status == REMOVED:
+        entry["sentence"] = old["sentence"]
+    return entry
+
+
+def compare_evaluations(
+    previous: Dict,
+    details: List[Dict],
+    summary: Dict,
+    reevaluated: int,
+    mode: str,
+    alignment: Optional[List[Tuple]] = None,
+) -> Dict:
+    """
+    The "revision" block: clause diff and risk deltas between `previous` and the
+    evaluation given by `details` / `summary`.
+    """
+    previous_details = previous.get("details") or []
+    if alignment is None:
+        alignment = align_clauses([d["sentence"] for d in previous_details], [d["sentence"] for d in details])
+
+    diff = []
+    for status, old_idx, new_idx, similarity in alignment:
+        old = previous_details[old_idx] if old_idx is not None else None
+        new = details[new_idx] if new_idx is not None else None
+        diff.append(diff_entry(status, old_idx, new_idx, similarity, old, new))
+
+    counts = {status: 0 for status in (UNCHANGED, MOVED, MODIFIED, ADDED, REMOVED)}
+    for entry in diff:
+        counts[entry["status"]] += 1
+
+    previous_counts = previous.get("risk_counts") or {}
+    risk_counts = summary.get("risk_counts") or {}
+    before = previous.get("average_risk_score")
+    after = summary.get("average_risk_score")
+    return {
+        "previous_evaluation_id": previous.get("evaluation_id"),
+        "mode": mode,
+        "clauses_reevaluated": reevaluated,
+        "counts": counts,
+        "overall_risk": {"previous": previous.get("overall_risk"), "current": summary.get("overall_risk")},
+        "average_risk_score": {
+            "previous": before,
+            "current": after,
+            "delta": round(after - before, 2) if before is not None and after is not None else None,
+        },
+        "risk_counts_delta": {
+            risk: risk_counts.get(risk, 0) - previous_counts.get(risk, 0) for risk in RISK_LEVELS
+        },
+        # only what changed; unchanged clauses are implied by the counts
+        "diff": [entry for entry in diff if entry["status"] != UNCHANGED],
+    }
+
+
+def iter_revise_contract(
+    contract_text: str,
+    previous: Dict,
+    suggestion_budget: Optional[float] = None,
+) -> Iterator[Dict]:
+    """
+    iter_evaluate_contract for a revision of a stored evaluation (`previous`, as
+    returned by load_evaluation). Unchanged and moved clauses keep their previous
+    classification and suggestion; only added and modified clauses are encoded,
+    classified and sent to the LLM. Falls back to re-evaluating every clause
+    ("mode": "full") when `previous` came from a different evaluation_version.
+    The summary event carries a "revision" block with the clause diff and risk deltas.
+    """
+    segments = segment_text(contract_text)
+    previous_details = previous.get("details") or []
+    alignment = align_clauses([d["sentence"] for d in previous_details], [s.text for s in segments])
+
+    incremental = previous.get("evaluation_version") == evaluation_version()
+    mode = "incremental" if incremental else "full"
+
+    yield {"event": "start", "clause_count": len(segments)}
+
+    details: List[Optional[Dict]] = [None] * len(segments)
+    source = {}  # new index -> (status, old index, similarity)
+    for status, old_idx, new_idx, similarity in alignment:
+        if new_idx is None:
+            continue
+        source[new_idx] = (status, old_idx, similarity)
+        if incremental and status in (UNCHANGED, MOVED):
+            detail = dict(previous_details[old_idx])
+            detail["sentence"] = segments[new_idx].text
+            details[new_idx] = detail
+
+    # Everything not carried over goes through the normal pipeline in one batch
+    changed = [idx for idx, detail in enumerate(details) if detail is None]
+    embeddings = {}
+    if changed:
+        texts = [segments[idx].text for idx in changed]
+        changed_details, changed_embeddings = cascade_classify(texts)
+        reuse_cached_suggestions(
+            changed_details,
+            changed_embeddings,
+            [offset for offset, d in enumerate(changed_details) if d["suggestion_status"] == STATUS_PENDING],
+        )
+        for offset, idx in enumerate(changed):
+            details[idx] = changed_details[offset]
+            if offset in changed_embeddings:
+                embeddings[idx] = changed_embeddings[offset]
+
+    for idx, (detail, segment) in enumerate(zip(details, segments)):
+        detail["char_start"] = segment.start
+        detail["char_end"] = segment.end
+        detail["section_path"] = list(segment.section)
+        yield {"event": "clause", "index": idx, "detail": detail}
+
+    # carried-over clauses still pending (the previous run's budget ran out) are finished too
+    todo = [idx for idx, d in enumerate(details) if d["suggestion_status"] == STATUS_PENDING]
+    if todo:
+        yield from iter_suggestion_events(details, todo, embeddings, suggestion_budget)
+
+    summary = summarize_details(details)
+    summary["revision"] = compare_evaluations(previous, details, summary, len(changed), mode, alignment)
+    yield {"event": "summary", "summary": summary}
+
+
+def revise_contract(contract_text: str, previous: Dict, suggestion_budget: Optional[float] = None) -> Dict:
+    """
+    evaluate_contract against a previous evaluation (see iter_revise_contract).
+    """
+    details = []
+    summary = {}
+    for event in iter_revise_contract(contract_text, previous, suggestion_budget):
+        if event["event"] == "clause":
+            details.append(event["detail"])
+        elif event["event"] == "summary":
+            summary = event["summary"]
+
+    return {"details": details, **summary}
+
+
+def revise_contract_cached(contract_text: str, previous: Dict) -> Dict:
+    """
+    revise_contract behind the result cache: a text that was already evaluated only
+    needs the diff ("mode": "cached"). The result is cached without its revision
+    block, so plain evaluations of the same text hit it too.
+    """
+    key = content_key("text", contract_text, evaluation_version())
+    cached = result_cache.get(key)
+    if cached:
+        result = dict(cached)
+        result["revision"] = compare_evaluations(previous, cached["details"], cached, 0, "cached")
+        return result
+
+    result = revise_contract(contract_text, previous)
+    plain = {k: v for k, v in result.items() if k != "revision"}
+    if is_complete_result(plain):
+        result_cache.set(key, plain)
+    return result
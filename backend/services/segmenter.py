@@ -0,0 +1,352 @@
+# backend/services/segmenter.py
+
+import os
+import re
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+
+# =========================
+# Configuration
+# =========================
+
+MIN_CLAUSE_CHARS = int(os.getenv("MIN_CLAUSE_CHARS", "25"))      # shorter fragments are dropped
+MIN_CLAUSE_WORDS = int(os.getenv("MIN_CLAUSE_WORDS", "4"))
+MAX_CLAUSE_CHARS = int(os.getenv("MAX_CLAUSE_CHARS", "2000"))    # longer runs are split at a space
+MAX_HEADING_CHARS = 100
+
+# Part of the evaluation version: bump when segmentation output changes
+SEGMENTER_VERSION = "seg1"
+MAX_HEADING_WORDS = 12
+
+# Tokens before a "." that do not end a sentence (lowercased, inner dots kept)
+ABBREVIATIONS = frozenset("""
+    inc corp co ltd llc l.l.c l.p lp n.a p.c p.a s.a b.v n.v plc
+    no nos sec secs art arts para paras cl cls sch exh ex pt pts subsec
+    e.g i.e viz cf vs v approx min max dept govt intl int'l mfg assn bros
+    mr mrs ms dr jr sr st prof hon esq
+    u.s u.s.a u.k e.u u.s.c c.f.r stat ann cal del civ proc rev reg regs
+    jan feb mar apr jun jul aug sep sept oct nov dec
+    vol ch p pp fig figs
+""".split())
+
+CANDIDATE_RE = re.compile(r"[\n.!?;]")
+TOKEN_BEFORE_RE = re.compile(r"([A-Za-z][A-Za-z.']*)$")
+CLOSERS = "\"')]”’"
+SENTENCE_OPENERS = "(\"'[“‘§"
+
+# "12.", "12.3", "12.3.1.", "Section 12", "ARTICLE IV" at the start of a line
+SECTION_RE = re.compile(
+    r"[ \t]*(?:(?P<kind>section|article)[ \t]+(?P<named>[IVXLC]+|\d{1,3}(?:\.\d{1,3})*)\.?"
+    r"|(?P<num>\d{1,3}(?:\.\d{1,3})+\.?|\d{1,3}\.(?!\d)))(?:[ \t]+|[ \t]*(?=\n)|$)",
+    re.IGNORECASE,
+)
+# "(a)", "(iv)", "(12)", "a)", "iv." style list items
+LIST_RE = re.compile(r"[ \t]*(?P<item>\((?:[a-z]{1,2}|[ivxlc]{1,6}|\d{1,2})\)|(?:[a-z]|[ivxlc]{1,6})\))[ \t]+", re.IGNORECASE)
+
+LEVEL_ARTICLE = 0
+LEVEL_LIST = 10
+
+
+class Segment(NamedTuple):
+    """
+    One clause: normalized text plus its [start, end) character span in the input
+    and the section path it sits under, e.g. ("12 INDEMNIFICATION", "12.3", "(a)").
+    """
+    text: str
+    start: int
+    end: int
+    section: Tuple[str, ...]
+
+
+def _is_heading_text(line: str) -> bool:
+    line = line.strip()
+    if not line or len(line) > MAX_HEADING_CHARS or line[-1] in ".;,:":
+        return False
+    if len(line.split()) > MAX_HEADING_WORDS:
+        return False
+    return any(c.isalpha() for c in line)
+
+
+def _is_caps(line: str) -> bool:
+    letters = [c for c in line if c.isalpha()]
+    return len(letters) >= 3 and not any(c.islower() for c in letters)
+
+
+# =========================
+# Streaming Segmenter
+# =========================
+
+class StreamingSegmenter:
+    """
+    Single pass over the input, fed in chunks (pages, reads from a stream, or one string).
+    Candidate boundaries are found with one regex scan; only the text after the last
+    emitted clause is buffered, so time and memory stay linear in the input size.
+
+    Boundaries: sentence ends (abbreviations, initials and decimals excluded), blank lines,
+    numbered sections, list items and headings. Headings and section markers are not
+    emitted as clauses; they become the section path of the clauses under them.
+    """
+
+    def __init__(self):
+        self._buf = ""
+        self._base = 0           # absolute offset of _buf[0]
+        self._seg = 0            # start of the pending clause in _buf
+        self._pos = 0            # scan position in _buf
+        self._line_checked = -1  # line start (in _buf) already classified
+        self._sections: List[Tuple[int, str]] = []
+        self._heading_end = -1   # absolute end of the last heading line
+        self._started = False
+
+    # ---------- Public API ----------
+
+    def feed(self, chunk: str) -> Iterator[Segment]:
+        if not chunk:
+            return
+        self._buf += chunk
+        yield from self._scan(final=False)
+        self._compact()
+
+    def close(self) -> Iterator[Segment]:
+        yield from self._scan(final=True)
+        yield from self._emit(len(self._buf), len(self._buf))
+        self._buf, self._base, self._seg, self._pos = "", self._base + len(self._buf), 0, 0
+
+    # ---------- Scanning ----------
+
+    def _scan(self, final: bool) -> Iterator[Segment]:
+        buf = self._buf
+        if not self._started:
+            # the document start is a line start
+            step = self._line_start(0, final)
+            if step is None:
+                return
+            self._started = True
+            yield from step
+
+        while True:
+            match = CANDIDATE_RE.search(buf, self._pos)
+            if match is None:
+                self._pos = len(buf)
+                break
+            idx = match.start()
+            char = buf[idx]
+
+            if char == "\n":
+                step = self._line_start(idx + 1, final, newline=idx)
+            elif char == ";":
+                step = self._semicolon(idx, final)
+            else:
+                step = self._sentence_end(idx, final)
+
+            if step is None:
+                # not enough lookahead yet; resume here on the next chunk
+                self._pos = idx
+                break
+            yield from step
+
+        yield from self._split_long()
+
+    def _sentence_end(self, idx: int, final: bool) -> Optional[List[Segment]]:
+        buf = self._buf
+        end = idx + 1
+        while end < len(buf) and buf[end] in CLOSERS:
+            end += 1
+        nxt = end
+        while nxt < len(buf) and buf[nxt] in " \t\r\n":
+            nxt += 1
+        if nxt >= len(buf) and not final:
+            return None
+
+        self._pos = idx + 1
+        if end < len(buf) and nxt == end:
+            return []  # no space after it: "U.S.", "12.3", "www.x.com"
+        if nxt < len(buf) and not (buf[nxt].isupper() or buf[nxt].isdigit() or buf[nxt] in SENTENCE_OPENERS):
+            return []  # next sentence would start lowercase
+
+        if buf[idx] == ".":
+            token = TOKEN_BEFORE_RE.search(buf, max(self._seg, idx - 24), idx)
+            if token:
+                word = token.group(1).lower().rstrip(".")
+                if word in ABBREVIATIONS or (len(word) == 1 and word.isalpha()):
+                    return []
+
+        self._pos = end
+        return list(self._emit(end, end))
+
+    def _semicolon(self, idx: int, final: bool) -> Optional[List[Segment]]:
+        # ends a clause before a new list item: "...; (b) the Licensee shall"
+        buf = self._buf
+        nxt = idx + 1
+        while nxt < len(buf) and buf[nxt] in " \t":
+            nxt += 1
+        if len(buf) - nxt < 8 and not final:
+            return None
+        self._pos = idx + 1
+        if LIST_RE.match(buf, nxt):
+            marker = LIST_RE.match(buf, nxt)
+            segments = list(self._emit(idx + 1, marker.end()))
+            self._push_section(LEVEL_LIST, marker.group("item").strip())
+            self._pos = marker.end()
+            return segments
+        return []
+
+    def _line_start(self, start: int, final: bool, newline: Optional[int] = None) -> Optional[List[Segment]]:
+        """
+        Classifies the line beginning at `start`: blank, section / list marker,
+        heading, or a wrapped continuation of the current clause.
+        """
+        buf = self._buf
+        if start == self._line_checked:
+            self._pos = start
+            return []
+
+        line_end = buf.find("\n", start)
+        if line_end < 0:
+            if not final and len(buf) - start < MAX_HEADING_CHARS + 16:
+                return None
+            line_end = len(buf)
+        line = buf[start:line_end]
+        cut = newline if newline is not None else start
+        self._line_checked = start
+
+        # blank line: paragraph break
+        if not line.strip():
+            self._pos = start
+            return list(self._emit(cut, start))
+
+        section = SECTION_RE.match(buf, start, line_end)
+        if section:
+            rest = buf[section.end():line_end]
+            if section.group("kind"):
+                kind = section.group("kind").lower()
+                number = section.group("named")
+                level = LEVEL_ARTICLE if kind == "article" else number.count(".") + 1
+                label = f"{section.group('kind').strip()} {number}"
+            else:
+                number = section.group("num").rstrip(".")
+                level = number.count(".") + 1
+                label = number
+            segments = list(self._emit(cut, section.end()))
+
+            if (not rest.strip() or _is_heading_text(rest)) and (line_end < len(buf) or final):
+                # "12. INDEMNIFICATION" / "Section 4 Term" on a line of its own
+                self._push_section(level, f"{label} {rest.strip()}".strip())
+                self._skip_line(line_end)
+            else:
+                self._push_section(level, label)
+                self._pos = section.end()
+            return segments
+
+        item = LIST_RE.match(buf, start, line_end)
+        if item:
+            segments = list(self._emit(cut, item.end()))
+            self._push_section(LEVEL_LIST, item.group("item").strip())
+            self._pos = item.end()
+            return segments
+
+        if _is_heading_text(line) and _is_caps(line):
+            # an ALL-CAPS line is a heading only between clauses, and not the first line
+            # of an ALL-CAPS paragraph (disclaimers)
+            pending = buf[self._seg:cut].strip()
+            after_break = not pending or pending[-1] in ".:;!?" or self._heading_end == self._base + cut
+            next_end = buf.find("\n", line_end + 1) if line_end < len(buf) else len(buf)
+            if next_end < 0:
+                if not final and len(buf) - line_end < MAX_HEADING_CHARS:
+                    self._line_checked = -1
+                    return None
+                next_end = len(buf)
+            next_line = buf[line_end + 1:next_end]
+            if after_break and not (_is_caps(next_line) and len(next_line.strip()) > MAX_HEADING_CHARS // 2):
+                segments = list(self._emit(cut, line_end))
+                title = " ".join(line.split())
+                if self._heading_end == self._base + cut and self._sections:
+                    # "ARTICLE IV" followed by "INDEMNIFICATION"
+                    level, label = self._sections[-1]
+                    self._sections[-1] = (level, f"{label} {title}")
+                else:
+                    self._push_section(1, title)
+                self._skip_line(line_end)
+                return segments
+
+        # wrapped line inside a clause
+        self._pos = start
+        return []
+
+    def _skip_line(self, line_end: int):
+        self._seg = line_end
+        self._pos = line_end
+        self._heading_end = self._base + line_end
+
+    def _push_section(self, level: int, label: str):
+        while self._sections and self._sections[-1][0] >= level:
+            self._sections.pop()
+        self._sections.append((level, label))
+
+    def _split_long(self) -> Iterator[Segment]:
+        # a run with no boundary (tables, OCR noise) is cut at the last space before the cap
+        while self._pos - self._seg > MAX_CLAUSE_CHARS:
+            limit = self._seg + MAX_CLAUSE_CHARS
+            cut = self._buf.rfind(" ", self._seg + 1, limit)
+            cut = limit if cut <= self._seg else cut
+            yield from self._emit(cut, cut)
+
+    # ---------- Output ----------
+
+    def _emit(self, end: int, next_start: int) -> Iterator[Segment]:
+        """
+        Emits _buf[_seg:end] as a clause (if it is long enough) and starts the next one at next_start.
+        """
+        raw = self._buf[self._seg:end]
+        start = self._seg
+        self._seg = max(next_start, end)
+
+        stripped = raw.strip()
+        if not stripped:
+            return
+        lead = len(raw) - len(raw.lstrip())
+        text = " ".join(stripped.split())
+        if len(text) <= MIN_CLAUSE_CHARS or len(text.split()) < MIN_CLAUSE_WORDS:
+            return
+        abs_start = self._base + start + lead
+        yield Segment(
+            text=text,
+            start=abs_start,
+            end=abs_start + len(stripped),
+            section=tuple(label for _, label in self._sections),
+        )
+
+    def _compact(self):
+        # drop everything before the pending clause; what is left is at most one clause
+        drop = min(self._seg, self._pos)
+        if drop <= 0:
+            return
+        self._buf = self._buf[drop:]
+        self._base += drop
+        self._seg -= drop
+        self._pos -= drop
+        self._line_checked = self._line_checked - drop if self._line_checked >= drop else -1
+
+
+# =========================
+# Public API
+# =========================
+
+def iter_segments(chunks: Iterable[str]) -> Iterator[Segment]:
+    """
+    Clauses from text arriving in chunks (e.g. PDF pages). Chunks are concatenated
+    as-is, so offsets refer to "".join(chunks).
+    """
+    segmenter = StreamingSegmenter()
+    for chunk in chunks:
+        yield from segmenter.feed(chunk)
+    yield from segmenter.close()
+
+
+def segment_text(text: str) -> List[Segment]:
+    if not text:
+        return []
+    return list(iter_segments([text]))
+
+
+def format_section(section: Tuple[str, ...]) -> str:
+    return " > ".join(section)
@@ -0,0 +1,162 @@
+# backend/services/semantic_cache.py
+
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+# =========================
+# Configuration
+# =========================
+
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "1") == "1"
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+SEMANTIC_CACHE_CAPACITY = int(os.getenv("SEMANTIC_CACHE_CAPACITY", "5000"))
+SEMANTIC_CACHE_POLICY = os.getenv("SEMANTIC_CACHE_POLICY", "lru")  # "lru", "lfu" or "fifo"
+
+EVICTION_POLICIES = ("lru", "lfu", "fifo")
+
+
+# =========================
+# Vector Index
+# =========================
+
+class SemanticSuggestionCache:
+    """
+    Fixed-capacity in-memory matrix of normalized clause embeddings that already
+    have an LLM suggestion. A clause reuses the suggestion of its nearest cached
+    clause in the same category when cosine similarity >= threshold.
+    """
+
+    def __init__(self, threshold: float, capacity: int, policy: str):
+        if policy not in EVICTION_POLICIES:
+            raise ValueError(f"Unknown semantic cache policy {policy!r}, expected one of {EVICTION_POLICIES}")
+
+        self.threshold = threshold
+        self.capacity = capacity
+        self.policy = policy
+
+        self._lock = threading.Lock()
+        self._embeddings: Optional[np.ndarray] = None  # allocated on first insert, once dim is known
+        self._size = 0
+        # categories as int16 codes so the lookup mask is a numeric compare
+        self._category_codes: Dict[str, int] = {}
+        self._categories = np.full(capacity, -1, dtype=np.int16)
+        self._suggestions: List[str] = [None] * capacity
+        self._inserted_at = np.zeros(capacity, dtype=np.float64)
+        self._used_at = np.zeros(capacity, dtype=np.float64)
+        self._hits = np.zeros(capacity, dtype=np.int64)
+
+        self.counters = {
+            "lookups": 0,
+            "hits": 0,
+            "llm_calls_avoided": 0,
+            "inserts": 0,
+            "evictions": 0,
+        }
+
+    def lookup_many(self, embeddings: np.ndarray, categories: List[str]) -> List[Optional[Tuple[str, float]]]:
+        """
+        Returns (suggestion, similarity) per query, or None when nothing is close enough.
+        """
+        results: List[Optional[Tuple[str, float]]] = [None] * len(categories)
+        if not categories:
+            return results
+
+        queries = np.asarray(embeddings, dtype=np.float32).reshape(len(categories), -1)
+
+        with self._lock:
+            self.counters["lookups"] += len(categories)
+            if self._size == 0:
+                return results
+
+            # a category never cached gets -2 and matches no slot
+            query_categories = np.array([self._category_codes.get(c, -2) for c in categories], dtype=np.int16)
+
+            sims = queries @ self._embeddings[:self._size].T
+            sims[query_categories[:, None] != self._categories[None, :self._size]] = -np.inf
+
+            best = np.argmax(sims, axis=1)
+            best_sims = sims[np.arange(len(categories)), best]
+
+            now = time.monotonic()
+            for i in np.flatnonzero(best_sims >= self.threshold):
+                slot = int(best[i])
+                self._used_at[slot] = now
+                self._hits[slot] += 1
+                results[i] = (self._suggestions[slot], float(best_sims[i]))
+
+            hits = sum(1 for r in results if r is not None)
+            self.counters["hits"] += hits
+            self.counters["llm_calls_avoided"] += hits
+
+        return results
+
+    def add(self, embedding: np.ndarray, category: str, suggestion: str):
+        if not suggestion or self.capacity <= 0:
+            return
+
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+
+        with self._lock:
+            if self._embeddings is None:
+                self._embeddings = np.zeros((self.capacity, vector.shape[0]), dtype=np.float32)
+
+            code = self._category_codes.get(category)
+            if code is None:
+                if len(self._category_codes) > np.iinfo(np.int16).max:
+                    return
+                code = self._category_codes[category] = len(self._category_codes)
+
+            if self._size < self.capacity:
+                slot = self._size
+                self._size += 1
+            else:
+                slot = self._victim()
+                self.counters["evictions"] += 1
+
+            now = time.monotonic()
+            self._embeddings[slot] = vector
+            self._categories[slot] = code
+            self._suggestions[slot] = suggestion
+            self._inserted_at[slot] = now
+            self._used_at[slot] = now
+            self._hits[slot] = 0
+            self.counters["inserts"] += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.counters["lookups"]
+            return {
+                **self.counters,
+                "size": self._size,
+                "capacity": self.capacity,
+                "policy": self.policy,
+                "threshold": self.threshold,
+                "hit_rate": round(self.counters["hits"] / lookups, 3) if lookups else 0.0,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._size = 0
+            self._category_codes = {}
+            self._categories[:] = -1
+            self._suggestions = [None] * self.capacity
+
+    def _victim(self) -> int:
+        if self.policy == "fifo":
+            return int(np.argmin(self._inserted_at))
+        if self.policy == "lfu":
+            # least hits first, oldest use breaks ties
+            return int(np.lexsort((self._used_at, self._hits))[0])
+        return int(np.argmin(self._used_at))
+
+
+semantic_cache = SemanticSuggestionCache(
+    threshold=SEMANTIC_CACHE_THRESHOLD,
+    capacity=SEMANTIC_CACHE_CAPACITY,
+    policy=SEMANTIC_CACHE_POLICY,
+) if SEMANTIC_CACHE_ENABLED else None
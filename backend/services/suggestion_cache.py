@@ -0,0 +1,216 @@
+# backend/services/suggestion_cache.py
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+
+# =========================
+# Configuration
+# =========================
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+
+SUGGESTION_CACHE_ENABLED = os.getenv("SUGGESTION_CACHE_ENABLED", "1") == "1"
+SUGGESTION_CACHE_PATH = os.getenv("SUGGESTION_CACHE_PATH", os.path.join(DATA_DIR, "suggestion_cache.sqlite3"))
+SUGGESTION_CACHE_MEMORY_ITEMS = int(os.getenv("SUGGESTION_CACHE_MEMORY_ITEMS", "2048"))
+SUGGESTION_CACHE_MAX_ROWS = int(os.getenv("SUGGESTION_CACHE_MAX_ROWS", "100000"))
+SUGGESTION_CACHE_TTL = float(os.getenv("SUGGESTION_CACHE_TTL", str(30 * 24 * 3600)))  # seconds, <= 0 never expires
+
+# Evicting on every insert would mean a COUNT(*) per write; check periodically instead
+EVICTION_CHECK_EVERY = 200
+
+WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_clause(clause: str) -> str:
+    """
+    Whitespace- and case-insensitive form used for cache keys.
+    """
+    return WHITESPACE_RE.sub(" ", clause or "").strip().casefold()
+
+
+def make_cache_key(clause: str, category: str, risk_level: str,
+                   provider: str, model: str, prompt_version: str) -> str:
+    """
+    Content address of one suggestion request.
+    """
+    parts = [normalize_clause(clause), category, risk_level, provider, model, prompt_version]
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+# =========================
+# Two-Tier Cache
+# =========================
+
+class SuggestionCache:
+    """
+    In-process LRU in front of an on-disk SQLite table.
+    The SQLite file is shared by all workers on the host; each worker has its own LRU.
+    """
+
+    def __init__(self, path: str, memory_items: int, max_rows: int, ttl: float):
+        self.path = path
+        self.memory_items = memory_items
+        self.max_rows = max_rows
+        self.ttl = ttl
+
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self._writes = 0
+
+        self.counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "expired": 0,
+            "stores": 0,
+            "evictions": 0,
+        }
+
+    # ---------- SQLite ----------
+
+    def _db(self) -> Optional[sqlite3.Connection]:
+        if self._conn is None:
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS suggestions (
+                        key TEXT PRIMARY KEY,
+                        suggestion TEXT NOT NULL,
+                        created_at REAL NOT NULL,
+                        accessed_at REAL NOT NULL
+                    )
+                    """
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_suggestions_accessed ON suggestions(accessed_at)")
+                conn.commit()
+                self._conn = conn
+            except sqlite3.Error as e:
+                print("⚠️ Suggestion cache disk tier disabled:", e)
+                self._conn = False
+        return self._conn or None
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl > 0 and now - created_at > self.ttl
+
+    # ---------- Public API ----------
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                suggestion, created_at = entry
+                if not self._expired(created_at, now):
+                    self._memory.move_to_end(key)
+                    self.counters["memory_hits"] += 1
+                    return suggestion
+                del self._memory[key]
+                self.counters["expired"] += 1
+
+            conn = self._db()
+            if conn is not None:
+                try:
+                    row = conn.execute(
+                        "SELECT suggestion, created_at FROM suggestions WHERE key = ?", (key,)
+                    ).fetchone()
+                    if row is not None:
+                        suggestion, created_at = row
+                        if not self._expired(created_at, now):
+                            conn.execute("UPDATE suggestions SET accessed_at = ? WHERE key = ?", (now, key))
+                            conn.commit()
+                            self._remember(key, suggestion, created_at)
+                            self.counters["disk_hits"] += 1
+                            return suggestion
+                        conn.execute("DELETE FROM suggestions WHERE key = ?", (key,))
+                        conn.commit()
+                        self.counters["expired"] += 1
+                except sqlite3.Error as e:
+                    print("⚠️ Suggestion cache read failed:", e)
+
+            self.counters["misses"] += 1
+            return None
+
+    def set(self, key: str, suggestion: str):
+        if not suggestion:
+            return
+        now = time.time()
+        with self._lock:
+            self._remember(key, suggestion, now)
+            self.counters["stores"] += 1
+
+            conn = self._db()
+            if conn is None:
+                return
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO suggestions (key, suggestion, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (key, suggestion, now, now),
+                )
+                conn.commit()
+                self._writes += 1
+                if self._writes % EVICTION_CHECK_EVERY == 0:
+                    self._evict_disk(conn, now)
+            except sqlite3.Error as e:
+                print("⚠️ Suggestion cache write failed:", e)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.counters["memory_hits"] + self.counters["disk_hits"] + self.counters["misses"]
+            hits = self.counters["memory_hits"] + self.counters["disk_hits"]
+            return {
+                **self.counters,
+                "memory_items": len(self._memory),
+                "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            conn = self._db()
+            if conn is not None:
+                conn.execute("DELETE FROM suggestions")
+                conn.commit()
+
+    # ---------- Internals ----------
+
+    def _remember(self, key: str, suggestion: str, created_at: float):
+        self._memory[key] = (suggestion, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self, conn: sqlite3.Connection, now: float):
+        if self.ttl > 0:
+            cur = conn.execute("DELETE FROM suggestions WHERE created_at < ?", (now - self.ttl,))
+            self.counters["expired"] += cur.rowcount
+
+        (rows,) = conn.execute("SELECT COUNT(*) FROM suggestions").fetchone()
+        overflow = rows - self.max_rows
+        if overflow > 0:
+            conn.execute(
+                "DELETE FROM suggestions WHERE key IN "
+                "(SELECT key FROM suggestions ORDER BY accessed_at ASC LIMIT ?)",
+                (overflow,),
+            )
+            self.counters["evictions"] += overflow
+        conn.commit()
+
+
+suggestion_cache = SuggestionCache(
+    path=SUGGESTION_CACHE_PATH,
+    memory_items=SUGGESTION_CACHE_MEMORY_ITEMS,
+    max_rows=SUGGESTION_CACHE_MAX_ROWS,
+    ttl=SUGGESTION_CACHE_TTL,
+) if SUGGESTION_CACHE_ENABLED else None
@@ -1,14 +1,18 @@
 # backend/services/suggestion_service.py
 
 import os
-import requests
-from typing import Optional
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout, as_completed
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from services.suggestion_cache import make_cache_key, suggestion_cache
 
 # =========================
 # Configuration
 # =========================
 
-LLM_PROVIDER = os.getenv("LLM_PROVIDER", "openai")  # "openai" or "ollama"
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "openai")  # "openai", "ollama" or "stub"
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
@@ -18,8 +22,46 @@ OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "phi3")
 OPENAI_URL = "https://openrouter.ai/api/v1/chat/completions"
 OPENAI_MODEL = "gpt-4o-mini"
 
+# Local, deterministic stand-in for a provider (benchmarks, offline development)
+STUB_LATENCY_MS = float(os.getenv("STUB_LATENCY_MS", "0"))
+
+# Max in-flight LLM calls per provider, shared by all requests in this process
+PROVIDER_CONCURRENCY = {
+    "openai": int(os.getenv("OPENAI_MAX_CONCURRENCY", "8")),
+    "ollama": int(os.getenv("OLLAMA_MAX_CONCURRENCY", "2")),
+    "stub": int(os.getenv("STUB_MAX_CONCURRENCY", "8")),
+}
+
+# Seconds a single evaluation may spend waiting on suggestions (<= 0 disables the limit)
+SUGGESTION_TIME_BUDGET = float(os.getenv("SUGGESTION_TIME_BUDGET", "45"))
+
+# Bump whenever build_prompt changes so cached suggestions from the old prompt are not reused
+PROMPT_VERSION = "v1"
+
+STATUS_READY = "ready"
+STATUS_PENDING = "pending"
+STATUS_FAILED = "failed"
+STATUS_SKIPPED = "skipped"
+
 print("LLM_PROVIDER:", LLM_PROVIDER)
 print("OPENAI KEY LOADED:", bool(OPENAI_API_KEY))
+
+def provider_model() -> str:
+    """
+    Model name used by the configured provider.
+    """
+    if LLM_PROVIDER == "stub":
+        return f"stub{STUB_LATENCY_MS:g}ms"
+    return OLLAMA_MODEL if LLM_PROVIDER == "ollama" else OPENAI_MODEL
+
+
+def suggestion_version() -> str:
+    """
+    Everything about suggestion generation that makes old outputs stale.
+    """
+    return f"{LLM_PROVIDER}:{provider_model()}:{PROMPT_VERSION}"
+
+
 # =========================
 # Prompt Builder
 # =========================
@@ -80,6 +122,8 @@ def generate_openai_suggestion(prompt: str) -> Optional[str]:
     }
 
     try:
+        import requests
+
         response = requests.post(OPENAI_URL, headers=headers, json=payload, timeout=60)
         response.raise_for_status()
         data = response.json()
@@ -97,8 +141,6 @@ def generate_openai_suggestion(prompt: str) -> Optional[str]:
 
 def generate_ollama_suggestion(prompt: str):
 
-    print("Using Ollama model:", OLLAMA_MODEL)
-
     payload = {
         "model": OLLAMA_MODEL,
         "prompt": prompt,
@@ -106,6 +148,8 @@ def generate_ollama_suggestion(prompt: str):
     }
 
     try:
+        import requests
+
         response = requests.post(
             OLLAMA_URL,
             json=payload,
@@ -118,23 +162,33 @@ def generate_ollama_suggestion(prompt: str):
 
         data = response.json()
 
-        print("OLLAMA RAW RESPONSE:", data)
-
         if "response" in data:
             return data["response"].strip()
 
         if "message" in data and "content" in data["message"]:
             return data["message"]["content"].strip()
 
-        return str(data)
-
-        print("Unexpected Ollama format:", data)
+        print("Unexpected Ollama format:", str(data)[:200])
         return None
 
     except Exception as e:
         print("Ollama request failed:", e)
         return None
 
+# =========================
+# Stub Suggestion
+# =========================
+
+def generate_stub_suggestion(clause: str, category: str, risk_level: str) -> str:
+    """
+    Same output for the same clause, after STUB_LATENCY_MS; no network.
+    """
+    if STUB_LATENCY_MS > 0:
+        time.sleep(STUB_LATENCY_MS / 1000)
+    qualifier = "to the extent permitted by applicable law" if risk_level == "High" else "acting reasonably"
+    return f"{clause.rstrip(' .;')}, {qualifier} and subject to the {category.lower()} terms of this Agreement."
+
+
 # =========================
 # Public Suggestion Function
 # =========================
@@ -147,16 +201,122 @@ def generate_clause_suggestion(
     """
     Main suggestion entry point used by clause_service.
     """
-    
 
     # Only generate suggestions for Medium/High risk
     if risk_level not in ("High", "Medium"):
         return None
 
-    prompt = build_prompt(clause, category, risk_level)
-    print("Calling Ollama for clause:", clause[:60])
+    cache_key = None
+    if suggestion_cache is not None:
+        cache_key = make_cache_key(clause, category, risk_level, LLM_PROVIDER, provider_model(), PROMPT_VERSION)
+        cached = suggestion_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    if LLM_PROVIDER == "stub":
+        suggestion = generate_stub_suggestion(clause, category, risk_level)
+    else:
+        prompt = build_prompt(clause, category, risk_level)
+
+        if LLM_PROVIDER == "ollama":
+            suggestion = generate_ollama_suggestion(prompt)
+        else:
+            suggestion = generate_openai_suggestion(prompt)
+
+    if cache_key is not None and suggestion:
+        suggestion_cache.set(cache_key, suggestion)
+
+    return suggestion
+
+
+# =========================
+# Concurrent Suggestion Stage
+# =========================
+
+_executors: Dict[str, ThreadPoolExecutor] = {}
+_executors_lock = threading.Lock()
+
 
-    if LLM_PROVIDER == "ollama":
-        return generate_ollama_suggestion(prompt)
+def get_provider_executor(provider: str = None) -> ThreadPoolExecutor:
+    """
+    One bounded pool per provider, so the concurrency limit holds across requests.
+    """
+    provider = provider or LLM_PROVIDER
+    with _executors_lock:
+        executor = _executors.get(provider)
+        if executor is None:
+            workers = max(1, PROVIDER_CONCURRENCY.get(provider, 4))
+            executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"llm-{provider}")
+            _executors[provider] = executor
+        return executor
+
+
+def needs_suggestion(risk_level: str) -> bool:
+    return risk_level in ("High", "Medium")
+
+
+def iter_clause_suggestions(
+    jobs: List[Dict],
+    time_budget: Optional[float] = None,
+) -> Iterator[Tuple[int, Optional[str], str]]:
+    """
+    Runs suggestions for `jobs` (dicts with clause / category / risk_level) concurrently.
+    Yields (job_index, suggestion, status) in completion order. Jobs still running when
+    the time budget runs out are yielded as pending.
+    """
+    if time_budget is None:
+        time_budget = SUGGESTION_TIME_BUDGET
+    deadline = time.monotonic() + time_budget if time_budget > 0 else None
+
+    executor = get_provider_executor()
+    futures = {}
+    skipped = []
+
+    for idx, job in enumerate(jobs):
+        if not needs_suggestion(job["risk_level"]):
+            skipped.append(idx)
+            continue
+        future = executor.submit(
+            generate_clause_suggestion,
+            clause=job["clause"],
+            category=job["category"],
+            risk_level=job["risk_level"],
+        )
+        futures[future] = idx
 
-    return generate_openai_suggestion(prompt)
+    try:
+        for idx in skipped:
+            yield idx, None, STATUS_SKIPPED
+
+        timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+        try:
+            for future in as_completed(list(futures), timeout=timeout):
+                idx = futures.pop(future)
+                try:
+                    suggestion = future.result()
+                except Exception as e:
+                    print("⚠️ Suggestion worker failed:", e)
+                    suggestion = None
+                yield idx, suggestion, STATUS_READY if suggestion else STATUS_FAILED
+        except FuturesTimeout:
+            print(f"⏱️ Suggestion budget exhausted, {len(futures)} suggestion(s) pending")
+
+        for future, idx in list(futures.items()):
+            yield idx, None, STATUS_PENDING
+    finally:
+        # Calls not yet started should not keep using the shared pool
+        for future in futures:
+            future.cancel()
+
+
+def generate_clause_suggestions(
+    jobs: List[Dict],
+    time_budget: Optional[float] = None,
+) -> List[Tuple[Optional[str], str]]:
+    """
+    Batch form of `iter_clause_suggestions`: returns (suggestion, status) in job order.
+    """
+    results = [(None, STATUS_SKIPPED)] * len(jobs)
+    for idx, suggestion, status in iter_clause_suggestions(jobs, time_budget):
+        results[idx] = (suggestion, status)
+    return results
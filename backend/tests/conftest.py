@@ -0,0 +1,8 @@
+# backend/tests/conftest.py
+#
+#   cd backend && python -m pytest -q tests
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
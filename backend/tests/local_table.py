@@ -0,0 +1,133 @@
+# backend/tests/local_table.py
+
+import json
+import os
+import threading
+from typing import Dict, List, Optional
+
+
+class LocalTableClient:
+    """
+    In-memory / JSONL stand-in for the part of the Supabase client the backend uses:
+        client.table(name).insert(rows).execute()
+        client.table(name).upsert(rows, on_conflict=key, ignore_duplicates=True).execute()
+        client.table(name).select("*").eq(column, value).order(column).range(start, end).execute().data
+    Rows are appended to one JSONL file per table under `directory`, or kept in memory
+    when no directory is given. `fail_next` / `available` simulate an unreachable backend.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory
+        self.available = True
+        self.fail_next = 0
+        self.insert_calls = 0
+        self._rows: Dict[str, List[dict]] = {}
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def table(self, name: str) -> "LocalTable":
+        return LocalTable(self, name)
+
+    def rows(self, name: str) -> List[dict]:
+        with self._lock:
+            return self._read(name)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, f"{name}.jsonl")
+
+    def _insert(self, name: str, rows: List[dict], on_conflict: Optional[str] = None):
+        with self._lock:
+            self.insert_calls += 1
+            if not self.available:
+                raise ConnectionError("local table backend unavailable")
+            if self.fail_next > 0:
+                self.fail_next -= 1
+                raise ConnectionError("simulated insert failure")
+
+            if on_conflict:
+                # ignore_duplicates: skip rows whose key already exists
+                seen = {row.get(on_conflict) for row in self._read(name)}
+                fresh = []
+                for row in rows:
+                    if row.get(on_conflict) not in seen:
+                        seen.add(row.get(on_conflict))
+                        fresh.append(row)
+                rows = fresh
+
+            if not self.directory:
+                self._rows.setdefault(name, []).extend(json.loads(json.dumps(rows)))
+                return
+            with open(self._path(name), "a", encoding="utf-8") as f:
+                for row in rows:
+                    f.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+    def _read(self, name: str) -> List[dict]:
+        if not self.directory:
+            return list(self._rows.get(name, []))
+        path = self._path(name)
+        if not os.path.exists(path):
+            return []
+        with open(path, "r", encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+
+class LocalResponse:
+    def __init__(self, data: List[dict]):
+        self.data = data
+        self.count = len(data)
+
+
+class LocalTable:
+    def __init__(self, client: LocalTableClient, name: str):
+        self.client = client
+        self.name = name
+        self._pending: List[dict] = []
+        self._on_conflict: Optional[str] = None
+        self._select: Optional[str] = None
+        self._filters: List = []
+        self._order: Optional[tuple] = None
+        self._range: Optional[tuple] = None
+
+    def insert(self, rows) -> "LocalTable":
+        self._pending = rows if isinstance(rows, list) else [rows]
+        return self
+
+    def upsert(self, rows, on_conflict: str = "id", ignore_duplicates: bool = False) -> "LocalTable":
+        if not ignore_duplicates:
+            raise NotImplementedError("local stand-in only supports ignore_duplicates upserts")
+        self._on_conflict = on_conflict
+        return self.insert(rows)
+
+    def select(self, columns: str = "*") -> "LocalTable":
+        self._select = columns
+        return self
+
+    def eq(self, column: str, value) -> "LocalTable":
+        self._filters.append((column, value))
+        return self
+
+    def order(self, column: str, desc: bool = False) -> "LocalTable":
+        self._order = (column, desc)
+        return self
+
+    def range(self, start: int, end: int) -> "LocalTable":
+        self._range = (start, end)
+        return self
+
+    def execute(self) -> LocalResponse:
+        if self._select is None:
+            self.client._insert(self.name, self._pending, self._on_conflict)
+            return LocalResponse(self._pending)
+
+        rows = [row for row in self.client.rows(self.name)
+                if all(row.get(col) == val for col, val in self._filters)]
+        if self._order:
+            column, desc = self._order
+            rows.sort(key=lambda row: row.get(column), reverse=desc)
+        if self._range:
+            rows = rows[self._range[0]:self._range[1] + 1]
+        if self._select.strip() != "*":
+            columns = [c.strip() for c in self._select.split(",")]
+            rows = [{c: row.get(c) for c in columns} for row in rows]
+        return LocalResponse(rows)
@@ -0,0 +1,53 @@
+# backend/tests/test_evaluation_executor.py
+
+import asyncio
+import threading
+
+from services import evaluation_executor as ee
+
+
+def test_stream_stops_producer_when_client_goes_away(monkeypatch):
+    monkeypatch.setattr(ee, "STREAM_BUFFER_EVENTS", 4)
+    executor = ee.PriorityEvaluationExecutor(1, 0, {lane: 4 for lane in ee.LANES})
+    produced = []
+    closed = threading.Event()
+
+    def make_events():
+        try:
+            for idx in range(10_000):
+                produced.append(idx)
+                yield {"event": "clause", "index": idx}
+        finally:
+            closed.set()
+
+    async def read_two():
+        events = executor.stream(make_events)
+        received = [await events.__anext__(), await events.__anext__()]
+        await events.aclose()
+        return received
+
+    received = asyncio.run(read_two())
+
+    assert [event["index"] for event in received] == [0, 1]
+    assert closed.wait(5)
+    # the producer ran at most a buffer ahead of the client
+    assert len(produced) <= 2 + 4 + 1
+    # and the worker is free for the next job
+    assert executor.submit(lambda: "next").result(timeout=5) == "next"
+
+
+def test_stream_relays_every_event_and_errors():
+    executor = ee.PriorityEvaluationExecutor(1, 0, {lane: 4 for lane in ee.LANES})
+
+    def make_events():
+        for idx in range(ee.STREAM_BUFFER_EVENTS + 10):
+            yield {"event": "clause", "index": idx}
+        raise ValueError("boom")
+
+    async def read_all():
+        return [event async for event in executor.stream(make_events)]
+
+    events = asyncio.run(read_all())
+
+    assert len(events) == ee.STREAM_BUFFER_EVENTS + 11
+    assert events[-1] == {"event": "error", "message": "boom"}
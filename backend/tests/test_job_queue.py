@@ -0,0 +1,146 @@
+# backend/tests/test_job_queue.py
+
+import io
+import json
+import multiprocessing
+import time
+
+import pytest
+
+from services import job_queue
+
+fitz = pytest.importorskip("fitz")
+
+PAGES = 60
+
+
+def make_pdf(path, pages=PAGES):
+    document = fitz.open()
+    for number in range(pages):
+        page = document.new_page()
+        page.insert_text((72, 72), f"Page {number}. The Supplier shall deliver the goods on time.")
+    document.save(path)
+    document.close()
+
+
+def extraction_worker(stop_event, db_path):
+    """
+    A job worker whose jobs only extract the upload (no models, no Supabase).
+    """
+    from services.parser_service import extract_text_from_path
+    from services.registry import registry
+
+    def run_extraction_job(conn, job):
+        params = json.loads(job["params"])
+        text = extract_text_from_path(job["file_path"], params["file_name"])
+        if not text.strip():
+            raise job_queue.JobInputError("Could not extract text from file")
+        return {"pages": text.count("The Supplier shall deliver")}
+
+    job_queue.run_upload_job = run_extraction_job
+    registry.warmup_in_background = lambda *args, **kwargs: None
+    job_queue.worker_main(stop_event, db_path)
+
+
+def extract_pages(path, results):
+    from services.parser_service import extract_text_from_path
+
+    results.put(extract_text_from_path(path, "big.pdf").count("The Supplier shall deliver"))
+
+
+def test_large_pdf_job_uses_page_pool(tmp_path, monkeypatch):
+    # the page pool is started from inside the job worker
+    monkeypatch.setenv("PDF_WORKERS", "2")
+    monkeypatch.setenv("PDF_PARALLEL_MIN_PAGES", "40")
+    monkeypatch.setattr(job_queue, "JOB_SPOOL_DIR", str(tmp_path / "uploads"))
+    db_path = str(tmp_path / "jobs.sqlite3")
+    pdf_path = tmp_path / "big.pdf"
+    make_pdf(str(pdf_path))
+
+    conn = job_queue.connect(db_path)
+    job_id = job_queue.enqueue_upload(io.BytesIO(pdf_path.read_bytes()), "big.pdf", {}, conn=conn)
+
+    ctx = multiprocessing.get_context("spawn")
+    stop = ctx.Event()
+    # started like JobWorkerPool starts its workers
+    worker = ctx.Process(target=extraction_worker, args=(stop, db_path), daemon=False)
+    worker.start()
+    try:
+        deadline = time.monotonic() + 120
+        job = job_queue.get_job(job_id, conn=conn)
+        while job["status"] not in (job_queue.STATUS_DONE, job_queue.STATUS_FAILED) and time.monotonic() < deadline:
+            time.sleep(0.2)
+            job = job_queue.get_job(job_id, conn=conn)
+    finally:
+        stop.set()
+        worker.join(30)
+        stopped = not worker.is_alive()
+        if not stopped:
+            worker.terminate()
+
+    assert job["status"] == job_queue.STATUS_DONE, job["error"]
+    assert stopped, "job worker did not exit after its page pool was used"
+    assert job["result"] == {"pages": PAGES}
+
+
+def test_daemonic_process_extracts_large_pdf_in_order(tmp_path, monkeypatch):
+    monkeypatch.setenv("PDF_WORKERS", "2")
+    monkeypatch.setenv("PDF_PARALLEL_MIN_PAGES", "40")
+    pdf_path = str(tmp_path / "big.pdf")
+    make_pdf(pdf_path)
+
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    process = ctx.Process(target=extract_pages, args=(pdf_path, results), daemon=True)
+    process.start()
+    try:
+        assert results.get(timeout=60) == PAGES
+    finally:
+        process.join(30)
+
+
+def run_worker_until_finished(db_path, job_id, conn):
+    ctx = multiprocessing.get_context("spawn")
+    stop = ctx.Event()
+    worker = ctx.Process(target=extraction_worker, args=(stop, db_path), daemon=False)
+    worker.start()
+    try:
+        deadline = time.monotonic() + 120
+        job = job_queue.get_job(job_id, conn=conn)
+        while job["status"] not in (job_queue.STATUS_DONE, job_queue.STATUS_FAILED) and time.monotonic() < deadline:
+            time.sleep(0.2)
+            job = job_queue.get_job(job_id, conn=conn)
+    finally:
+        stop.set()
+        worker.join(30)
+        if worker.is_alive():
+            worker.terminate()
+    return job
+
+
+def test_failed_job_removes_its_upload(tmp_path, monkeypatch):
+    monkeypatch.setattr(job_queue, "JOB_SPOOL_DIR", str(tmp_path / "uploads"))
+    db_path = str(tmp_path / "jobs.sqlite3")
+    pdf_path = tmp_path / "blank.pdf"
+    document = fitz.open()
+    document.new_page()
+    document.save(str(pdf_path))
+    document.close()
+
+    conn = job_queue.connect(db_path)
+    job_id = job_queue.enqueue_upload(io.BytesIO(pdf_path.read_bytes()), "blank.pdf", {}, conn=conn)
+    job = run_worker_until_finished(db_path, job_id, conn)
+
+    assert job["status"] == job_queue.STATUS_FAILED
+    assert not (tmp_path / "uploads" / job_id).exists()
+
+
+def test_job_out_of_attempts_removes_its_upload(tmp_path, monkeypatch):
+    monkeypatch.setattr(job_queue, "JOB_SPOOL_DIR", str(tmp_path / "uploads"))
+    conn = job_queue.connect(str(tmp_path / "jobs.sqlite3"))
+    job_id = job_queue.enqueue_upload(io.BytesIO(b"%PDF"), "a.pdf", {}, conn=conn)
+    conn.execute("UPDATE jobs SET attempts = ? WHERE id = ?", (job_queue.JOB_MAX_ATTEMPTS, job_id))
+
+    assert job_queue.claim_next_job(conn) is None
+    assert job_queue.get_job(job_id, conn=conn)["status"] == job_queue.STATUS_FAILED
+    assert not (tmp_path / "uploads" / job_id).exists()
@@ -0,0 +1,64 @@
+# backend/tests/test_parser_service.py
+
+import os
+
+import pytest
+
+from services import parser_service
+from services.parser_service import ExtractionError, iter_document_pages
+
+
+def failing_pages(pages_before_error):
+    def iter_pages(source):
+        for number in range(pages_before_error):
+            yield f"Page {number} text.\n"
+        raise ValueError("broken xref table")
+    return iter_pages
+
+
+def test_unreadable_pdf_yields_nothing(monkeypatch):
+    monkeypatch.setattr(parser_service, "iter_pdf_pages", failing_pages(0))
+    assert list(iter_document_pages(b"%PDF", "broken.pdf")) == []
+
+
+def test_pdf_breaking_off_partway_raises(monkeypatch):
+    monkeypatch.setattr(parser_service, "iter_pdf_pages", failing_pages(2))
+    pages = iter_document_pages(b"%PDF", "broken.pdf")
+    assert next(pages) == "Page 0 text.\n"
+    with pytest.raises(ExtractionError):
+        list(pages)
+
+
+def spooled(data, memory_bytes):
+    upload = parser_service.SpooledUpload("contract.pdf", memory_bytes=memory_bytes)
+    for start in range(0, len(data), 1000):
+        upload.write(data[start:start + 1000])
+    return upload
+
+
+def test_large_upload_spills_to_a_named_file():
+    data = bytes(range(256)) * 20
+    with spooled(data, memory_bytes=2048) as upload:
+        assert upload.on_disk
+        path = upload.path()
+        with open(path, "rb") as f:
+            assert f.read() == data
+        assert upload.open().read() == data
+    assert not os.path.exists(path)
+
+
+def test_spilled_pdf_is_opened_from_disk(monkeypatch):
+    fitz = pytest.importorskip("fitz")
+    document = fitz.open()
+    for number in range(3):
+        document.new_page().insert_text((72, 72), f"Page {number}")
+    data = document.tobytes()
+    document.close()
+
+    with spooled(data, memory_bytes=1024) as upload:
+        def no_read():
+            raise AssertionError("spilled upload read into memory")
+        monkeypatch.setattr(upload, "read", no_read)
+        pages = list(parser_service.iter_pdf_pages(upload))
+
+    assert [page.strip() for page in pages] == ["Page 0", "Page 1", "Page 2"]
@@ -0,0 +1,58 @@
+# backend/tests/test_registry.py
+
+import pytest
+
+from services import registry as registry_module
+from services.registry import STATE_FAILED, STATE_READY, ResourceRegistry
+
+
+def flaky_loader(failures):
+    calls = []
+
+    def load():
+        calls.append(1)
+        if len(calls) <= failures:
+            raise OSError("model download failed")
+        return "model"
+
+    return load, calls
+
+
+def test_failed_resource_is_not_reloaded_by_get():
+    registry = ResourceRegistry()
+    load, calls = flaky_loader(failures=1)
+    registry.register("encoder", load)
+
+    for _ in range(3):
+        with pytest.raises(RuntimeError):
+            registry.get("encoder")
+
+    assert len(calls) == 1
+    assert registry.status()["encoder"]["state"] == STATE_FAILED
+
+
+def test_failed_resource_is_retried_after_cooldown(monkeypatch):
+    monkeypatch.setattr(registry_module, "RESOURCE_RETRY_SECONDS", 0)
+    registry = ResourceRegistry()
+    load, calls = flaky_loader(failures=1)
+    registry.register("encoder", load)
+    registry.warmup_in_background().join(5)
+    assert registry.retry_pending()
+
+    registry.warmup_in_background().join(5)
+
+    assert registry.get("encoder") == "model"
+    assert registry.status()["encoder"]["state"] == STATE_READY
+    assert len(calls) == 2
+
+
+def test_retry_waits_for_cooldown(monkeypatch):
+    monkeypatch.setattr(registry_module, "RESOURCE_RETRY_SECONDS", 60)
+    registry = ResourceRegistry()
+    load, calls = flaky_loader(failures=1)
+    registry.register("encoder", load)
+    registry.warmup_in_background().join(5)
+
+    assert not registry.retry_pending()
+    assert not registry.retry("encoder")
+    assert len(calls) == 1
@@ -0,0 +1,37 @@
+# backend/tests/test_semantic_cache.py
+
+import numpy as np
+import pytest
+
+from services.semantic_cache import SemanticSuggestionCache
+
+
+def unit(*values):
+    vector = np.array(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def test_lookup_matches_only_the_same_category():
+    cache = SemanticSuggestionCache(threshold=0.95, capacity=4, policy="lru")
+    cache.add(unit(1, 0, 0), "Payment", "pay within 30 days")
+    cache.add(unit(0, 1, 0), "Termination", "terminate on notice")
+
+    queries = np.stack([unit(1, 0, 0), unit(1, 0, 0), unit(0, 1, 0.01), unit(0, 1, 0)])
+    results = cache.lookup_many(queries, ["Payment", "Termination", "Termination", "Liability"])
+
+    assert results[0][0] == "pay within 30 days"
+    assert results[1] is None
+    assert results[2][0] == "terminate on notice"
+    assert results[3] is None
+
+
+def test_evicted_slot_takes_the_new_category():
+    cache = SemanticSuggestionCache(threshold=0.95, capacity=1, policy="fifo")
+    cache.add(unit(1, 0), "Payment", "old")
+    cache.add(unit(1, 0), "Termination", "new")
+
+    payment, termination = cache.lookup_many(np.stack([unit(1, 0), unit(1, 0)]), ["Payment", "Termination"])
+
+    assert payment is None
+    assert termination == ("new", pytest.approx(1.0))
+    assert cache.stats()["evictions"] == 1
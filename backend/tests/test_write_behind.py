@@ -0,0 +1,122 @@
+# backend/tests/test_write_behind.py
+
+import os
+import subprocess
+import sys
+
+from database.write_behind import Spool, WriteBehindWriter
+from local_table import LocalTableClient
+
+
+def make_writer(client, tmp_path, **kwargs):
+    options = {"batch_size": 10, "flush_interval": 0.01, "max_retries": 2, "retry_base": 0.0,
+               "replay_interval": 60}
+    options.update(kwargs)
+    return WriteBehindWriter(lambda: client, str(tmp_path / "spool.jsonl"), **options)
+
+
+def spooled_lines(tmp_path):
+    path = tmp_path / "spool.jsonl"
+    return path.read_text(encoding="utf-8").splitlines() if path.exists() else []
+
+
+def test_failed_insert_is_retried(tmp_path):
+    client = LocalTableClient()
+    client.fail_next = 2
+    writer = make_writer(client, tmp_path)
+
+    writer.enqueue("contracts", {"id": 1})
+    assert writer.flush(5)
+    writer.close()
+
+    assert client.rows("contracts") == [{"id": 1}]
+    assert client.insert_calls == 3
+    assert writer.stats()["retries"] == 2
+    assert spooled_lines(tmp_path) == []
+
+
+def test_rows_are_spooled_while_backend_is_down(tmp_path):
+    client = LocalTableClient()
+    client.available = False
+    writer = make_writer(client, tmp_path)
+
+    writer.enqueue("contracts", {"id": 1})
+    writer.enqueue("contracts", {"id": 2})
+    assert writer.flush(5)
+    writer.close()
+
+    assert client.rows("contracts") == []
+    assert len(spooled_lines(tmp_path)) == 2
+    assert writer.stats()["spooled"] == 2
+
+
+def test_spool_is_replayed_after_next_successful_insert(tmp_path):
+    client = LocalTableClient()
+    client.available = False
+    writer = make_writer(client, tmp_path)
+    writer.enqueue("contracts", {"id": 1})
+    assert writer.flush(5)
+
+    client.available = True
+    writer.enqueue("contracts", {"id": 2})
+    assert writer.flush(5)
+    writer.close()
+
+    assert sorted(row["id"] for row in client.rows("contracts")) == [1, 2]
+    assert writer.stats()["replayed"] == 1
+    assert not Spool(str(tmp_path / "spool.jsonl")).pending()
+
+
+def test_claim_skips_replays_of_live_processes(tmp_path):
+    spool = Spool(str(tmp_path / "spool.jsonl"))
+    live = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+    dead = subprocess.Popen([sys.executable, "-c", "pass"])
+    dead.wait()
+    try:
+        (tmp_path / f"spool.jsonl.replay-{live.pid}-1-0").write_text("")
+        (tmp_path / f"spool.jsonl.replay-{dead.pid}-1-0").write_text("")
+
+        claimed = spool.claim()
+    finally:
+        live.kill()
+        live.wait()
+
+    assert len(claimed) == 1
+    assert os.path.basename(claimed[0]).startswith(f"spool.jsonl.replay-{os.getpid()}-")
+    assert (tmp_path / f"spool.jsonl.replay-{live.pid}-1-0").exists()
+
+
+def test_writer_survives_spool_errors(tmp_path):
+    client = LocalTableClient()
+    client.available = False
+    writer = make_writer(client, tmp_path)
+
+    def disk_full(table, rows):
+        raise OSError("No space left on device")
+
+    writer.spool.append = disk_full
+    writer.enqueue("contracts", {"id": 1})
+    assert writer.flush(5)
+
+    # the thread is still running and writes the next row
+    del writer.spool.append
+    client.available = True
+    writer.enqueue("contracts", {"id": 2})
+    assert writer.flush(5)
+    writer.close()
+
+    assert client.rows("contracts") == [{"id": 2}]
+    assert writer.stats()["errors"] == 1
+
+
+def test_malformed_spool_records_are_skipped(tmp_path):
+    (tmp_path / "spool.jsonl").write_text('{"row": {"id": 0}}\n{"table": "contracts", "row": {"id": 1}}\n{"tab')
+    client = LocalTableClient()
+    writer = make_writer(client, tmp_path)
+
+    writer.enqueue("contracts", {"id": 2})
+    assert writer.flush(5)
+    writer.close()
+
+    assert sorted(row["id"] for row in client.rows("contracts")) == [1, 2]
+    assert writer.stats()["errors"] == 0
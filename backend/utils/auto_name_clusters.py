@@ -1,64 +1,12 @@
 import os
 import json
-import re
+import sys
 
-# ---------------------------
-#  Category keyword mapping
-# ---------------------------
-CATEGORY_KEYWORDS = {
-    "confidentiality": [
-        "confidential", "nda", "non-disclosure", "privacy", "secret",
-        "proprietary information", "sensitive", "data", "information sharing"
-    ],
-    "liability": [
-        "liability", "indemnity", "indemnification", "damages",
-        "loss", "responsibility", "hold harmless"
-    ],
-    "termination": [
-        "terminate", "termination", "breach", "cancel", "expiry",
-        "suspend", "notice period"
-    ],
-    "payment": [
-        "payment", "invoice", "fees", "billing", "charges", "price",
-        "compensation", "cost"
-    ],
-    "governing law": [
-        "jurisdiction", "law", "governing", "arbitration", "venue",
-        "court", "dispute", "applicable law"
-    ],
-    "data protection": [
-        "gdpr", "data", "security", "processing", "breach",
-        "information security"
-    ],
-    "intellectual property": [
-        "intellectual", "ip", "patent", "copyright",
-        "ownership", "license"
-    ],
-    "representations": [
-        "representation", "warranty", "guarantee", "assure", "certify"
-    ],
-    "force majeure": [
-        "force majeure", "act of god", "disaster", "pandemic",
-        "unforeseeable"
-    ],
-    "audit": [
-        "audit", "inspection", "verify", "examination", "records"
-    ],
-    "compliance": [
-        "compliance", "regulation", "policy", "standards"
-    ],
-    "insurance": [
-        "insurance", "coverage", "insured", "policy"
-    ],
-    "assignment": [
-        "assign", "transfer", "delegate", "successor"
-    ],
-    "dispute resolution": [
-        "dispute", "arbitration", "litigation", "mediation",
-        "settlement"
-    ],
-    "miscellaneous": []
-}
+BASE = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, BASE)
+
+# Keyword table and single-pass matcher shared with the runtime keyword tier
+from services.keyword_matcher import CATEGORY_KEYWORDS, keyword_matcher  # noqa: E402
 
 # ---------------------------
 #  File Paths
@@ -108,10 +56,11 @@ def cluster_to_text(clauses):
 #  Guess category using keywords
 # ---------------------------
 def guess_category_from_text(text):
-    for category, keywords in CATEGORY_KEYWORDS.items():
-        for kw in keywords:
-            if re.search(rf"\b{re.escape(kw)}\b", text):
-                return category.title()
+    # one pass over the text for every keyword; table order breaks ties as before
+    hits = keyword_matcher.match(text)
+    for category in CATEGORY_KEYWORDS:
+        if category in hits:
+            return category.title()
     return "General / Miscellaneous"
 
 # ---------------------------
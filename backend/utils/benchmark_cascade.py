@@ -0,0 +1,181 @@
+# backend/utils/benchmark_cascade.py
+#
+# The classifier cascade (keyword rules -> serving encoder -> heavy encoder on
+# low-margin clauses) against running every clause through one encoder, on CUAD
+# answer spans (the dataset built by utils/ingest_cuad.py) plus the seed clauses,
+# or on synthetic clauses when the dataset is not there.
+#
+# Reported per mode: seconds, clauses/s, agreement with heavy-only labels and
+# accuracy against the labels the clauses come with (CUAD labels mapped to serving
+# categories through the cluster map, so approximate); for the cascade also the
+# share of clauses each tier settled.
+#
+# The embedding cache is switched off so every mode pays for its own encoding.
+#
+#   python utils/benchmark_cascade.py --limit 50 --json cascade.json
+#   CASCADE_ESCALATION_MARGIN=0.05 python utils/benchmark_cascade.py --clauses 2000
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+BASE = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, BASE)
+os.environ["EMBEDDING_CACHE_ITEMS"] = "0"
+os.environ["EMBEDDING_CACHE_DISK_PATH"] = ""
+
+from services import clause_service as cs  # noqa: E402
+from services.category_index import FALLBACK_CATEGORY, cuad_label_categories  # noqa: E402
+from services.cuad_dataset import CUAD_DATASET_DIR, open_cuad_dataset  # noqa: E402
+from services.segmenter import MAX_CLAUSE_CHARS, MIN_CLAUSE_CHARS  # noqa: E402
+
+parser = argparse.ArgumentParser(description="Benchmark the classifier cascade")
+parser.add_argument("--dataset", default=CUAD_DATASET_DIR)
+parser.add_argument("--seed", default=os.path.join(BASE, "data", "clauses.json"))
+parser.add_argument("--limit", type=int, default=50, help="CUAD contracts to use (0 = all)")
+parser.add_argument("--clauses", type=int, default=1000, help="synthetic clauses when there is no dataset")
+parser.add_argument("--batch-size", type=int, default=cs.STREAM_CHUNK_SIZE, help="clauses per cascade call")
+parser.add_argument("--json", help="write results to this file")
+args = parser.parse_args()
+
+SYNTHETIC = [
+    ("The Recipient shall keep all Confidential Information secret and shall not disclose it.", "Confidentiality"),
+    ("The Customer shall pay all fees within thirty (30) days of the invoice date.", "Payment"),
+    ("Either party may terminate this Agreement upon material breach by the other party.", "Termination"),
+    ("This Agreement shall be governed by the laws of the State of New York.", "Governing Law"),
+    ("The Supplier shall indemnify the Customer against all damages and hold it harmless.", "Liability"),
+    ("All intellectual property and copyright in the Deliverables vest in the Company.", "Intellectual Property"),
+    ("The Supplier shall maintain the records required for the Services at its premises.", None),
+    ("The parties shall cooperate in good faith to give effect to this Agreement.", None),
+]
+TAILS = ["", " in accordance with Section 12.3", " unless otherwise agreed in writing",
+         " subject to the limitations set forth herein"]
+
+
+def load_clauses():
+    """
+    [(clause, expected category or None)]
+    """
+    clauses = []
+    if os.path.exists(args.seed):
+        with open(args.seed, "r", encoding="utf-8") as f:
+            clauses += [(item["clause"], item.get("category")) for item in json.load(f)]
+
+    dataset = open_cuad_dataset(args.dataset)
+    if dataset is None:
+        print(f"⚠️ {args.dataset} not found — using {args.clauses} synthetic clauses")
+        rng = random.Random(0)
+        for _ in range(args.clauses):
+            text, category = rng.choice(SYNTHETIC)
+            clauses.append((text[:-1] + rng.choice(TAILS) + ".", category))
+        return clauses
+
+    label_categories = cuad_label_categories(cs.CATEGORIES)
+    for _, label, _, _, text in dataset.iter_answers(limit_contexts=args.limit):
+        text = " ".join(text.split())
+        if MIN_CLAUSE_CHARS <= len(text) <= MAX_CLAUSE_CHARS:
+            category = label_categories.get(label)
+            clauses.append((text, category if category != FALLBACK_CATEGORY else None))
+    return clauses
+
+
+def batches(items):
+    for start in range(0, len(items), args.batch_size):
+        yield items[start:start + args.batch_size]
+
+
+def run_single(model, model_name, index, texts):
+    """
+    Category per clause with every clause through one encoder.
+    """
+    labels = []
+    for batch in batches(texts):
+        vectors = cs.embedding_cache.encode(model, batch, model_name=model_name)
+        labels += cs.classify_embeddings(vectors, index=index)["best"].tolist()
+    return [cs.CATEGORIES[c] for c in labels]
+
+
+def run_cascade(texts):
+    labels, tiers = [], []
+    for batch in batches(texts):
+        details, _ = cs.cascade_classify(batch)
+        labels += [d["matched_category"] for d in details]
+        tiers += [d["classifier_tier"] for d in details]
+    return labels, tiers
+
+
+def timed(fn, *fn_args):
+    start = time.perf_counter()
+    out = fn(*fn_args)
+    return out, time.perf_counter() - start
+
+
+def score(labels, seconds):
+    row = {"seconds": round(seconds, 3), "clauses_per_s": round(len(labels) / seconds, 1) if seconds else None}
+    labelled = [(got, want) for got, want in zip(labels, expected) if want]
+    if labelled:
+        row["accuracy"] = round(sum(got == want for got, want in labelled) / len(labelled), 4)
+    if heavy_labels is not None:
+        row["agreement_with_heavy"] = round(float(np.mean([a == b for a, b in zip(labels, heavy_labels)])), 4)
+    return row
+
+
+clauses = load_clauses()
+if not clauses:
+    print("❌ No clauses to classify")
+    sys.exit(1)
+texts = [text for text, _ in clauses]
+expected = [category for _, category in clauses]
+print(f"📄 {len(texts)} clauses ({sum(1 for c in expected if c)} labelled), batches of {args.batch_size}")
+
+# load and warm every model outside the timings
+model, index = cs.get_model(), cs.get_category_index()
+cs.classify_embeddings(cs.embedding_cache.encode(model, texts[:2], model_name=cs.ENCODER_ID), index=index)
+heavy = cs.heavy_tier()
+if heavy is not None:
+    cs.embedding_cache.encode(heavy[0], texts[:2], model_name=cs.HEAVY_ENCODER_ID)
+else:
+    print("⚠️ Heavy tier off or unavailable (CASCADE_HEAVY_MODEL) — the cascade stops at the serving encoder")
+
+report = {
+    "clauses": len(texts),
+    "settings": {
+        "keyword_min_hits": cs.CASCADE_KEYWORD_MIN_HITS,
+        "escalation_margin": cs.CASCADE_ESCALATION_MARGIN,
+        "serving_encoder": cs.ENCODER_ID,
+        "heavy_encoder": cs.HEAVY_ENCODER_ID if heavy is not None else None,
+        "semantic_cache": cs.semantic_cache is not None,
+    },
+}
+
+heavy_labels = None
+if heavy is not None:
+    heavy_labels, seconds = timed(run_single, heavy[0], cs.HEAVY_ENCODER_ID, heavy[1], texts)
+    report["heavy_only"] = score(heavy_labels, seconds)
+
+labels, seconds = timed(run_single, model, cs.ENCODER_ID, index, texts)
+report["encoder_only"] = score(labels, seconds)
+
+(labels, tiers), seconds = timed(run_cascade, texts)
+report["cascade"] = score(labels, seconds)
+report["cascade"]["hit_rates"] = {tier: round(tiers.count(tier) / len(tiers), 4) for tier in cs.CASCADE_TIERS}
+keyword_rows = [(got, want) for got, want, tier in zip(labels, expected, tiers) if tier == cs.TIER_KEYWORD and want]
+if keyword_rows:
+    report["cascade"]["keyword_tier_accuracy"] = round(sum(g == w for g, w in keyword_rows) / len(keyword_rows), 4)
+
+for mode in ("heavy_only", "encoder_only"):
+    if mode in report and report["cascade"]["seconds"]:
+        report["cascade"][f"speedup_vs_{mode}"] = round(report[mode]["seconds"] / report["cascade"]["seconds"], 2)
+
+for mode in ("heavy_only", "encoder_only", "cascade"):
+    if mode in report:
+        print(f"📊 {mode}: {report[mode]}")
+
+if args.json:
+    with open(args.json, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Saved to {args.json}")
@@ -0,0 +1,75 @@
+# backend/utils/benchmark_encoders.py
+#
+# Clauses per second for each encoder backend on the same synthetic clauses.
+#   python utils/benchmark_encoders.py --clauses 2000 --backends torch onnx onnx-int8
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+BASE = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, BASE)
+
+from services.encoder_backend import BACKENDS, load_encoder  # noqa: E402
+
+parser = argparse.ArgumentParser(description="Benchmark encoder backends")
+parser.add_argument("--model", default="all-MiniLM-L6-v2")
+parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS)
+parser.add_argument("--clauses", type=int, default=1000)
+parser.add_argument("--batch-size", type=int, default=32)
+parser.add_argument("--repeats", type=int, default=3)
+parser.add_argument("--json", help="write results to this file")
+args = parser.parse_args()
+
+SUBJECTS = ["The Supplier", "The Customer", "Either party", "The Licensee", "The Company"]
+VERBS = ["shall indemnify", "may terminate", "shall pay", "shall not disclose", "shall maintain"]
+OBJECTS = [
+    "all fees set out in the applicable Statement of Work",
+    "the Agreement upon thirty (30) days prior written notice",
+    "any Confidential Information received from the other party",
+    "insurance coverage with reputable carriers at its own cost",
+    "the other party against all third-party claims arising from negligence",
+]
+TAILS = ["", " in accordance with Section 12.3", " unless otherwise agreed in writing",
+         " subject to the limitations set forth herein"]
+
+rng = random.Random(0)
+clauses = [
+    f"{rng.choice(SUBJECTS)} {rng.choice(VERBS)} {rng.choice(OBJECTS)}{rng.choice(TAILS)}."
+    for _ in range(args.clauses)
+]
+
+results = {}
+for backend in args.backends:
+    try:
+        encoder = load_encoder(args.model, backend)
+    except Exception as e:
+        print(f"⚠️ Skipping {backend}: {e}")
+        continue
+
+    encoder.encode(clauses[:args.batch_size], batch_size=args.batch_size)  # warmup
+
+    timings = []
+    for _ in range(args.repeats):
+        start = time.perf_counter()
+        encoder.encode(clauses, batch_size=args.batch_size)
+        timings.append(time.perf_counter() - start)
+
+    best = min(timings)
+    results[backend] = {
+        "clauses": len(clauses),
+        "best_seconds": round(best, 4),
+        "clauses_per_second": round(len(clauses) / best, 1),
+    }
+    print(f"⏱️ {backend:10s} {results[backend]['clauses_per_second']:>10.1f} clauses/s")
+
+if "torch" in results:
+    for backend, row in results.items():
+        row["speedup_vs_torch"] = round(row["clauses_per_second"] / results["torch"]["clauses_per_second"], 2)
+
+if args.json:
+    with open(args.json, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"💾 Results written to {args.json}")
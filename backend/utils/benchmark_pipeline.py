@@ -0,0 +1,433 @@
+# backend/utils/benchmark_pipeline.py
+#
+# Per-stage and end-to-end timings and peak memory of contract evaluation, on
+# synthetic and CUAD-derived contracts (the dataset built by utils/ingest_cuad.py)
+# of 1 / 10 / 100 / 1000 pages, as text, PDF and DOCX. Suggestions come from the
+# stub provider (LLM_PROVIDER=stub), so runs are offline and deterministic.
+#
+# Stages, each timed on its own over the same contract:
+#   segment     split_into_clauses
+#   encode      serving-encoder embeddings of every clause (model.encode behind the embedding cache)
+#   classify    classify_clauses on those embeddings (the batch form of analyze_clause)
+#   cascade     cascade_classify on every clause (keyword / encoder / heavy tiers)
+#   suggest     generate_clause_suggestions for the Medium / High risk clauses
+# and per input format:
+#   extract     reading the .txt, or PDF / DOCX text extraction (iter_document_pages)
+#   end_to_end  evaluate_contract on the text, evaluate_pages on the extracted file pages
+#
+# "seconds" is the fastest of --repeats runs. "peak_mb" is the tracemalloc peak of
+# one more run (Python and NumPy allocations; encoder tensors are not traced);
+# "max_rss_mb" is the process high-water mark at the end. The embedding,
+# suggestion and semantic caches are off so every run does the same work.
+#
+#   python utils/benchmark_pipeline.py --pages 1 10 100 --json bench.json
+#   python utils/benchmark_pipeline.py --json new.json --compare bench.json --threshold 0.2
+import argparse
+import hashlib
+import json
+import os
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+BASE = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, BASE)
+
+FORMATS = ("text", "pdf", "docx")
+STAGES = ("segment", "encode", "classify", "cascade", "suggest")
+
+parser = argparse.ArgumentParser(description="Benchmark every stage of contract evaluation")
+parser.add_argument("--pages", type=int, nargs="+", default=[1, 10, 100, 1000])
+parser.add_argument("--corpora", nargs="+", default=["synthetic", "cuad"], choices=["synthetic", "cuad"])
+parser.add_argument("--formats", nargs="+", default=list(FORMATS), choices=FORMATS)
+parser.add_argument("--dataset", default=None, help="CUAD dataset directory (default: data/cuad_dataset)")
+parser.add_argument("--page-chars", type=int, default=3000, help="characters per page")
+parser.add_argument("--repeats", type=int, default=3)
+parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc run")
+parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="stub provider delay per suggestion")
+parser.add_argument("--fixtures", default=os.path.join(BASE, "data", "benchmark_fixtures"))
+parser.add_argument("--json", help="write results to this file")
+parser.add_argument("--compare", help="earlier --json output to check for regressions")
+parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown / growth, as a fraction")
+parser.add_argument("--min-seconds", type=float, default=0.01, help="ignore time changes below this")
+parser.add_argument("--min-mb", type=float, default=1.0, help="ignore memory changes below this")
+args = parser.parse_args()
+
+# must be set before the services read their configuration
+os.environ["LLM_PROVIDER"] = "stub"
+os.environ["STUB_LATENCY_MS"] = str(args.llm_latency_ms)
+os.environ["EMBEDDING_CACHE_ITEMS"] = "0"
+os.environ["EMBEDDING_CACHE_DISK_PATH"] = ""
+os.environ["SUGGESTION_CACHE_ENABLED"] = "0"
+os.environ["SEMANTIC_CACHE_ENABLED"] = "0"
+
+from services import clause_service as cs  # noqa: E402
+from services.cuad_dataset import CUAD_DATASET_DIR, open_cuad_dataset  # noqa: E402
+from services.parser_service import iter_document_pages  # noqa: E402
+from services.suggestion_service import generate_clause_suggestions, needs_suggestion  # noqa: E402
+
+
+# =========================
+# Contracts
+# =========================
+
+PARTIES = ["the Supplier", "the Customer", "the Licensee", "the Company", "each party"]
+SECTIONS = {
+    "TERM AND TERMINATION": [
+        "Either party may terminate this Agreement upon {days} days written notice to the other party.",
+        "{Party} may terminate this Agreement immediately if the other party commits a material breach "
+        "that is not cured within {days} days.",
+        "Upon termination {party} shall return all materials received under Section {ref}.",
+    ],
+    "FEES AND PAYMENT": [
+        "{Party} shall pay all fees set out in Schedule {n} within {days} days of the invoice date.",
+        "Late payments shall bear interest at {n}.5% per month, e.g. on any amount overdue under Sec. {ref}.",
+        "All fees are exclusive of taxes, which {party} shall bear.",
+    ],
+    "CONFIDENTIALITY": [
+        "{Party} shall keep all Confidential Information secret and shall not disclose it to any third party "
+        "for {n} years.",
+        "The obligations in this Section {ref} survive termination of this Agreement.",
+    ],
+    "LIMITATION OF LIABILITY": [
+        "IN NO EVENT SHALL {PARTY} BE LIABLE FOR ANY INDIRECT OR CONSEQUENTIAL DAMAGES ARISING OUT OF "
+        "SECTION {ref}.",
+        "The total liability of {party} shall not exceed the fees paid in the {n} months before the claim.",
+        "{Party} shall indemnify and hold harmless the other party against all third-party claims under "
+        "Section {ref}.",
+    ],
+    "INTELLECTUAL PROPERTY": [
+        "All intellectual property rights in the Deliverables vest in {party} upon creation.",
+        "{Party} grants a non-exclusive license to use the Software for {n} years.",
+    ],
+    "GENERAL": [
+        "This Agreement shall be governed by the laws of the State of New York, U.S.A.",
+        "{Party} may not assign this Agreement without the prior written consent of the other party.",
+        "Any dispute arising under Section {ref} shall be referred to arbitration in London.",
+        "The parties shall cooperate in good faith to give effect to this Agreement.",
+    ],
+}
+
+
+def synthetic_contract(chars):
+    """
+    Numbered articles of varied boilerplate, about `chars` long; the same for the same length.
+    """
+    rng = random.Random(chars)
+    titles = list(SECTIONS)
+    parts = ["MASTER SERVICES AGREEMENT\n\nThis Agreement is entered into by Acme Corp. and Widget Inc.\n"]
+    size = len(parts[0])
+    article = 0
+    while size < chars:
+        article += 1
+        title = rng.choice(titles)
+        lines = [f"\nARTICLE {article}\n{title}\n"]
+        for clause_no in range(1, rng.randint(3, 7)):
+            party = rng.choice(PARTIES)
+            clause = rng.choice(SECTIONS[title]).format(
+                party=party, Party=party[0].upper() + party[1:], PARTY=party.upper(),
+                days=rng.choice([10, 15, 30, 45, 60, 90]), n=rng.randint(1, 12),
+                ref=f"{rng.randint(1, article)}.{rng.randint(1, 6)}",
+            )
+            lines.append(f"{article}.{clause_no} {clause}\n")
+        block = "".join(lines)
+        parts.append(block)
+        size += len(block)
+    return "".join(parts)
+
+
+def cuad_contract(dataset, chars):
+    """
+    CUAD contracts back to back (repeated when the corpus is shorter), cut to `chars`.
+    """
+    parts, size = [], 0
+    while size < chars:
+        added = False
+        for _, context in dataset.iter_contexts(0):
+            parts.append(context.strip() + "\n\n")
+            size += len(parts[-1])
+            added = True
+            if size >= chars:
+                break
+        if not added:
+            break
+    text = "".join(parts)[:chars]
+    cut = text.rfind("\n", chars // 2)
+    return text[:cut + 1] if cut > 0 else text
+
+
+def paginate(text, chars):
+    """
+    The text cut into pages of about `chars`, at line ends where possible.
+    """
+    pages, start = [], 0
+    while start < len(text):
+        end = min(len(text), start + chars)
+        if end < len(text):
+            cut = text.rfind("\n", start + chars // 2, end)
+            end = cut + 1 if cut > 0 else end
+        pages.append(text[start:end])
+        start = end
+    return pages
+
+
+# =========================
+# Fixture Files
+# =========================
+
+def write_pdf(path, pages):
+    import fitz
+
+    document = fitz.open()
+    for page_text in pages:
+        page = document.new_page()
+        rect = page.rect + (36, 36, -36, -36)
+        for fontsize in (8, 7, 6, 5, 4, 3):
+            if page.insert_textbox(rect, page_text, fontsize=fontsize) >= 0:
+                break
+    document.save(path, deflate=True)
+    document.close()
+
+
+def write_docx(path, pages):
+    import docx
+
+    document = docx.Document()
+    for number, page_text in enumerate(pages):
+        if number:
+            document.add_page_break()
+        for line in page_text.split("\n"):
+            if line.strip():
+                document.add_paragraph(line)
+    document.save(path)
+
+
+def write_text(path, pages):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("".join(pages))
+
+
+WRITERS = {"text": (".txt", write_text), "pdf": (".pdf", write_pdf), "docx": (".docx", write_docx)}
+
+
+def fixture(name, fmt, pages):
+    """
+    Path of the contract as a `fmt` file, written on first use; None if the writer is missing.
+    """
+    suffix, writer = WRITERS[fmt]
+    digest = hashlib.sha256("".join(pages).encode("utf-8")).hexdigest()[:10]
+    path = os.path.join(args.fixtures, f"{name.replace('/', '_')}_{digest}{suffix}")
+    if not os.path.exists(path):
+        os.makedirs(args.fixtures, exist_ok=True)
+        try:
+            writer(path + ".tmp", pages)
+        except ImportError as e:
+            print(f"⚠️ Skipping {fmt}: {e}")
+            return None
+        os.replace(path + ".tmp", path)
+    return path
+
+
+# =========================
+# Measurement
+# =========================
+
+def measure(fn):
+    """
+    ({"seconds", "median_seconds", "peak_mb"}, last result of fn).
+    """
+    timings = []
+    for _ in range(max(1, args.repeats)):
+        start = time.perf_counter()
+        out = fn()
+        timings.append(time.perf_counter() - start)
+    row = {"seconds": round(min(timings), 4), "median_seconds": round(statistics.median(timings), 4)}
+    if not args.no_memory:
+        tracemalloc.start()
+        try:
+            fn()
+            row["peak_mb"] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 2)
+        finally:
+            tracemalloc.stop()
+    return row, out
+
+
+def max_rss_mb():
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def read_text(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def extracted_text(path, fmt):
+    if fmt == "text":
+        return read_text(path)
+    return "".join(iter_document_pages(path, os.path.basename(path)))
+
+
+def evaluate_file(path, fmt):
+    if fmt == "text":
+        return cs.evaluate_contract(read_text(path), suggestion_budget=0)
+    return cs.evaluate_pages(iter_document_pages(path, os.path.basename(path)), suggestion_budget=0)
+
+
+def benchmark_contract(name, text):
+    pages = paginate(text, args.page_chars)
+    row = {"pages": len(pages), "chars": len(text), "stages": {}, "formats": {}}
+    stages = row["stages"]
+    model = cs.get_model()
+
+    stages["segment"], clauses = measure(lambda: cs.split_into_clauses(text))
+    stages["encode"], embeddings = measure(
+        lambda: cs.embedding_cache.encode(model, clauses, model_name=cs.ENCODER_ID)
+    )
+    stages["classify"], details = measure(lambda: cs.classify_clauses(clauses, embeddings))
+    stages["cascade"], cascade_details = measure(lambda: cs.cascade_classify(clauses)[0])
+    jobs = [
+        {"clause": d["sentence"], "category": d["matched_category"], "risk_level": d["risk_level"]}
+        for d in details if needs_suggestion(d["risk_level"])
+    ]
+    stages["suggest"], _ = measure(lambda: generate_clause_suggestions(jobs, time_budget=0))
+
+    row["clauses"] = len(clauses)
+    row["suggestions"] = len(jobs)
+    row["cascade_tiers"] = {
+        tier: sum(1 for d in cascade_details if d["classifier_tier"] == tier) for tier in cs.CASCADE_TIERS
+    }
+
+    for fmt in args.formats:
+        path = fixture(name, fmt, pages)
+        if path is None:
+            continue
+        result = row["formats"][fmt] = {"bytes": os.path.getsize(path)}
+        result["extract"], _ = measure(lambda: extracted_text(path, fmt))
+        result["end_to_end"], evaluated = measure(lambda: evaluate_file(path, fmt))
+        result["clauses"] = len(evaluated["details"])
+
+    return row
+
+
+# =========================
+# Regression Check
+# =========================
+
+def flatten(report):
+    """
+    "contract stage" -> timing row, for every stage and format in a report.
+    """
+    rows = {}
+    for name, contract in report.get("contracts", {}).items():
+        for stage, timing in contract.get("stages", {}).items():
+            rows[f"{name} {stage}"] = timing
+        for fmt, result in contract.get("formats", {}).items():
+            for stage in ("extract", "end_to_end"):
+                if stage in result:
+                    rows[f"{name} {fmt}.{stage}"] = result[stage]
+    return rows
+
+
+def find_regressions(current, baseline):
+    """
+    [(key, metric, baseline value, current value)] beyond --threshold and the noise floors.
+    """
+    floors = {"seconds": args.min_seconds, "peak_mb": args.min_mb}
+    base_rows = flatten(baseline)
+    regressions = []
+    for key, row in flatten(current).items():
+        base = base_rows.get(key)
+        if base is None:
+            continue
+        for metric, floor in floors.items():
+            if metric in row and base.get(metric):
+                was, now = base[metric], row[metric]
+                if now > was * (1 + args.threshold) and now - was > floor:
+                    regressions.append((key, metric, was, now))
+    return regressions
+
+
+# =========================
+# Run
+# =========================
+
+dataset = None
+if "cuad" in args.corpora:
+    dataset = open_cuad_dataset(args.dataset or CUAD_DATASET_DIR)
+    if dataset is None:
+        print(f"⚠️ {args.dataset or CUAD_DATASET_DIR} not found (utils/ingest_cuad.py) — skipping CUAD contracts")
+
+# load models, the index and the PDF / DOCX libraries outside the timings
+warmup = paginate(synthetic_contract(args.page_chars), args.page_chars)
+cs.evaluate_contract("".join(warmup), suggestion_budget=0)
+for fmt in list(args.formats):
+    path = fixture("warmup", fmt, warmup)
+    if path is None:
+        args.formats.remove(fmt)
+    else:
+        extracted_text(path, fmt)
+
+report = {
+    "meta": {
+        "commit": git_commit(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "evaluation_version": cs.evaluation_version(),
+        "page_chars": args.page_chars,
+        "repeats": args.repeats,
+        "llm_latency_ms": args.llm_latency_ms,
+    },
+    "contracts": {},
+}
+
+for corpus in args.corpora:
+    if corpus == "cuad" and dataset is None:
+        continue
+    for pages in args.pages:
+        name = f"{corpus}/{pages}p"
+        chars = pages * args.page_chars
+        text = synthetic_contract(chars) if corpus == "synthetic" else cuad_contract(dataset, chars)
+        if not text:
+            print(f"⚠️ No text for {name}")
+            continue
+        print(f"⏱️ {name}: {len(text)} chars")
+        row = report["contracts"][name] = benchmark_contract(name, text)
+        stage_times = ", ".join(f"{stage} {row['stages'][stage]['seconds']}s" for stage in STAGES)
+        print(f"📊 {name}: {row['clauses']} clauses, {row['suggestions']} suggestions — {stage_times}")
+        for fmt, result in row["formats"].items():
+            print(f"   {fmt}: extract {result['extract']['seconds']}s, end to end {result['end_to_end']['seconds']}s")
+
+report["max_rss_mb"] = max_rss_mb()
+print(f"💾 Peak RSS {report['max_rss_mb']} MB")
+
+if args.json:
+    with open(args.json, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Saved to {args.json}")
+
+if args.compare:
+    with open(args.compare, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = find_regressions(report, baseline)
+    print(f"🔍 Compared with {args.compare} (commit {baseline.get('meta', {}).get('commit')}), "
+          f"threshold {args.threshold:.0%}")
+    for key, metric, was, now in regressions:
+        print(f"❌ {key} {metric}: {was:g} -> {now:g} ({now / was - 1:+.0%})")
+    if regressions:
+        sys.exit(1)
+    print("✅ No regressions")
@@ -0,0 +1,141 @@
+# backend/utils/benchmark_reference_index.py
+#
+# Recall@k and query latency of the IVF search in services/reference_store.py
+# against exact brute-force search, over:
+#   --embeddings an embeddings artifact, e.g. data/artifacts/reference_embeddings
+#                (data/reference_embeddings.pt after utils/convert_reference_embeddings.py)
+#   --store      the vectors of a built reference store
+#   --synthetic  clustered random vectors at the given sizes (e.g. 10000,100000,1000000)
+# Queries are held out from the indexed rows (--queries of them) and lightly perturbed.
+#
+#   python utils/benchmark_reference_index.py --synthetic 10000,100000 --nprobe 1,4,8,16 --json ann.json
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+BASE = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, BASE)
+
+from services.artifact_store import Artifact  # noqa: E402
+from services.reference_store import ReferenceStore, default_nlist, write_reference_store  # noqa: E402
+
+parser = argparse.ArgumentParser(description="Benchmark the reference store's ANN index")
+parser.add_argument("--embeddings", help="embeddings artifact directory")
+parser.add_argument("--store", help="reference store directory")
+parser.add_argument("--synthetic", default="", help="comma-separated row counts")
+parser.add_argument("--dim", type=int, default=384, help="synthetic vector size")
+parser.add_argument("--queries", type=int, default=200)
+parser.add_argument("--k", type=int, default=10)
+parser.add_argument("--nprobe", default="1,4,8,16,32")
+parser.add_argument("--nlist", type=int, default=0, help="0 = default_nlist(n)")
+parser.add_argument("--json", help="write results to this file")
+args = parser.parse_args()
+
+
+def normalize(matrix):
+    return matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+
+
+def load_embeddings(directory):
+    return normalize(np.asarray(Artifact(directory).array("vectors"), dtype=np.float32))
+
+
+def synthetic(count, dim, tmp):
+    """
+    Gaussian clusters around random centres (embeddings are clustered, not uniform),
+    written to a float16 memmap in chunks.
+    """
+    rng = np.random.default_rng(0)
+    centres = normalize(rng.standard_normal((max(16, count // 500), dim)).astype(np.float32))
+    vectors = np.lib.format.open_memmap(os.path.join(tmp, f"synthetic_{count}.npy"), mode="w+",
+                                        dtype=np.float16, shape=(count, dim))
+    for start in range(0, count, 65536):
+        n = min(65536, count - start)
+        owners = rng.integers(0, len(centres), n)
+        noise = rng.standard_normal((n, dim)).astype(np.float32) * 0.6 / np.sqrt(dim)
+        vectors[start:start + n] = normalize(centres[owners] + noise)
+    vectors.flush()
+    return vectors
+
+
+def latency_ms(fn, queries):
+    """
+    Per-query latency (one query per call) and batched throughput.
+    """
+    single = []
+    for q in queries:
+        start = time.perf_counter()
+        fn(q[None, :])
+        single.append((time.perf_counter() - start) * 1000)
+    start = time.perf_counter()
+    fn(queries)
+    batch = (time.perf_counter() - start) * 1000
+    return {
+        "p50_ms": round(float(np.percentile(single, 50)), 3),
+        "p95_ms": round(float(np.percentile(single, 95)), 3),
+        "batch_ms_per_query": round(batch / len(queries), 3),
+    }
+
+
+def bench(name, vectors, tmp):
+    count = len(vectors)
+    rng = np.random.default_rng(1)
+    held_out = np.zeros(count, dtype=bool)
+    held_out[rng.choice(count, size=min(args.queries, count // 10), replace=False)] = True
+    queries = np.asarray(vectors[np.flatnonzero(held_out)], dtype=np.float32)
+    queries = normalize(queries + rng.standard_normal(queries.shape).astype(np.float32) * 0.01)
+    base = vectors[np.flatnonzero(~held_out)] if count <= 200000 else vectors  # big sets: queries stay indexed
+
+    directory = os.path.join(tmp, f"store_{name}")
+    nlist = args.nlist or max(default_nlist(len(base)), 16)
+    start = time.perf_counter()
+    manifest = write_reference_store(directory, base, "benchmark", nlist=nlist, source=name)
+    build_s = time.perf_counter() - start
+    store = ReferenceStore(directory)
+
+    _, exact = store.exact_search(queries, k=args.k)
+    result = {
+        "rows": len(base),
+        "dim": manifest["dim"],
+        "nlist": manifest["nlist"],
+        "build_s": round(build_s, 2),
+        "vectors_mb": round(os.path.getsize(os.path.join(directory, "vectors.npy")) / 1e6, 1),
+        "exact": latency_ms(lambda q: store.exact_search(q, k=args.k), queries),
+        "ivf": {},
+    }
+    print(f"📦 {name}: {result['rows']} x {result['dim']}, {result['nlist']} lists, built in {build_s:.1f}s, "
+          f"exact p50 {result['exact']['p50_ms']} ms")
+
+    for nprobe in [int(p) for p in args.nprobe.split(",")]:
+        _, approx = store.search(queries, k=args.k, nprobe=nprobe)
+        recall = np.mean([len(set(a) & set(e)) / args.k for a, e in zip(approx.tolist(), exact.tolist())])
+        timing = latency_ms(lambda q: store.search(q, k=args.k, nprobe=nprobe), queries)
+        result["ivf"][str(nprobe)] = {f"recall@{args.k}": round(float(recall), 4), **timing}
+        print(f"  nprobe {nprobe:>3}: recall@{args.k} {recall:.3f}, p50 {timing['p50_ms']} ms, "
+              f"p95 {timing['p95_ms']} ms, batched {timing['batch_ms_per_query']} ms/query")
+    return result
+
+
+report = {"k": args.k, "queries": args.queries, "datasets": {}}
+tmp = tempfile.mkdtemp()
+try:
+    if args.embeddings:
+        report["datasets"]["embeddings"] = bench("embeddings", load_embeddings(args.embeddings), tmp)
+    if args.store:
+        report["datasets"]["store"] = bench("store", ReferenceStore(args.store).vectors, tmp)
+    for count in [int(c) for c in args.synthetic.split(",") if c]:
+        report["datasets"][f"synthetic_{count}"] = bench(f"synthetic_{count}", synthetic(count, args.dim, tmp), tmp)
+finally:
+    shutil.rmtree(tmp, ignore_errors=True)
+
+if not report["datasets"]:
+    print("Nothing to benchmark: pass --embeddings, --store and/or --synthetic")
+if args.json:
+    with open(args.json, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
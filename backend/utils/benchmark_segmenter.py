@@ -0,0 +1,154 @@
+# backend/utils/benchmark_segmenter.py
+#
+# Throughput and fragment quality of the clause segmenter against the old
+# split-on-every-"." splitter, on CUAD contexts (the dataset built by
+# utils/ingest_cuad.py) or, when the dataset is not there, on a synthetic contract.
+#
+# Quality:
+#   short_share       fragments under 40 chars (headings, "Inc", "U.S" splinters)
+#   abbrev_cut_share  fragments cut right after an abbreviation or initial ("Acme Corp", "U")
+#   answers_intact    CUAD answer spans that fall inside a single clause
+#
+#   python utils/benchmark_segmenter.py --dataset data/cuad_dataset --limit 100 --json seg.json
+import argparse
+import json
+import os
+import sys
+import time
+
+BASE = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, BASE)
+
+from services.cuad_dataset import CUAD_DATASET_DIR, open_cuad_dataset  # noqa: E402
+from services.segmenter import ABBREVIATIONS, iter_segments, segment_text  # noqa: E402
+
+parser = argparse.ArgumentParser(description="Benchmark the clause segmenter")
+parser.add_argument("--dataset", default=CUAD_DATASET_DIR)
+parser.add_argument("--limit", type=int, default=0, help="contracts to use (0 = all)")
+parser.add_argument("--page-chars", type=int, default=3000, help="chunk size for the streaming check")
+parser.add_argument("--json", help="write results to this file")
+args = parser.parse_args()
+
+SYNTHETIC = """MASTER SERVICES AGREEMENT
+
+This Master Services Agreement is entered into by Acme Corp., a Delaware corporation, and Widget Inc. (the "Supplier"), e.g. for services in the U.S. and abroad.
+
+ARTICLE I
+DEFINITIONS
+
+1.1 "Services" means the services described in Exhibit A, as amended under Section 12.3 of this Agreement.
+1.2 "Fees" means the fees set out in Schedule 2. Fees are payable in U.S. dollars within 30 days.
+
+2. TERM AND TERMINATION
+
+2.1 This Agreement commences on the Effective Date and continues for three (3) years unless terminated
+earlier in accordance with this Section 2.
+2.2 Either party may terminate this Agreement:
+(a) upon thirty (30) days written notice to the other party;
+(b) immediately if the other party becomes insolvent; or
+(c) as otherwise provided in Sec. 4.
+
+3. LIMITATION OF LIABILITY
+IN NO EVENT SHALL EITHER PARTY BE LIABLE FOR ANY INDIRECT, INCIDENTAL, SPECIAL OR
+CONSEQUENTIAL DAMAGES ARISING OUT OF THIS AGREEMENT, WHETHER IN CONTRACT OR TORT.
+4. Governing Law. This Agreement shall be governed by the laws of the State of New York.
+"""
+
+
+def legacy_split(text):
+    return [p.strip() for p in text.replace("\n", " ").split(".") if len(p.strip()) > 25]
+
+
+def load_contracts():
+    """
+    [(context, [(answer_start, answer_text), ...])]
+    """
+    dataset = open_cuad_dataset(args.dataset)
+    if dataset is None:
+        print(f"⚠️ {args.dataset} not found — using a synthetic contract (no answer spans)")
+        return [(SYNTHETIC * 50, [])]
+
+    answers = {}
+    for context_id, _, start, _, text in dataset.iter_answers(limit_contexts=args.limit):
+        answers.setdefault(context_id, []).append((start, text))
+    return [(context, answers.get(context_id, [])) for context_id, context in dataset.iter_contexts(args.limit)]
+
+
+def abbrev_cut(fragment):
+    words = fragment.rstrip(".").split()
+    last = words[-1].lower().strip("(\"'") if words else ""
+    return last in ABBREVIATIONS or (len(last) == 1 and last.isalpha())
+
+
+def fragment_quality(fragments):
+    n = max(1, len(fragments))
+    return {
+        "fragments": len(fragments),
+        "short_share": round(sum(len(f) < 40 for f in fragments) / n, 4),
+        "abbrev_cut_share": round(sum(abbrev_cut(f) for f in fragments) / n, 4),
+        "mean_chars": round(sum(len(f) for f in fragments) / n, 1),
+    }
+
+
+def normalize(text):
+    return " ".join(text.split())
+
+
+contracts = load_contracts()
+total_chars = sum(len(c) for c, _ in contracts)
+print(f"📄 {len(contracts)} contracts, {total_chars / 1e6:.2f} M chars")
+
+report = {"contracts": len(contracts), "chars": total_chars}
+
+# ---------- Throughput ----------
+for name, fn in (("legacy", legacy_split), ("segmenter", segment_text)):
+    start = time.perf_counter()
+    for context, _ in contracts:
+        fn(context)
+    seconds = time.perf_counter() - start
+    report[f"{name}_mb_per_s"] = round(total_chars / 1e6 / seconds, 2)
+    print(f"⏱️ {name}: {seconds:.3f}s ({report[f'{name}_mb_per_s']} MB/s)")
+
+# ---------- Streaming equivalence ----------
+mismatches = 0
+for context, _ in contracts:
+    pages = (context[i:i + args.page_chars] for i in range(0, len(context), args.page_chars))
+    if list(iter_segments(pages)) != segment_text(context):
+        mismatches += 1
+report["streaming_mismatches"] = mismatches
+print(f"{'✅' if not mismatches else '❌'} chunked input ({args.page_chars} chars) matches whole-text: "
+      f"{len(contracts) - mismatches}/{len(contracts)}")
+
+# ---------- Fragment quality ----------
+legacy_fragments, new_fragments = [], []
+answers_total = legacy_intact = new_intact = 0
+for context, answers in contracts:
+    legacy = legacy_split(context)
+    segments = segment_text(context)
+    legacy_fragments.extend(legacy)
+    new_fragments.extend(s.text for s in segments)
+
+    if not answers:
+        continue
+    legacy_norm = [normalize(f) for f in legacy]
+    for answer_start, answer_text in answers:
+        answers_total += 1
+        answer_end = answer_start + len(answer_text)
+        if any(s.start <= answer_start and answer_end <= s.end for s in segments):
+            new_intact += 1
+        answer_norm = normalize(answer_text).rstrip(".")
+        if any(answer_norm in f for f in legacy_norm):
+            legacy_intact += 1
+
+report["legacy"] = fragment_quality(legacy_fragments)
+report["segmenter"] = fragment_quality(new_fragments)
+if answers_total:
+    report["legacy"]["answers_intact"] = round(legacy_intact / answers_total, 4)
+    report["segmenter"]["answers_intact"] = round(new_intact / answers_total, 4)
+
+for name in ("legacy", "segmenter"):
+    print(f"📊 {name}: {report[name]}")
+
+if args.json:
+    with open(args.json, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
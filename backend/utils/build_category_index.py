@@ -0,0 +1,34 @@
+# backend/utils/build_category_index.py
+import os
+import sys
+
+from sentence_transformers import SentenceTransformer
+
+BASE = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, BASE)
+
+from services.category_index import build_category_index, index_path_for  # noqa: E402
+
+MODEL_NAME = os.getenv("CATEGORY_INDEX_MODEL", "all-MiniLM-L6-v2")
+
+# Keep in sync with CATEGORIES in services/clause_service.py (importing it loads the model)
+CATEGORIES = [
+    "Intellectual Property",
+    "Liability",
+    "Payment",
+    "Termination",
+    "Confidentiality",
+    "Governing Law",
+    "General / Miscellaneous",
+]
+
+print(f"🔹 Loading serving model {MODEL_NAME}...")
+model = SentenceTransformer(MODEL_NAME)
+
+index = build_category_index(model, MODEL_NAME, CATEGORIES)
+out_path = index_path_for(MODEL_NAME)
+index.save(out_path)  # artifact directory: prototypes.npy, owners.npy, manifest.json
+
+print(f"✅ Saved {len(index.prototypes)} prototypes for {len(CATEGORIES)} categories to {out_path}")
+for idx, cat in enumerate(CATEGORIES):
+    print(f"  {cat}: {int((index.owners == idx).sum())} prototypes")
@@ -1,70 +1,57 @@
 # backend/utils/build_cluster_centroids.py
+#
+# Builds the cluster centroid artifact (data/artifacts/cluster_centroids/) served
+# by services/cluster_classifier.py: one centroid per cluster of
+# auto_category_map.json, embedded with the serving encoder (not LegalBERT, whose
+# 768-d space the runtime cannot compare against), with the coarse category from
+# cluster_labels.json and a fine-grained label.
+#
+#   python utils/build_cluster_centroids.py           # build data/artifacts/cluster_centroids
+#   python utils/build_cluster_centroids.py --check   # exit 1 if the artifact does not
+#                                                     # match the serving encoder (deploy step)
+import argparse
 import os
-import json
-import pickle
-from sentence_transformers import SentenceTransformer
-import numpy as np
+import sys
 
-# Paths
 BASE = os.path.join(os.path.dirname(__file__), "..")
-DATA_DIR = os.path.join(BASE, "data")
-CLUSTERS_PATH = os.path.join(DATA_DIR, "auto_category_map.json")
-LABELS_PATH = os.path.join(DATA_DIR, "cluster_labels.json")
-OUT_PATH = os.path.join(DATA_DIR, "cluster_centroids.pkl")
-
-# Check files
-if not os.path.exists(CLUSTERS_PATH):
-    raise FileNotFoundError(f"Missing {CLUSTERS_PATH}")
-if not os.path.exists(LABELS_PATH):
-    raise FileNotFoundError(f"Missing {LABELS_PATH}")
-
-# Load resources
-with open(CLUSTERS_PATH, "r", encoding="utf-8") as f:
-    clusters = json.load(f)
-
-with open(LABELS_PATH, "r", encoding="utf-8") as f:
-    cluster_labels = json.load(f)
-
-print("🔹 Loading LegalBERT model (this may take a moment)...")
-model = SentenceTransformer("nlpaueb/legal-bert-base-uncased")
-
-centroids = {}
-print("📌 Computing centroids for clusters:", len(clusters))
-for cid, items in clusters.items():
-    # items may be list[str] or list[dict]; normalize to text list
-    texts = []
-    if isinstance(items, dict):
-        items = list(items.values())
-    for it in items:
-        if isinstance(it, str):
-            texts.append(it)
-        elif isinstance(it, dict):
-            # common keys
-            if "clause_text" in it:
-                texts.append(it["clause_text"])
-            elif "clause" in it:
-                texts.append(it["clause"])
-            elif "text" in it:
-                texts.append(it["text"])
-            else:
-                texts.append(str(it))
-        else:
-            texts.append(str(it))
-
-    if not texts:
-        print(f"⚠️ Cluster {cid} empty, skipping")
-        continue
-
-    # embed in batches to avoid memory spikes
-    embeddings = model.encode(texts, convert_to_numpy=True, show_progress_bar=False, batch_size=32)
-    centroid = np.mean(embeddings, axis=0)
-    centroids[str(cid)] = centroid
-
-# Dump centroids + labels
-with open(OUT_PATH, "wb") as f:
-    pickle.dump({
-        "centroids": centroids,          # dict cid -> numpy array
-        "labels": cluster_labels         # dict cid -> human label
-    }, f)
-
-print(f"✅ Saved cluster centroids and labels to {OUT_PATH}")
+sys.path.insert(0, BASE)
+
+from services.artifact_store import ArtifactMismatch  # noqa: E402
+from services.cluster_classifier import (  # noqa: E402
+    CLUSTER_CENTROIDS_PATH,
+    build_cluster_classifier,
+    verify_cluster_artifact,
+)
+from services.clause_service import ENCODER_ID, MODEL_NAME  # noqa: E402
+from services.encoder_backend import load_encoder  # noqa: E402
+
+parser = argparse.ArgumentParser(description="Build or check the cluster centroid artifact")
+parser.add_argument("--out", default=CLUSTER_CENTROIDS_PATH)
+parser.add_argument("--check", action="store_true", help="only verify the existing artifact")
+args = parser.parse_args()
+
+if args.check:
+    try:
+        manifest = verify_cluster_artifact(ENCODER_ID, args.out)
+    except ArtifactMismatch as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    if manifest is None:
+        print(f"❌ {args.out} does not exist")
+        sys.exit(1)
+    print(f"✅ {args.out}: {len(manifest['meta']['cluster_ids'])} clusters, {manifest['dim']}-d {manifest['dtype']}, "
+          f"built for {manifest['encoder_id']} at {manifest['built_at']}")
+    sys.exit(0)
+
+print(f"🔹 Loading serving encoder {MODEL_NAME}...")
+model = load_encoder(MODEL_NAME)
+
+classifier = build_cluster_classifier(model, ENCODER_ID)
+if classifier is None:
+    print("❌ auto_category_map.json / cluster_labels.json not found")
+    sys.exit(1)
+classifier.save(args.out)
+
+print(f"✅ Saved {len(classifier.cluster_ids)} cluster centroids for {ENCODER_ID} to {args.out}")
+for cluster_id, category, label in zip(classifier.cluster_ids, classifier.categories, classifier.labels):
+    print(f"  {cluster_id}: {category} — {label}")
@@ -0,0 +1,109 @@
+# backend/utils/build_reference_store.py
+#
+# Builds the precedent store read by services/reference_store.py: CUAD answer spans
+# (the dataset built by utils/ingest_cuad.py) plus the labelled seed clauses of
+# data/clauses.json, encoded with the serving encoder and indexed with IVF.
+#
+# CUAD labels ("Cap On Liability", ...) map to serving categories through the
+# clustered question map the category index is built from (auto_category_map.json
+# + cluster_labels.json); risk levels come from CATEGORY_RISK_MAP.
+#
+# data/reference_embeddings.pt is not used here: it holds 768-d vectors without texts
+# or labels, from a different encoder than the serving one. Converted with
+# utils/convert_reference_embeddings.py it is a benchmark input for
+# utils/benchmark_reference_index.py.
+#
+#   python utils/build_reference_store.py --dataset data/cuad_dataset
+#   python utils/build_reference_store.py --limit 50 --nlist 64      # quick local build
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+BASE = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, BASE)
+
+from services.category_index import FALLBACK_CATEGORY, cuad_label_categories  # noqa: E402
+from services.clause_service import CATEGORIES, CATEGORY_RISK_MAP, ENCODER_ID, MODEL_NAME, normalize_risk  # noqa: E402
+from services.artifact_store import file_digest  # noqa: E402
+from services.cuad_dataset import CUAD_DATASET_DIR, open_cuad_dataset  # noqa: E402
+from services.encoder_backend import load_encoder  # noqa: E402
+from services.reference_store import REFERENCE_STORE_DIR, write_reference_store  # noqa: E402
+from services.segmenter import MAX_CLAUSE_CHARS, MIN_CLAUSE_CHARS  # noqa: E402
+
+parser = argparse.ArgumentParser(description="Build the precedent reference store")
+parser.add_argument("--dataset", default=CUAD_DATASET_DIR)
+parser.add_argument("--seed", default=os.path.join(BASE, "data", "clauses.json"))
+parser.add_argument("--out", default=REFERENCE_STORE_DIR)
+parser.add_argument("--limit", type=int, default=0, help="CUAD contracts to use (0 = all)")
+parser.add_argument("--nlist", type=int, default=0, help="inverted lists (0 = 4 * sqrt(n), 1 = exact)")
+parser.add_argument("--batch-size", type=int, default=256)
+args = parser.parse_args()
+
+
+def risk_for(category):
+    return normalize_risk(CATEGORY_RISK_MAP.get(category, "Low"))
+
+
+texts, categories, risks, labels = [], [], [], []
+seen = set()
+
+
+def add(text, category, risk, label):
+    text = " ".join(text.split())[:MAX_CLAUSE_CHARS]
+    key = text.lower()
+    if len(text) <= MIN_CLAUSE_CHARS or key in seen:
+        return
+    seen.add(key)
+    texts.append(text)
+    categories.append(category)
+    risks.append(risk)
+    labels.append(label)
+
+
+if os.path.exists(args.seed):
+    with open(args.seed, "r", encoding="utf-8") as f:
+        for item in json.load(f):
+            add(item["clause"], item["category"], normalize_risk(item["risk_level"]), "seed")
+
+dataset = open_cuad_dataset(args.dataset)
+if dataset is not None:
+    label_categories = cuad_label_categories(CATEGORIES)
+    for _, label, _, _, text in dataset.iter_answers(limit_contexts=args.limit):
+        category = label_categories.get(label, FALLBACK_CATEGORY)
+        add(text, category, risk_for(category), label)
+else:
+    print(f"⚠️ {args.dataset} not found (utils/ingest_cuad.py) — building from the seed clauses only")
+
+if not texts:
+    print("❌ No reference clauses found")
+    sys.exit(1)
+print(f"📄 {len(texts)} reference clauses, {len(set(labels))} labels")
+
+encoder = load_encoder(MODEL_NAME)
+dim = encoder.get_sentence_embedding_dimension()
+
+# embeddings go to a float16 memmap as they are produced, never all in RAM as float32
+with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(args.out))) as tmp:
+    vectors = np.lib.format.open_memmap(
+        os.path.join(tmp, "vectors.npy"), mode="w+", dtype=np.float16, shape=(len(texts), dim)
+    )
+    for start in range(0, len(texts), args.batch_size):
+        batch = texts[start:start + args.batch_size]
+        vectors[start:start + len(batch)] = encoder.encode(batch, normalize_embeddings=True)
+        print(f"🔹 encoded {start + len(batch)}/{len(texts)}", end="\r")
+    print()
+    vectors.flush()
+
+    manifest = write_reference_store(
+        args.out, vectors, ENCODER_ID,
+        texts=texts, categories=categories, risk_levels=risks, labels=labels,
+        nlist=args.nlist or None, source=dataset.manifest["source"] if dataset is not None else "seed",
+        dataset_hash=file_digest([os.path.join(args.dataset, "manifest.json"), args.seed], extra=str(args.limit)),
+    )
+    del vectors
+
+print(f"✅ Saved {manifest['count']} clauses ({manifest['nlist']} lists, version {manifest['version']}) to {args.out}")
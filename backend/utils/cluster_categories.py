@@ -1,45 +1,330 @@
 # utils/cluster_categories.py
-import pandas as pd
-from sentence_transformers import SentenceTransformer
-from sklearn.cluster import KMeans
+#
+# Offline clustering of the CUAD clause corpus, in resumable stages. Every stage
+# writes its output into --workdir and is skipped when that output already exists,
+# so an interrupted run picks up where it stopped:
+#
+#   1. dedupe   read the contract texts (or answer spans) column of the CUAD dataset
+#               (utils/ingest_cuad.py; a CSV is read in chunks), keep each distinct
+#               text once -> texts.jsonl, row_unique.npy
+#   2. embed    encode unique texts in shards on a process pool -> shards/NNNNN.npy
+#               (float16; each shard is written to a temp file and renamed, so a
+#               finished shard is a checkpoint)
+#   3. kmeans   mini-batch k-means streamed over the memory-mapped shards,
+#               checkpointed after every shard -> kmeans.npz
+#   4. assign   nearest centre per text -> data/cluster_assignments.npz (int16 / int32
+#               arrays) and auto_category_map.json with only the --examples texts
+#               closest to each centre
+# Wall time and peak RSS per stage go to report.json.
+#
+#   python utils/cluster_categories.py --clusters 20 --workers 4
+#   python utils/cluster_categories.py --restart          # discard the workdir first
+import argparse
+import hashlib
 import json
 import os
+import resource
+import shutil
+import sys
+import time
 
-print("🔹 Loading LegalBERT embeddings model...")
-model = SentenceTransformer("nlpaueb/legal-bert-base-uncased")
+import numpy as np
 
-DATA_PATH = os.path.join(os.path.dirname(__file__), "../data/legal_clauses.pkl")
-OUTPUT_PATH = os.path.join(os.path.dirname(__file__), "../data/auto_category_map.json")
+BASE = os.path.join(os.path.dirname(__file__), "..")
+DATA_DIR = os.path.join(BASE, "data")
+sys.path.insert(0, BASE)
 
-print(f"📖 Loading dataset: {DATA_PATH}")
-df = pd.read_pickle(DATA_PATH)
+from services.cuad_dataset import CuadDataset  # noqa: E402
 
-# ✅ Use correct column names
-clauses = df["clause_text"].dropna().tolist()
-categories = df["category"].dropna().tolist()
 
-print(f"📄 Total clauses: {len(clauses)}")
+def parse_args():
+    parser = argparse.ArgumentParser(description="Cluster CUAD clauses (resumable)")
+    parser.add_argument("--input", default=os.path.join(DATA_DIR, "cuad_dataset"),
+                        help="CUAD dataset directory from utils/ingest_cuad.py, or a CSV")
+    parser.add_argument("--text-column", default="context",
+                        help="dataset: context or answer; CSV: a column name")
+    parser.add_argument("--workdir", default=os.path.join(DATA_DIR, "clustering"))
+    parser.add_argument("--model", default="nlpaueb/legal-bert-base-uncased")
+    parser.add_argument("--clusters", type=int, default=20)
+    parser.add_argument("--shard-size", type=int, default=2048, help="texts per embedding shard")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 1) // 2))
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--epochs", type=int, default=3, help="k-means passes over the shards")
+    parser.add_argument("--examples", type=int, default=20, help="texts per cluster in auto_category_map.json")
+    parser.add_argument("--map-out", default=os.path.join(DATA_DIR, "auto_category_map.json"))
+    parser.add_argument("--assignments-out", default=os.path.join(DATA_DIR, "cluster_assignments.npz"))
+    parser.add_argument("--restart", action="store_true", help="delete the workdir and start over")
+    return parser.parse_args()
 
-# 🔹 Embed all clauses using LegalBERT
-embeddings = model.encode(clauses, show_progress_bar=True)
 
-# 🔹 Cluster clauses into 20 groups (you can tune this)
-n_clusters = 20
-print(f"🔍 Clustering into {n_clusters} categories...")
-kmeans = KMeans(n_clusters=n_clusters, random_state=42)
-kmeans.fit(embeddings)
+def peak_rss_mb() -> float:
+    # ru_maxrss is KB on Linux; children = the embedding workers
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return round(max(own, children) / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
 
-# Map cluster labels back to clauses and categories
-cluster_map = {}
-for i, label in enumerate(kmeans.labels_):
-    cluster_map.setdefault(int(label), []).append({
-        "clause_text": clauses[i],
-        "category": categories[i],
-        "risk_level": df.iloc[i]["risk_level"]
-    })
 
-# Save to JSON
-with open(OUTPUT_PATH, "w") as f:
-    json.dump(cluster_map, f, indent=2)
+def atomic_save(path: str, array: np.ndarray):
+    tmp = path + ".tmp.npy"
+    np.save(tmp, array)
+    os.replace(tmp, path)
 
-print(f"✅ Clustered data saved to {OUTPUT_PATH}")
+
+# =========================
+# 1. Dedupe
+# =========================
+
+def iter_texts(path: str, column: str):
+    if os.path.isdir(path):
+        dataset = CuadDataset(path)
+        if column == "answer":
+            yield from (text for _, _, _, _, text in dataset.iter_answers())
+        else:
+            yield from (text for _, text in dataset.iter_contexts())
+    else:
+        import pandas as pd
+
+        for chunk in pd.read_csv(path, usecols=[column], chunksize=20000):
+            yield from chunk[column].fillna("").astype(str)
+
+
+def dedupe(args, workdir):
+    """
+    Identical texts (repeated answer spans, CSV rows repeating a context) are embedded once.
+    """
+    texts_path = os.path.join(workdir, "texts.jsonl")
+    row_unique_path = os.path.join(workdir, "row_unique.npy")
+    if os.path.exists(row_unique_path):
+        return None
+
+    source = args.input
+    if not os.path.exists(source):
+        raise SystemExit(f"❌ {source} not found — run utils/ingest_cuad.py first")
+    print(f"📖 Reading {args.text_column} from {source}")
+
+    seen = {}
+    row_unique = []
+    with open(texts_path + ".tmp", "w", encoding="utf-8") as out:
+        for text in iter_texts(source, args.text_column):
+            key = hashlib.sha1(" ".join(text.split()).encode("utf-8")).digest()
+            idx = seen.get(key)
+            if idx is None:
+                idx = seen[key] = len(seen)
+                out.write(json.dumps(text, ensure_ascii=False) + "\n")
+            row_unique.append(idx)
+    os.replace(texts_path + ".tmp", texts_path)
+    atomic_save(row_unique_path, np.array(row_unique, dtype=np.int32))
+    return {"rows": len(row_unique), "unique": len(seen)}
+
+
+def load_texts(workdir):
+    with open(os.path.join(workdir, "texts.jsonl"), "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+# =========================
+# 2. Embed
+# =========================
+
+_encoder = None
+
+
+def init_worker(model_name: str, threads: int):
+    global _encoder
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    torch.set_num_threads(threads)
+    _encoder = SentenceTransformer(model_name)
+
+
+def embed_shard(task):
+    shard_path, texts, batch_size = task
+    vectors = _encoder.encode(texts, batch_size=batch_size, convert_to_numpy=True, show_progress_bar=False)
+    atomic_save(shard_path, vectors.astype(np.float16))
+    return shard_path
+
+
+def shard_path(workdir, shard: int) -> str:
+    return os.path.join(workdir, "shards", f"{shard:05d}.npy")
+
+
+def embed(args, workdir, texts):
+    import multiprocessing
+
+    os.makedirs(os.path.join(workdir, "shards"), exist_ok=True)
+    n_shards = (len(texts) + args.shard_size - 1) // args.shard_size
+    pending = [s for s in range(n_shards) if not os.path.exists(shard_path(workdir, s))]
+    if not pending:
+        return None
+    print(f"🔹 Embedding {len(pending)}/{n_shards} shards with {args.workers} workers ({args.model})")
+
+    tasks = (
+        (shard_path(workdir, s), texts[s * args.shard_size:(s + 1) * args.shard_size], args.batch_size)
+        for s in pending
+    )
+    threads = max(1, (os.cpu_count() or 1) // args.workers)
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(args.workers, initializer=init_worker, initargs=(args.model, threads)) as pool:
+        for done, _ in enumerate(pool.imap_unordered(embed_shard, tasks), start=1):
+            print(f"  {done}/{len(pending)} shards", end="\r")
+    print()
+    return {"shards": n_shards, "embedded": len(pending)}
+
+
+def iter_shards(workdir, n_shards):
+    for s in range(n_shards):
+        yield s, np.load(shard_path(workdir, s), mmap_mode="r")
+
+
+# =========================
+# 3. Mini-batch k-means
+# =========================
+
+def assign(batch: np.ndarray, centers: np.ndarray):
+    """
+    Nearest centre (euclidean) and squared distance per row.
+    """
+    dists = (batch ** 2).sum(axis=1, keepdims=True) - 2 * batch @ centers.T + (centers ** 2).sum(axis=1)
+    labels = np.argmin(dists, axis=1)
+    return labels, np.maximum(dists[np.arange(len(batch)), labels], 0)
+
+
+def kmeans_plus_plus(sample: np.ndarray, k: int, rng) -> np.ndarray:
+    centers = [sample[rng.integers(len(sample))]]
+    closest = ((sample - centers[0]) ** 2).sum(axis=1)
+    for _ in range(1, k):
+        probs = closest / closest.sum() if closest.sum() > 0 else None
+        centers.append(sample[rng.choice(len(sample), p=probs)])
+        closest = np.minimum(closest, ((sample - centers[-1]) ** 2).sum(axis=1))
+    return np.array(centers, dtype=np.float32)
+
+
+def minibatch_kmeans(args, workdir, n_shards):
+    """
+    Each shard is one mini-batch: centres move to the running mean of every row
+    assigned to them so far (per-centre learning rate 1 / count).
+    """
+    checkpoint = os.path.join(workdir, "kmeans.npz")
+    rng = np.random.default_rng(0)
+    if os.path.exists(checkpoint):
+        with np.load(checkpoint) as state:
+            centers, counts = state["centers"], state["counts"]
+            epoch, next_shard = int(state["epoch"]), int(state["next_shard"])
+        if epoch >= args.epochs:
+            return None
+        print(f"↩️ Resuming k-means at epoch {epoch + 1}, shard {next_shard}")
+    else:
+        first = np.asarray(np.load(shard_path(workdir, 0), mmap_mode="r"), dtype=np.float32)
+        centers = kmeans_plus_plus(first, min(args.clusters, len(first)), rng)
+        counts = np.zeros(len(centers), dtype=np.int64)
+        epoch, next_shard = 0, 0
+
+    inertia = 0.0
+    while epoch < args.epochs:
+        inertia = 0.0
+        for s, shard in iter_shards(workdir, n_shards):
+            if s < next_shard:
+                continue
+            batch = np.asarray(shard, dtype=np.float32)
+            labels, dists = assign(batch, centers)
+            inertia += float(dists.sum())
+
+            batch_counts = np.bincount(labels, minlength=len(centers))
+            sums = np.zeros_like(centers)
+            np.add.at(sums, labels, batch)
+            hit = batch_counts > 0
+            total = counts[hit] + batch_counts[hit]
+            centers[hit] = (centers[hit] * counts[hit, None] + sums[hit]) / total[:, None]
+            counts[hit] = total
+
+            np.savez(checkpoint + ".tmp.npz", centers=centers, counts=counts,
+                     epoch=epoch, next_shard=s + 1)
+            os.replace(checkpoint + ".tmp.npz", checkpoint)
+        epoch, next_shard = epoch + 1, 0
+        np.savez(checkpoint + ".tmp.npz", centers=centers, counts=counts, epoch=epoch, next_shard=0)
+        os.replace(checkpoint + ".tmp.npz", checkpoint)
+        print(f"  epoch {epoch}/{args.epochs}: inertia {inertia:.1f}")
+    return {"epochs": args.epochs, "inertia": round(inertia, 2)}
+
+
+# =========================
+# 4. Assign
+# =========================
+
+def write_outputs(args, workdir, texts, n_shards):
+    with np.load(os.path.join(workdir, "kmeans.npz")) as state:
+        centers = state["centers"]
+
+    unique_cluster = np.empty(len(texts), dtype=np.int16)
+    unique_dist = np.empty(len(texts), dtype=np.float32)
+    for s, shard in iter_shards(workdir, n_shards):
+        start = s * args.shard_size
+        labels, dists = assign(np.asarray(shard, dtype=np.float32), centers)
+        unique_cluster[start:start + len(labels)] = labels
+        unique_dist[start:start + len(labels)] = dists
+
+    row_unique = np.load(os.path.join(workdir, "row_unique.npy"))
+    np.savez_compressed(
+        args.assignments_out,
+        row_cluster=unique_cluster[row_unique],   # cluster of every input row
+        row_unique=row_unique,                    # row -> distinct text (workdir/texts.jsonl)
+        unique_cluster=unique_cluster,
+        centers=centers.astype(np.float32),
+    )
+
+    # representative texts only: the closest to each centre
+    cluster_map = {}
+    for cluster in range(len(centers)):
+        members = np.flatnonzero(unique_cluster == cluster)
+        closest = members[np.argsort(unique_dist[members])[:args.examples]]
+        cluster_map[str(cluster)] = [texts[i] for i in closest.tolist()]
+    with open(args.map_out, "w", encoding="utf-8") as f:
+        json.dump(cluster_map, f, indent=2, ensure_ascii=False)
+
+    sizes = np.bincount(unique_cluster, minlength=len(centers))
+    return {"clusters": len(centers), "largest": int(sizes.max()), "smallest": int(sizes.min())}
+
+
+# =========================
+# Main
+# =========================
+
+def main():
+    args = parse_args()
+    workdir = args.workdir
+    if args.restart:
+        shutil.rmtree(workdir, ignore_errors=True)
+    os.makedirs(workdir, exist_ok=True)
+
+    report_path = os.path.join(workdir, "report.json")
+    report = {"stages": {}}
+    started = time.perf_counter()
+
+    def stage(name, fn, *fn_args):
+        t0 = time.perf_counter()
+        info = fn(*fn_args)
+        report["stages"][name] = {
+            "seconds": round(time.perf_counter() - t0, 2),
+            "peak_rss_mb": peak_rss_mb(),
+            **({"skipped": True} if info is None else info),
+        }
+        print(f"✅ {name}: {report['stages'][name]}")
+
+    stage("dedupe", dedupe, args, workdir)
+    texts = load_texts(workdir)
+    n_shards = (len(texts) + args.shard_size - 1) // args.shard_size
+    stage("embed", embed, args, workdir, texts)
+    stage("kmeans", minibatch_kmeans, args, workdir, n_shards)
+    stage("assign", write_outputs, args, workdir, texts, n_shards)
+
+    report["wall_seconds"] = round(time.perf_counter() - started, 2)
+    report["peak_rss_mb"] = peak_rss_mb()
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"⏱️ {report['wall_seconds']}s wall, peak RSS {report['peak_rss_mb']} MB — report in {report_path}")
+    print(f"💾 {args.assignments_out}, {args.map_out}")
+
+
+if __name__ == "__main__":
+    main()
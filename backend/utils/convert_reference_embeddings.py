@@ -0,0 +1,43 @@
+# backend/utils/convert_reference_embeddings.py
+#
+# One-off conversion of data/reference_embeddings.pt (a torch zip pickle) into an
+# embeddings artifact: vectors.npy + manifest.json under data/artifacts/. This is
+# the only place the .pt file is read (torch.load with weights_only=True); after
+# it, consumers memory-map the .npy instead.
+#
+# The .pt file does not record its encoder, so it is passed explicitly.
+#
+#   python utils/convert_reference_embeddings.py --encoder-id nlpaueb/legal-bert-base-uncased
+import argparse
+import os
+import sys
+
+BASE = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, BASE)
+
+from services.artifact_store import ARTIFACTS_DIR, file_digest, write_artifact  # noqa: E402
+
+EMBEDDINGS_FORMAT_VERSION = 1
+
+parser = argparse.ArgumentParser(description="Convert a torch embedding tensor into an artifact")
+parser.add_argument("--pt", default=os.path.join(BASE, "data", "reference_embeddings.pt"))
+parser.add_argument("--out", default=os.path.join(ARTIFACTS_DIR, "reference_embeddings"))
+parser.add_argument("--encoder-id", required=True, help="encoder the vectors were produced with")
+parser.add_argument("--dtype", default="float32", choices=["float32", "float16"])
+args = parser.parse_args()
+
+import torch  # noqa: E402
+
+tensor = torch.load(args.pt, map_location="cpu", weights_only=True)
+if isinstance(tensor, dict):
+    tensor = next(v for v in tensor.values() if hasattr(v, "numpy"))
+vectors = tensor.float().numpy().astype(args.dtype)
+
+manifest = write_artifact(
+    args.out, "embeddings", EMBEDDINGS_FORMAT_VERSION, {"vectors": vectors},
+    encoder_id=args.encoder_id,
+    dataset_hash=file_digest([args.pt]),
+    meta={"source": os.path.basename(args.pt)},
+    primary="vectors",
+)
+print(f"✅ {vectors.shape[0]} x {manifest['dim']} {manifest['dtype']} vectors for {args.encoder_id} saved to {args.out}")
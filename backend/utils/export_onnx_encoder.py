@@ -0,0 +1,137 @@
+# backend/utils/export_onnx_encoder.py
+#
+# Exports the serving encoder to ONNX (fp32 + dynamically int8-quantized) and checks
+# both against the PyTorch baseline:
+#   - embedding agreement: cosine between backend and PyTorch embeddings per clause
+#   - classification agreement: share of clauses assigned the same category
+#
+#   python utils/export_onnx_encoder.py              # export, then validate
+#   python utils/export_onnx_encoder.py --skip-export
+import argparse
+import json
+import os
+import sys
+
+BASE = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, BASE)
+
+# The baseline is always PyTorch, whatever the server is configured with
+os.environ["ENCODER_BACKEND"] = "torch"
+
+from services import clause_service  # noqa: E402
+from services.category_index import build_category_index, collect_category_examples  # noqa: E402
+from services.encoder_backend import ONNX_FILES, OnnxEncoder, onnx_model_dir  # noqa: E402
+
+DATA_DIR = os.path.join(BASE, "data")
+
+parser = argparse.ArgumentParser(description="Export and validate ONNX encoders")
+parser.add_argument("--skip-export", action="store_true", help="validate existing exports only")
+parser.add_argument("--opset", type=int, default=14)
+parser.add_argument("--min-cosine", type=float, default=0.999, help="min per-clause cosine for fp32 ONNX")
+parser.add_argument("--min-cosine-int8", type=float, default=0.98, help="min per-clause cosine for int8 ONNX")
+parser.add_argument("--min-agreement", type=float, default=0.95, help="min classification agreement")
+args = parser.parse_args()
+
+MODEL_NAME = clause_service.MODEL_NAME
+HF_NAME = MODEL_NAME if "/" in MODEL_NAME else f"sentence-transformers/{MODEL_NAME}"
+OUT_DIR = onnx_model_dir(MODEL_NAME)
+
+
+# ---------------------------
+#  Export
+# ---------------------------
+def export():
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from transformers import AutoModel, AutoTokenizer
+
+    os.makedirs(OUT_DIR, exist_ok=True)
+    fp32_path = os.path.join(OUT_DIR, ONNX_FILES["onnx"])
+    int8_path = os.path.join(OUT_DIR, ONNX_FILES["onnx-int8"])
+
+    print(f"🔹 Exporting {HF_NAME} to {fp32_path}")
+    tokenizer = AutoTokenizer.from_pretrained(HF_NAME)
+    tokenizer.save_pretrained(OUT_DIR)
+    model = AutoModel.from_pretrained(HF_NAME).eval()
+
+    dummy = tokenizer(["The supplier shall indemnify the customer."], return_tensors="pt")
+    input_names = ["input_ids", "attention_mask", "token_type_ids"]
+    dynamic = {0: "batch", 1: "sequence"}
+
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(dummy[name] for name in input_names),
+            fp32_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes={**{name: dynamic for name in input_names}, "last_hidden_state": dynamic},
+            opset_version=args.opset,
+        )
+
+    print(f"🔹 Quantizing to {int8_path}")
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+
+
+# ---------------------------
+#  Validation
+# ---------------------------
+def sample_clauses():
+    samples = []
+    with open(os.path.join(DATA_DIR, "clauses.json"), "r", encoding="utf-8") as f:
+        samples.extend(item["clause"] for item in json.load(f))
+    for examples in collect_category_examples(clause_service.CATEGORIES).values():
+        samples.extend(examples)
+    samples.extend([
+        "Either party may terminate this Agreement upon thirty (30) days written notice.",
+        "In no event shall either party be liable for indirect, incidental or consequential damages.",
+        "All invoices are payable within forty-five (45) days of receipt.",
+        "This Agreement shall be governed by the laws of the State of Delaware.",
+        "Licensee shall not disclose any Confidential Information to third parties.",
+        "All right, title and interest in the Deliverables shall vest in the Company.",
+    ])
+    return samples
+
+
+def validate() -> bool:
+    samples = sample_clauses()
+    print(f"📄 Validating on {len(samples)} clauses")
+
+    baseline = clause_service.get_model().encode(samples, normalize_embeddings=True)
+    baseline_categories = clause_service.classify_embeddings(baseline)["best"]
+
+    ok = True
+    report = {}
+    for backend, min_cosine in (("onnx", args.min_cosine), ("onnx-int8", args.min_cosine_int8)):
+        encoder = OnnxEncoder(MODEL_NAME, backend)
+        embeddings = encoder.encode(samples, normalize_embeddings=True)
+        cosines = (embeddings * baseline).sum(axis=1)
+
+        # each backend classifies against prototypes built with its own embeddings
+        index = build_category_index(encoder, encoder.name, clause_service.CATEGORIES)
+        categories = clause_service.classify_embeddings(embeddings, index=index)["best"]
+        agreement = float((categories == baseline_categories).mean())
+
+        passed = float(cosines.min()) >= min_cosine and agreement >= args.min_agreement
+        ok = ok and passed
+        report[backend] = {
+            "mean_cosine": round(float(cosines.mean()), 5),
+            "min_cosine": round(float(cosines.min()), 5),
+            "classification_agreement": round(agreement, 4),
+            "passed": passed,
+        }
+        print(f"{'✅' if passed else '❌'} {backend}: {report[backend]}")
+
+    with open(os.path.join(OUT_DIR, "validation.json"), "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    return ok
+
+
+if not args.skip_export:
+    export()
+
+if not validate():
+    print("❌ ONNX encoders disagree with the PyTorch baseline beyond the configured tolerances")
+    sys.exit(1)
+
+print(f"✅ ONNX encoders ready in {OUT_DIR} — set ENCODER_BACKEND=onnx or onnx-int8")
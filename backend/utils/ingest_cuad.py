@@ -0,0 +1,45 @@
+# backend/utils/ingest_cuad.py
+#
+# Streams data/CUAD_v1.json into the columnar dataset read by services/cuad_dataset.py
+# (replaces process_cuad.py and data/process_cuad_smart.py). The JSON is parsed one
+# document at a time, every distinct contract text is stored once, and answers are
+# kept as character spans into it instead of copying the context per question.
+#
+#   python utils/ingest_cuad.py                                   # -> data/cuad_dataset/
+#   python utils/ingest_cuad.py --cuad other.json --out data/cuad_small --limit 20
+import argparse
+import itertools
+import os
+import resource
+import sys
+
+BASE = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, BASE)
+
+from services.cuad_dataset import CUAD_DATASET_DIR, CUAD_JSON_PATH, iter_cuad_documents, write_cuad_dataset  # noqa: E402
+
+parser = argparse.ArgumentParser(description="Ingest CUAD into a columnar dataset")
+parser.add_argument("--cuad", default=CUAD_JSON_PATH)
+parser.add_argument("--out", default=CUAD_DATASET_DIR)
+parser.add_argument("--limit", type=int, default=0, help="documents to ingest (0 = all)")
+args = parser.parse_args()
+
+if not os.path.exists(args.cuad):
+    print(f"❌ {args.cuad} not found")
+    sys.exit(1)
+
+print(f"📖 Streaming {args.cuad}...")
+documents = iter_cuad_documents(args.cuad)
+if args.limit:
+    documents = itertools.islice(documents, args.limit)
+manifest = write_cuad_dataset(args.out, documents, source=os.path.basename(args.cuad))
+
+counts = manifest["counts"]
+peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+print(f"✅ {counts['documents']} documents, {counts['contexts']} contexts "
+      f"({manifest['duplicate_contexts']} duplicates skipped), {counts['qas']} questions, "
+      f"{counts['answers']} answer spans, {len(manifest['labels'])} labels")
+if manifest["answers_relocated"] or manifest["answers_dropped"]:
+    print(f"⚠️ {manifest['answers_relocated']} answer offsets corrected, "
+          f"{manifest['answers_dropped']} answers not found in their context")
+print(f"💾 Saved to {args.out} in {manifest['build_seconds']}s, peak RSS {peak_mb:.0f} MB")
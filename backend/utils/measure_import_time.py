@@ -0,0 +1,62 @@
+# backend/utils/measure_import_time.py
+#
+# Cold-start cost of importing the API, from `python -X importtime`.
+#   python utils/measure_import_time.py            # import main
+#   python utils/measure_import_time.py --module services.clause_service --top 30
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+BASE = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+parser = argparse.ArgumentParser(description="Measure import time of a backend module")
+parser.add_argument("--module", default="main")
+parser.add_argument("--top", type=int, default=20, help="slowest top-level packages to list")
+parser.add_argument("--json", help="write results to this file")
+args = parser.parse_args()
+
+start = time.perf_counter()
+proc = subprocess.run(
+    [sys.executable, "-X", "importtime", "-c", f"import {args.module}"],
+    cwd=BASE,
+    capture_output=True,
+    text=True,
+)
+wall = time.perf_counter() - start
+
+if proc.returncode != 0:
+    print(proc.stderr[-2000:])
+    sys.exit(proc.returncode)
+
+# lines look like: "import time:   self [us] | cumulative | imported package"
+packages = {}
+total_us = 0
+for line in proc.stderr.splitlines():
+    if not line.startswith("import time:") or "cumulative" in line:
+        continue
+    _, self_us, cumulative_us, raw = line.replace("import time:", "|", 1).split("|")
+    # nesting is two spaces per level after the single space that follows the "|"
+    depth = (len(raw) - len(raw.lstrip()) - 1) // 2
+    name = raw.strip()
+    total_us += int(self_us)
+    if depth == 0:
+        top = name.split(".")[0]
+        packages[top] = packages.get(top, 0) + int(cumulative_us)
+
+slowest = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:args.top]
+
+print(f"⏱️ import {args.module}: {total_us / 1e6:.3f}s in imports, {wall:.3f}s wall (incl. interpreter start)")
+for name, us in slowest:
+    print(f"  {us / 1e3:10.1f} ms  {name}")
+
+if args.json:
+    with open(args.json, "w", encoding="utf-8") as f:
+        json.dump({
+            "module": args.module,
+            "import_seconds": round(total_us / 1e6, 4),
+            "wall_seconds": round(wall, 4),
+            "slowest": {name: round(us / 1e6, 4) for name, us in slowest},
+        }, f, indent=2)
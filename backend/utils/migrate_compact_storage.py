@@ -0,0 +1,89 @@
+# backend/utils/migrate_compact_storage.py
+#
+# Backfills legacy contracts rows (text + details inline) into the compact format of
+# database/compact_storage.py. Apply database/migrations/001_compact_storage.sql first.
+# Safe to re-run: texts and clauses are upserted, and migrated rows are skipped.
+#
+#   python utils/migrate_compact_storage.py --dry-run       # report the size savings
+#   python utils/migrate_compact_storage.py                 # write compact rows
+#   python utils/migrate_compact_storage.py --drop-legacy   # ... and clear text / details
+import argparse
+import json
+import os
+import sys
+
+BASE = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, BASE)
+
+from database.compact_storage import STORAGE_FORMAT_VERSION, compact_rows  # noqa: E402
+from database.supabase_client import get_supabase  # noqa: E402
+
+parser = argparse.ArgumentParser(description="Migrate contracts rows to the compact storage format")
+parser.add_argument("--key-column", default="id", help="primary key column of the contracts table")
+parser.add_argument("--page-size", type=int, default=100)
+parser.add_argument("--drop-legacy", action="store_true", help="set text / details / categories_summary to NULL")
+parser.add_argument("--dry-run", action="store_true", help="convert and measure only, write nothing")
+args = parser.parse_args()
+
+client = get_supabase()
+if client is None:
+    print("❌ Supabase is not configured (SUPABASE_URL / SUPABASE_KEY)")
+    sys.exit(1)
+
+
+def size_of(rows) -> int:
+    return sum(len(json.dumps(row, ensure_ascii=False).encode("utf-8")) for row in rows)
+
+
+migrated = 0
+bytes_before = 0
+bytes_after = 0
+offset = 0
+
+while True:
+    page = (
+        client.table("contracts").select("*")
+        .is_("storage_format", "null")
+        .order(args.key_column)
+        .range(offset, offset + args.page_size - 1)
+        .execute().data
+    )
+    if not page:
+        break
+
+    for legacy in page:
+        key = legacy[args.key_column]
+        # deterministic, so a re-run after a partial failure writes the same clause keys
+        tables = compact_rows(legacy, evaluation_id=f"legacy-{key}")
+        contract = tables["contracts"][0]
+
+        bytes_before += size_of([legacy])
+        bytes_after += sum(size_of(rows) for rows in tables.values())
+        migrated += 1
+        if args.dry_run:
+            continue
+
+        client.table("contract_texts").upsert(
+            tables["contract_texts"], on_conflict="hash", ignore_duplicates=True
+        ).execute()
+        clauses = tables["contract_clauses"]
+        for start in range(0, len(clauses), 500):
+            client.table("contract_clauses").upsert(
+                clauses[start:start + 500], on_conflict="evaluation_id,clause_index", ignore_duplicates=True
+            ).execute()
+
+        # the contracts row is updated last: it is what marks the row as migrated
+        update = {k: v for k, v in contract.items() if k not in ("name", "user_id", "risk_score", "level")}
+        update["storage_format"] = STORAGE_FORMAT_VERSION
+        if args.drop_legacy:
+            update.update({"text": None, "details": None, "categories_summary": None})
+        client.table("contracts").update(update).eq(args.key_column, key).execute()
+
+    # migrated rows leave the filter; a dry run has to page past them instead
+    if args.dry_run:
+        offset += len(page)
+    print(f"🔹 {migrated} rows converted")
+
+saved = 1 - bytes_after / bytes_before if bytes_before else 0.0
+print(f"{'🧪 Dry run: ' if args.dry_run else '✅ '}{migrated} rows, "
+      f"{bytes_before / 1e6:.2f} MB -> {bytes_after / 1e6:.2f} MB ({saved:.0%} smaller, before de-duplicating texts)")
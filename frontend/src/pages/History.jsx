@@ -32,7 +32,7 @@ export default function History() {
   const filtered = records.filter((rec) => {
     const matchesSearch =
       rec.name?.toLowerCase().includes(search.toLowerCase()) ||
-      rec.text?.toLowerCase().includes(search.toLowerCase());
+      (rec.text_preview ?? rec.text)?.toLowerCase().includes(search.toLowerCase());
 
     const matchesFilter =
       filter === "All" ? true : rec.level === filter;